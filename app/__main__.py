@@ -0,0 +1,26 @@
+"""
+Command-line entry point for Coder-X: python -m app [COMMAND] ...
+"""
+import os
+import sys
+
+from app import __version__
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # Answer version queries without importing typer or any subcommand dependencies
+    if argv in (["version"], ["--version"]):
+        print(f"Coder-X version {__version__}")
+        return 0
+    if os.environ.get("CODER_X_NO_DAEMON", "0") != "1":
+        from app.daemon import run_remote
+        code = run_remote(argv)
+        if code is not None:
+            return code
+    from app.cli_entry import app
+    return app(args=argv, prog_name="coder-x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+Batch command execution for Coder-X
+- Runs many commands in one process: `coder-x batch [FILE] [--workers N]` (stdin by default)
+- Input is one command per line: plain text is parsed like a shell command line and run
+  through the Typer CLI; NDJSON objects give {"argv": [...]} for the Typer CLI or
+  {"line": "..."} for the interactive grammar of cli.run_command_line, plus an optional "id"
+- Each result is written as it completes as one NDJSON record:
+  {"id", "exit", "ok", "output", "error", "elapsed_ms"}
+- With workers > 1, consecutive read-only commands run concurrently; any other command
+  waits for them and runs alone. Records are always written in input order.
+"""
+import io
+import json
+import shlex
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+
+# (command, subcommand) pairs that only read state; None matches a command given without one
+READ_ONLY_COMMANDS = {
+    ("version", None), ("user", None), ("file", "read"), ("config", "show"),
+    ("model", "list"), ("model", "catalog"), ("model", "discover"), ("model", "info"), ("model", "volumes"), ("mcp", "get-server"), ("mcp", "get-context"),
+    ("integration", "list"), ("history", None), ("history", "show"), ("history", "search"),
+    ("history", "context"),
+}
+READ_ONLY_LINES = {("help", None), ("model", "list"), ("config", "show")}
+# Flags that make a read-only command write: volume probes write temp files and time the disk
+WRITING_FLAGS = {"--probe"}
+
+
+class _ThreadLocalStream(io.TextIOBase):
+    """Stand-in for sys.stdout/sys.stderr that sends each thread's writes to its own buffer."""
+
+    encoding = "utf-8"
+    errors = "strict"
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._local = threading.local()
+
+    def capture(self, buffer: Optional[io.StringIO]):
+        self._local.buffer = buffer
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return False
+
+    def write(self, text: str) -> int:
+        # Rejecting bytes matters: click probes streams with write(b"") to find binary writers
+        if not isinstance(text, str):
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer or self._fallback).write(text)
+
+    def flush(self):
+        if getattr(self._local, "buffer", None) is None:
+            self._fallback.flush()
+
+
+def parse_request(line: str, number: int) -> Optional[dict]:
+    """Turn one input line into {"id", "argv"} or {"id", "line"}; None for blank lines and comments."""
+    text = line.strip()
+    if not text or text.startswith("#"):
+        return None
+    if text.startswith("{"):
+        data = json.loads(text)
+        request = {"id": data.get("id", number)}
+        if isinstance(data.get("argv"), list):
+            request["argv"] = [str(a) for a in data["argv"]]
+        elif isinstance(data.get("line"), str):
+            request["line"] = data["line"]
+        else:
+            raise ValueError('NDJSON requests need an "argv" list or a "line" string')
+        return request
+    return {"id": number, "argv": shlex.split(text)}
+
+
+def _command_key(words: List[str]) -> Tuple[str, Optional[str]]:
+    sub = words[1] if len(words) > 1 and not words[1].startswith("-") else None
+    return (words[0] if words else "", sub)
+
+
+def is_read_only(request: dict) -> bool:
+    if "invalid" in request:
+        return False
+    if "argv" in request:
+        if WRITING_FLAGS.intersection(request["argv"]):
+            return False
+        return _command_key(request["argv"]) in READ_ONLY_COMMANDS
+    return _command_key(request["line"].split()) in READ_ONLY_LINES
+
+
+class BatchRunner:
+    def __init__(self, out: IO[str], workers: int = 1):
+        self.out = out
+        self.workers = max(1, workers)
+        self._stdout: Optional[_ThreadLocalStream] = None
+        self._stderr: Optional[_ThreadLocalStream] = None
+
+    def _execute(self, request: dict) -> dict:
+        from app.cli import run_command_line
+        from app.cli_entry import invoke
+        if "invalid" in request:
+            return {"id": request["id"], "exit": 2, "ok": False, "output": "",
+                    "error": f"[ERROR] Invalid batch request: {request['invalid']}\n", "elapsed_ms": 0.0}
+        out, err = io.StringIO(), io.StringIO()
+        self._stdout.capture(out)
+        self._stderr.capture(err)
+        start = time.perf_counter()
+        try:
+            if "argv" in request:
+                code = invoke(request["argv"])
+            else:
+                result = run_command_line(request["line"])
+                if result:
+                    out.write(str(result) + "\n")
+                code = 0
+        except Exception as e:
+            err.write(f"[ERROR] {e}\n")
+            code = 1
+        finally:
+            self._stdout.capture(None)
+            self._stderr.capture(None)
+        return {
+            "id": request["id"],
+            "exit": code,
+            "ok": code == 0,
+            "output": out.getvalue(),
+            "error": err.getvalue(),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+
+    def _emit(self, record: dict):
+        self.out.write(json.dumps(record) + "\n")
+        self.out.flush()
+
+    def _requests(self, lines: Iterable[str]) -> Iterator[dict]:
+        for number, line in enumerate(lines, 1):
+            try:
+                request = parse_request(line, number)
+            except ValueError as e:
+                # Malformed input is reported like a failed command rather than ending the batch
+                request = {"id": number, "invalid": str(e)}
+            if request is not None:
+                yield request
+
+    def run(self, lines: Iterable[str]) -> int:
+        """Run every request and return the number that failed."""
+        saved = sys.stdin, sys.stdout, sys.stderr
+        self._stdout = _ThreadLocalStream(saved[1])
+        self._stderr = _ThreadLocalStream(saved[2])
+        failed = 0
+        # Commands must never prompt: the batch input is not theirs to read
+        sys.stdin, sys.stdout, sys.stderr = io.StringIO(""), self._stdout, self._stderr
+        try:
+            if self.workers == 1:
+                for request in self._requests(lines):
+                    record = self._execute(request)
+                    failed += not record["ok"]
+                    self._emit(record)
+                return failed
+            pending = deque()
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                def drain(keep: int):
+                    nonlocal failed
+                    while len(pending) > keep or (pending and pending[0].done()):
+                        record = pending.popleft().result()
+                        failed += not record["ok"]
+                        self._emit(record)
+
+                for request in self._requests(lines):
+                    if is_read_only(request):
+                        pending.append(pool.submit(self._execute, request))
+                        drain(self.workers * 4)
+                    else:
+                        drain(0)
+                        record = self._execute(request)
+                        failed += not record["ok"]
+                        self._emit(record)
+                drain(0)
+            return failed
+        finally:
+            sys.stdin, sys.stdout, sys.stderr = saved
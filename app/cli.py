@@ -3,7 +3,6 @@ CLI/Interactive shell for Coder-X
 """
 import sys
 
-import readline
 import json
 
 import os
@@ -202,6 +201,8 @@ def run_command_line(line):
 
 def main():
     import sys
+    # Line editing for the interactive prompt; not needed for one-shot commands
+    import readline  # noqa: F401
     # If any arguments are passed (other than script name), treat as a command
     if len(sys.argv) > 1:
         command = " ".join(sys.argv[1:])
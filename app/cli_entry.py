@@ -1,29 +1,127 @@
 """
 CLI entrypoint for Coder-X using Typer
+- Subcommands import their dependencies (pydantic, requests, prompt_toolkit, ...) when they
+  run, so startup only pays for typer; `python -m app version` skips even that
 """
+from typing import List
+
 import typer
-from app import cli
+from app import __version__
 from app.config_cli import config_app
 
 app = typer.Typer(help="Coder-X: Python Agentic Coding Assistant")
 app.add_typer(config_app, name="config")
 
+@app.callback()
+def main_options(
+    ctx: typer.Context,
+    profile: bool = typer.Option(False, "--profile", help="Print a timing span tree when the command finishes (or set CODER_X_PROFILE=1)"),
+    profile_output: str = typer.Option(None, "--profile-output", help="Also write a Chrome trace (.json) or cProfile stats (.prof/.pstats)"),
+):
+    """Coder-X: Python Agentic Coding Assistant"""
+    from app import latency_stats, profiling
+    output = profiling.start_from_env(profile, profile_output)
+    recording = latency_stats.start() is not None
+    if not (profiling.enabled() or recording):
+        return
+    command = profiling.span(f"command.{ctx.invoked_subcommand}")
+    command.__enter__()
+
+    def finish():
+        command.__exit__(None, None, None)
+        if output is not None:
+            profiling.write_report(output or None)
+        latency_stats.flush()
+
+    ctx.call_on_close(finish)
+
+def _warm_status(result: dict) -> str:
+    state = f"loaded in {result['load_ms'] / 1000:.1f}s" if result["cold"] else "already warm"
+    evicted = f", evicted {', '.join(result['evicted'])}" if result["evicted"] else ""
+    return f"[OK] {result['model']} {state}{evicted}"
+
 @app.command()
-def model(action: str = typer.Argument(..., help="Action: list, set, storage-path, load, unload, volumes, set-volume"), name: str = typer.Argument(None, help="Model name or path")):
+def model(action: str = typer.Argument(..., help="Action: list, catalog, discover, info, dedupe, set, preload, pool, storage-path, load, unload, volumes, set-volume"), names: List[str] = typer.Argument(None, help="Model name or path (catalog: format filter; load, preload: one or more names; pool: model to evict; dedupe: directories to scan)"),
+          details: bool = typer.Option(False, "--details", help="list: include size, format, digest and modified time; volumes --probe: print JSON"),
+          min_size: int = typer.Option(None, "--min-size", help="catalog/dedupe: minimum size in bytes"),
+          max_size: int = typer.Option(None, "--max-size", help="catalog: maximum size in bytes"),
+          rescan: bool = typer.Option(False, "--rescan", help="catalog: re-check every entry"),
+          depth: int = typer.Option(None, "--depth", help="discover: subdirectory levels to descend"),
+          timeout: float = typer.Option(None, "--timeout", help="discover, volumes --probe: seconds before a volume is given up on"),
+          parallel: int = typer.Option(2, "--parallel", help="load: models to pull at once"),
+          apply: bool = typer.Option(False, "--apply", help="dedupe: replace duplicates (default is a dry-run report)"),
+          link: str = typer.Option("auto", "--link", help="dedupe: auto, reflink or hardlink"),
+          workers: int = typer.Option(None, "--workers", help="dedupe: hashing threads"),
+          probe: bool = typer.Option(False, "--probe", help="volumes: measure filesystem, free space and throughput, and rank"),
+          probe_size: int = typer.Option(None, "--probe-size", help="volumes --probe: MB written and read per volume"),
+          warm: bool = typer.Option(False, "--warm", help="set: also load the model into the warm pool (waits for the load)")):
     """List, set, load/unload models, or manage storage/volume."""
     import json, os
+    name = names[0] if names else None
     from app.model_management import ModelManager
     mgr = ModelManager()
-    if action == "list":
+    if action == "list" and details:
+        typer.echo(json.dumps({"local": mgr.find_models(), "ollama": mgr.list_ollama_model_details()}, indent=2))
+    elif action == "list":
         models = set(mgr.list_local_models())
         try:
             models.update(mgr.list_ollama_models())
         except Exception:
             pass
         typer.echo(json.dumps(sorted(models), indent=2))
+    elif action == "catalog":
+        if rescan:
+            mgr.catalog.refresh(force=True)
+        typer.echo(json.dumps(mgr.find_models(name, min_size, max_size), indent=2))
+    elif action == "info" and name:
+        from app.gguf import GGUFError
+        try:
+            typer.echo(json.dumps(mgr.model_info(name), indent=2))
+        except (FileNotFoundError, GGUFError) as e:
+            typer.echo(f"[ERROR] {e}")
+            raise typer.Exit(1)
+    elif action == "discover":
+        typer.echo(json.dumps(mgr.discover_models(depth, timeout), indent=2))
+    elif action == "dedupe":
+        try:
+            report = mgr.dedupe_models(names or None, dry_run=not apply, link=link, min_size=min_size, workers=workers)
+        except ValueError as e:
+            typer.echo(f"[ERROR] {e}")
+            raise typer.Exit(1)
+        typer.echo(json.dumps(report, indent=2))
+        gb = (report["reclaimed_bytes"] if apply else report["reclaimable_bytes"]) / 1e9
+        verb = "[OK] Reclaimed" if apply else "[INFO] Dry run: would reclaim"
+        typer.echo(f"{verb} {gb:.2f} GB from {sum(len(g['duplicates']) for g in report['groups'])} duplicate file(s).")
     elif action == "set" and name:
-        mgr.set_active_model(name)
-        typer.echo({"active_model": name})
+        if not warm:
+            mgr.set_active_model(name)
+            typer.echo({"active_model": name})
+        else:
+            result = mgr.set_active_model(name, warm=True)
+            typer.echo({"active_model": name})
+            if result is None:
+                typer.echo(f"[WARN] Model '{name}' could not be loaded; it will load on first use.")
+            else:
+                typer.echo(_warm_status(result))
+    elif action == "preload":
+        results = mgr.preload_models(names or None)
+        if not results:
+            typer.echo("[INFO] No models to preload (set model_pool_preload or name them).")
+        for r in results:
+            if r.get("error"):
+                typer.echo(f"[ERROR] Model '{r['model']}' {r['error']}.")
+            else:
+                typer.echo(_warm_status(r))
+    elif action == "pool":
+        from app.ollama_client import OllamaError, OllamaUnavailable
+        try:
+            if name:
+                typer.echo(f"[OK] Evicted {name}." if mgr.pool.evict(name) else f"[INFO] {name} is not resident.")
+            else:
+                typer.echo(json.dumps(mgr.pool.status(), indent=2))
+        except (OllamaUnavailable, OllamaError) as e:
+            typer.echo(f"[ERROR] {e}")
+            raise typer.Exit(1)
     elif action == "storage-path":
         if name:
             path = os.path.expanduser(name)
@@ -49,12 +147,25 @@ def model(action: str = typer.Argument(..., help="Action: list, set, storage-pat
         else:
             typer.echo(f"Current model storage path: {mgr.storage_path}")
     elif action == "load" and name:
-        typer.echo(f"[INFO] Loading model '{name}' via Ollama...")
-        ok = mgr.load_model_ollama(name)
-        if ok:
-            typer.echo(f"Model '{name}' loaded successfully.")
-        else:
-            typer.echo(f"[ERROR] Failed to load model '{name}'.")
+        import sys
+        from app.model_pull import ProgressRenderer, PullQueue, add_listener, remove_listener
+        for n in names:
+            typer.echo(f"[INFO] Loading model '{n}' via Ollama...")
+        renderer = ProgressRenderer(sys.stderr)
+        add_listener(renderer)
+        try:
+            with PullQueue(mgr.load_model_ollama, parallel) as queue:
+                for n in names:
+                    queue.submit(n)
+                results = queue.wait()
+        finally:
+            remove_listener(renderer)
+            renderer.finish()
+        for n, ok in results.items():
+            if ok:
+                typer.echo(f"Model '{n}' loaded successfully.")
+            else:
+                typer.echo(f"[ERROR] Failed to load model '{n}'.")
     elif action == "unload" and name:
         typer.echo(f"[INFO] Unloading model '{name}' via Ollama...")
         ok = mgr.unload_model_ollama(name)
@@ -62,6 +173,17 @@ def model(action: str = typer.Argument(..., help="Action: list, set, storage-pat
             typer.echo(f"Model '{name}' unloaded successfully.")
         else:
             typer.echo(f"[ERROR] Failed to unload model '{name}'.")
+    elif action == "volumes" and probe:
+        from app.volume_probe import format_volume
+        results = mgr.probe_volumes(probe_size * 1024 * 1024 if probe_size else None, timeout)
+        if details:
+            typer.echo(json.dumps(results, indent=2))
+        else:
+            typer.echo("Model storage volumes, fastest first:")
+            for r in results:
+                typer.echo(f"  {format_volume(r)}")
+        if results and results[0].get("read_mb_s") is not None:
+            typer.echo(f"[INFO] Recommended volume: {results[0]['path']}")
     elif action == "volumes":
         volumes = mgr.list_ollama_volumes()
         typer.echo("Available model storage volumes:")
@@ -69,19 +191,50 @@ def model(action: str = typer.Argument(..., help="Action: list, set, storage-pat
             typer.echo(f"  {v}")
     elif action == "set-volume" and name:
         typer.echo(f"[INFO] Setting Ollama model storage volume to '{name}'...")
-        ok = mgr.set_ollama_volume(os.path.expanduser(name))
+        import sys
+        from app.model_migration import ProgressPrinter, add_listener, remove_listener
+        printer = ProgressPrinter(sys.stderr)
+        add_listener(printer)
+        try:
+            ok = mgr.set_ollama_volume(os.path.expanduser(name))
+        finally:
+            remove_listener(printer)
         if ok:
             typer.echo(f"Ollama volume set to: {name}")
         else:
             typer.echo(f"[ERROR] Failed to set Ollama volume.")
     else:
-        typer.echo("Usage: coder-x model [list|set|storage-path|load|unload|volumes|set-volume] [name/path]")
+        typer.echo("Usage: coder-x model [list|catalog|discover|info|dedupe|set|preload|pool|storage-path|load|unload|volumes|set-volume] [name/path]")
 
 @app.command()
-def file(action: str = typer.Argument(..., help="Action: read, write, append"), path: str = typer.Argument(..., help="File path"), text: str = typer.Argument(None, help="Text for write/append")):
+def file(
+    action: str = typer.Argument(..., help="Action: read, write, append"),
+    path: str = typer.Argument(..., help="File path"),
+    text: str = typer.Argument(None, help="Text for write/append"),
+    lines: str = typer.Option(None, "--lines", help="Read only lines A:B (1-based, inclusive; negative counts from the end; A or B may be omitted)"),
+    byte_range: str = typer.Option(None, "--bytes", help="Read only bytes A:B (offsets, end exclusive)"),
+    pager: bool = typer.Option(None, "--pager/--no-pager", help="Page the output (default: when writing to a terminal)"),
+):
     """Read, write, or append to files."""
-    from app.file_operations import read_file, write_file, append_file
-    if action == "read":
+    from app.file_operations import is_large_file, read_chunks, read_file, write_file, append_file
+    if action == "read" and (lines or byte_range or is_large_file(path)):
+        import sys
+        try:
+            chunks = read_chunks(path, lines, byte_range)
+            if pager is None:
+                pager = sys.stdout.isatty()
+            if pager:
+                import click
+                click.echo_via_pager(chunks)
+            else:
+                last = ""
+                for last in chunks:
+                    typer.echo(last, nl=False)
+                if not last.endswith("\n"):
+                    typer.echo("")
+        except (OSError, ValueError) as e:
+            typer.echo(f"[ERROR] {e}")
+    elif action == "read":
         try:
             content = read_file(path)
             typer.echo(content)
@@ -100,14 +253,72 @@ def file(action: str = typer.Argument(..., help="Action: read, write, append"),
         except Exception as e:
             typer.echo(f"[ERROR] {e}")
     else:
-        typer.echo("Usage: coder-x file [read|write|append] <path> [text]")
+        typer.echo("Usage: coder-x file [read|write|append] <path> [text] [--lines A:B|--bytes A:B]")
+
+def _time_bound(value, option: str):
+    """Parse a --since/--until value; an unparseable one is a usage error, not "no bound"."""
+    if value is None:
+        return None
+    from app.history_search import parse_timestamp
+    ts = parse_timestamp(value)
+    if ts is None:
+        raise typer.BadParameter(f"{value!r} is neither epoch seconds nor an ISO-8601 time.", param_hint=option)
+    return ts
 
 @app.command()
-def history():
-    """Show session history."""
+def history(
+    action: str = typer.Argument("show", help="Action: show, search, compact, export, context"),
+    query: str = typer.Argument(None, help="Search terms (for search) or destination path (for export)"),
+    tail: int = typer.Option(None, "--tail", help="Show only the last N entries"),
+    offset: int = typer.Option(0, "--offset", help="Index of the first entry to show"),
+    limit: int = typer.Option(None, "--limit", help="Maximum number of entries to show"),
+    field: str = typer.Option(None, "--field", help="Only match this entry field (for search)"),
+    since: str = typer.Option(None, "--since", help="Earliest entry time, epoch seconds or ISO-8601 (for search/export)"),
+    until: str = typer.Option(None, "--until", help="Latest entry time, epoch seconds or ISO-8601 (for search/export)"),
+    fmt: str = typer.Option(None, "--format", help="Export format: jsonl, json, jsonl.gz, csv, md (for export)"),
+    entry_type: str = typer.Option(None, "--type", help="Only export entries with this type (for export)"),
+    budget: int = typer.Option(4000, "--budget", help="Token budget (for context)"),
+    keep: int = typer.Option(None, "--keep", help="Closed segments to keep (for compact)"),
+    max_age_days: float = typer.Option(None, "--max-age-days", help="Drop segments older than this (for compact)"),
+    summarize: bool = typer.Option(False, "--summarize", help="Replace dropped segments with a summary entry (for compact)"),
+):
+    """Show or search session history."""
+    import json
     from app.session_history import SessionHistory
+    since, until = _time_bound(since, "--since"), _time_bound(until, "--until")
     sh = SessionHistory()
-    typer.echo(sh.get_history())
+    if action == "search" and query:
+        results = sh.search(query, field=field, since=since, until=until, limit=limit or 20)
+        for result in results:
+            typer.echo(json.dumps(result))
+        return
+    if action == "export" and query:
+        ok = sh.export(query, fmt=fmt, since=since, until=until, entry_type=entry_type)
+        if ok:
+            typer.echo(f"[OK] History exported to {query}")
+        else:
+            typer.echo(f"[ERROR] Failed to export history to {query}")
+        return
+    if action == "context":
+        from app.context_builder import ContextBuilder
+        window = ContextBuilder(sh).build(budget)
+        typer.echo(window["text"])
+        return
+    if action == "compact":
+        removed = sh.compact(keep_segments=keep, max_age_days=max_age_days, summarize=summarize)
+        typer.echo(f"[OK] Removed {removed} history entries.")
+        return
+    if action != "show":
+        typer.echo("Usage: coder-x history [show|search <query>|compact|export <path>|context] [--tail N] [--offset N] [--limit N]")
+        return
+    if tail is not None:
+        entries = sh.tail(tail)
+    elif offset or limit is not None:
+        entries = sh.page(offset, limit)
+    else:
+        entries = sh.get_history()
+    for entry in entries:
+        typer.echo(json.dumps(entry))
 
 @app.command()
 def user():
@@ -175,12 +386,77 @@ def mcp(action: str = typer.Argument(..., help="Action: get-server, set-server,
     else:
         typer.echo("Usage: coder-x mcp [get-server|set-server|get-context|save-context] <arg1> [arg2]")
 
+@app.command()
+def daemon(action: str = typer.Argument("start", help="Action: start, stop, status"),
+           socket: str = typer.Option(None, "--socket", help="Unix socket path (default: $CODER_X_SOCKET or ~/.coder_x.sock)")):
+    """Run a persistent Coder-X daemon that serves CLI commands over a Unix socket."""
+    from app import daemon as coder_daemon
+    path = socket or coder_daemon.socket_path()
+    if action == "start":
+        try:
+            server = coder_daemon.create_server(path)
+        except (RuntimeError, OSError) as e:
+            typer.echo(f"[ERROR] {e}")
+            raise typer.Exit(1)
+        typer.echo(f"[OK] Coder-X daemon listening on {path}")
+        coder_daemon.serve(server)
+    elif action == "stop":
+        if coder_daemon.stop(path):
+            typer.echo("[OK] Coder-X daemon stopped.")
+        else:
+            typer.echo(f"[ERROR] No Coder-X daemon is running on {path}.")
+            raise typer.Exit(1)
+    elif action == "status":
+        pid = coder_daemon.ping(path)
+        if pid is None:
+            typer.echo(f"No Coder-X daemon is running on {path}.")
+            raise typer.Exit(1)
+        typer.echo(f"Coder-X daemon running (pid {pid}) on {path}")
+    else:
+        typer.echo("Usage: coder-x daemon [start|stop|status] [--socket PATH]")
+
+@app.command()
+def batch(path: str = typer.Argument(None, help="File of commands (default: stdin)"),
+          workers: int = typer.Option(1, "--workers", help="Run consecutive read-only commands on this many threads")):
+    """Run newline-delimited commands or NDJSON requests in one process, streaming NDJSON results."""
+    import sys
+    from app.batch import BatchRunner
+    runner = BatchRunner(sys.stdout, workers=workers)
+    if path:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                failed = runner.run(f)
+        except OSError as e:
+            typer.echo(f"[ERROR] Could not read batch file: {e}")
+            raise typer.Exit(1)
+    else:
+        failed = runner.run(sys.stdin)
+    if failed:
+        raise typer.Exit(1)
+
+@app.command()
+def stats(days: int = typer.Option(1, "--days", help="Merge this many daily files, ending today"),
+          op: str = typer.Option(None, "--op", help="Only show operations starting with this prefix"),
+          as_json: bool = typer.Option(False, "--json", help="Print rows as JSON")):
+    """Show latency percentiles and throughput per operation."""
+    import json
+    from app.latency_stats import load_days, stats_dir, summarize
+    rows = summarize(load_days(days), prefix=op)
+    if as_json:
+        typer.echo(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        typer.echo(f"No latency stats recorded in {stats_dir()}.")
+        return
+    typer.echo(f"{'operation':<28} {'count':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'per min':>8}")
+    for row in rows:
+        typer.echo(f"{row['op']:<28} {row['count']:>7} {row['p50_ms']:>9.2f} {row['p90_ms']:>9.2f} "
+                   f"{row['p99_ms']:>9.2f} {row['max_ms']:>9.2f} {row['per_min']:>8.2f}")
+
 @app.command()
 def version():
     """Show the version of Coder-X."""
-    typer.echo("Coder-X version 1.0.0")
-
-from typing import List
+    typer.echo(f"Coder-X version {__version__}")
 
 @app.command()
 def shell(cmd: List[str] = typer.Argument(None, help="Shell command to run (optional, pass as separate args)")):
@@ -196,5 +472,20 @@ def shell(cmd: List[str] = typer.Argument(None, help="Shell command to run (opti
         InteractiveShell().run()
 
 
+def invoke(argv) -> int:
+    """Run one CLI command in-process and return its exit code instead of exiting."""
+    import sys
+    try:
+        app(args=list(argv), prog_name="coder-x")
+        return 0
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        if isinstance(e.code, int):
+            return e.code
+        print(e.code, file=sys.stderr)
+        return 1
+
+
 if __name__ == "__main__":
     app()
@@ -1,10 +1,15 @@
 """
 Configuration management for Coder-X
+- Loaded configs are cached per process, keyed on the file's (path, inode, mtime_ns, size),
+  so repeated load_config calls within one command parse and validate the file only once
 """
 import os
 import json
-from typing import Optional, Any
+import threading
+from typing import Optional, Any, Dict, Tuple
 from app.config_schema import CoderXConfig
+from app.file_stamps import is_settled
+from app.profiling import span
 from pydantic import ValidationError
 
 # Deprecated: for backward compatibility only. Use get_config_path() everywhere else.
@@ -12,14 +17,49 @@ CONFIG_PATH = os.environ.get("CODER_X_CONFIG") or os.path.expanduser("~/.coder_x
 def get_config_path() -> str:
     return os.environ.get("CODER_X_CONFIG") or os.path.expanduser("~/.coder_x_config.json")
 
+_config_cache: Dict[str, Tuple[Tuple[int, int, int], CoderXConfig]] = {}
+_config_cache_lock = threading.Lock()
+
+def _config_stamp(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def clear_config_cache(path: Optional[str] = None):
+    """Forget cached configs (all of them, or just the one loaded from path)."""
+    with _config_cache_lock:
+        if path is None:
+            _config_cache.clear()
+        else:
+            _config_cache.pop(os.path.abspath(path), None)
+
 def load_config(path: Optional[str] = None) -> CoderXConfig:
     """
     Loads config from file, merges with defaults, and validates.
     Raises ValueError if config is invalid or cannot be loaded.
-    Logs file path and loaded/merged data for debugging.
+    Returns a copy of the cached config if the file has not changed since it was last loaded.
     """
-    import logging
     path = path or CONFIG_PATH
+    key = os.path.abspath(path)
+    stamp = _config_stamp(path)
+    if stamp is not None:
+        with _config_cache_lock:
+            cached = _config_cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            with span("config.load", path=path, cached=True):
+                return cached[1].model_copy(deep=True)
+    with span("config.load", path=path, cached=False):
+        config = _load_config_file(path)
+    # A file modified within the racy window is re-read next time instead of being cached
+    if stamp is not None and is_settled(stamp[1]) and _config_stamp(path) == stamp:
+        with _config_cache_lock:
+            _config_cache[key] = (stamp, config.model_copy(deep=True))
+    return config
+
+def _load_config_file(path: str) -> CoderXConfig:
+    import logging
     from app.config_schema import CoderXConfig
     default = CoderXConfig().model_dump()
     logging.debug(f"[load_config] Loading config from: {path}")
@@ -27,7 +67,7 @@ def load_config(path: Optional[str] = None) -> CoderXConfig:
         try:
             with open(path, "r") as f:
                 content = f.read().strip()
-                logging.debug(f"[load_config] Raw file content: {content}")
+                logging.debug("[load_config] Raw file content: %s", content)
                 if not content:
                     logging.debug("[load_config] Empty config file, using defaults.")
                     return CoderXConfig()
@@ -41,9 +81,9 @@ def load_config(path: Optional[str] = None) -> CoderXConfig:
                     merged["api_keys"] = APIKeys(**merged_api_keys)
                 else:
                     merged["api_keys"] = merged_api_keys
-            logging.debug(f"[load_config] Merged config dict: {merged}")
+            logging.debug("[load_config] Merged config dict: %s", merged)
             config = CoderXConfig.model_validate(merged)
-            logging.debug(f"[load_config] Loaded config: {config}")
+            logging.debug("[load_config] Loaded config: %s", config)
             return config
         except Exception as e:
             logging.error(f"[load_config] Failed to load or validate config at {path}: {e}")
@@ -57,7 +97,8 @@ def save_config(config: CoderXConfig, path: Optional[str] = None):
     Saves a complete config (all fields, no missing keys) to file.
     """
     path = path or get_config_path()
-    with open(path, "w") as f:
+    clear_config_cache(path)
+    with span("config.save", path=path), open(path, "w") as f:
         json.dump(config.model_dump(exclude_unset=False), f, indent=2)
 
 def set_config_key(config: CoderXConfig, dotted_key: str, value: Any) -> CoderXConfig:
@@ -1,10 +1,6 @@
 import typer
 import json
 from typing import Optional
-from app.config import (
-    load_config, save_config, set_config_key, unset_config_key, CONFIG_PATH
-)
-from app.config_schema import CoderXConfig
 
 config_app = typer.Typer(help="Manage Coder-X configuration.")
 
@@ -14,6 +10,7 @@ def print_json(data):
 @config_app.command()
 def show(config_path: Optional[str] = typer.Option(None, help="Path to config file.")):
     """Show current configuration."""
+    from app.config import load_config
     try:
         config = load_config(config_path)
         print_json({"success": True, "config": config.model_dump()})
@@ -28,6 +25,7 @@ def set(
     config_path: Optional[str] = typer.Option(None, help="Path to config file.")
 ):
     """Set a configuration value."""
+    from app.config import load_config, save_config, set_config_key
     try:
         config = load_config(config_path)
         # Try to convert value to int, float, or bool
@@ -51,6 +49,7 @@ def unset(
     config_path: Optional[str] = typer.Option(None, help="Path to config file.")
 ):
     """Unset (remove) a configuration value."""
+    from app.config import load_config, save_config, unset_config_key
     try:
         config = load_config(config_path)
         config = unset_config_key(config, key)
@@ -63,6 +62,7 @@ def unset(
 @config_app.command()
 def setup(config_path: Optional[str] = typer.Option(None, help="Path to config file.")):
     """Guided configuration setup (interactive)."""
+    from app.config import load_config, save_config, set_config_key
     try:
         config = load_config(config_path)
         # Guided prompts
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Literal
 import os
 
 class APIKeys(BaseModel):
@@ -15,6 +15,24 @@ class CoderXConfig(BaseModel):
     api_keys: APIKeys = Field(default_factory=APIKeys)
     mcp_server: Optional[str] = None
     history_path: str = Field(default_factory=lambda: os.path.expanduser("~/.coder_x_history.json"))
+    # History segment rotation; 0 disables a limit
+    history_segment_max_bytes: int = 0
+    history_segment_max_age: int = 0  # seconds
+    history_segment_compression: Literal["gzip", "lzma", "none"] = "gzip"
+    history_retention_days: int = 0
+    # "flush" writes every append, "fsync" also syncs it to disk, "buffered" batches appends in the background
+    history_durability: Literal["flush", "fsync", "buffered"] = "flush"
+    history_flush_entries: int = 64
+    history_flush_interval_ms: int = 200
+    # Model discovery across volumes: subdirectory levels to descend, and seconds before a volume is given up on
+    model_discovery_depth: int = 2
+    model_discovery_timeout: float = 5.0
+    # Threads copying models when set-volume migrates them to another filesystem
+    model_migration_workers: int = 4
+    # Warm pool: models kept resident in Ollama, within a RAM budget (0 = half of physical memory)
+    model_pool_budget_mb: int = 0
+    model_pool_keep_alive: str = "30m"
+    model_pool_preload: List[str] = Field(default_factory=list)
 
     @field_validator("model_storage_path", mode="before")
     @classmethod
@@ -0,0 +1,179 @@
+"""
+Token-budgeted context window builder for Coder-X
+- Builds a model prompt from the most recent session history entries that fit a token budget
+- Token counts are cached per entry in a packed sidecar file (<history_path>.tokens), so old
+  turns are measured once and never re-tokenized
+- Older turns that do not fit can be replaced by a short summary line
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import Callable, List, Optional
+
+from .file_lock import lock_fd, unlock_fd
+from .history_search import entry_fingerprint
+
+TOKENS_MAGIC = b"CXTOK01\0"
+# magic, tokenizer id, counted entries, crc of the last counted entry
+TOKENS_HEADER = struct.Struct("<8sIQI")
+COUNT = struct.Struct("<I")
+SYNC_BATCH_SIZE = 2000
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap tokenizer-free estimate (~4 characters per token)."""
+    return max(1, (len(text) + 3) // 4)
+
+
+def render_entry(entry) -> str:
+    """Render a history entry as prompt text."""
+    if isinstance(entry, str):
+        return entry
+    if isinstance(entry, dict):
+        if "role" in entry and "content" in entry:
+            content = entry["content"] if isinstance(entry["content"], str) else json.dumps(entry["content"])
+            return f"{entry['role']}: {content}"
+        if isinstance(entry.get("cmd"), str):
+            output = entry.get("output")
+            if output:
+                return f"$ {entry['cmd']}\n{output if isinstance(output, str) else json.dumps(output)}"
+            return f"$ {entry['cmd']}"
+    return json.dumps(entry)
+
+
+class TokenCountCache:
+    """Per-entry token counts for a history, stored as a packed uint32 array."""
+
+    def __init__(self, path: str, tokenizer_name: str):
+        self.path = path
+        self.tokenizer_id = zlib.crc32(tokenizer_name.encode())
+        self._mm: Optional[mmap.mmap] = None
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def sync(self, history, count_tokens: Callable[[object], int]) -> int:
+        """Count tokens for entries added since the last sync; recount everything if the
+        history was rewritten or the tokenizer changed."""
+        self.close()
+        total = history.count()
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        with os.fdopen(fd, "r+b") as f:
+            lock_fd(f.fileno())
+            try:
+                raw = f.read(TOKENS_HEADER.size)
+                counted = 0
+                if len(raw) == TOKENS_HEADER.size:
+                    magic, tokenizer_id, counted, crc = TOKENS_HEADER.unpack(raw)
+                    size = os.fstat(f.fileno()).st_size
+                    if (magic != TOKENS_MAGIC or tokenizer_id != self.tokenizer_id or counted > total
+                            or size != TOKENS_HEADER.size + counted * COUNT.size
+                            or (counted and entry_fingerprint(history.entry(counted - 1)) != crc)):
+                        counted = 0
+                crc = 0
+                if counted == 0:
+                    f.seek(0)
+                    f.truncate()
+                    f.write(TOKENS_HEADER.pack(TOKENS_MAGIC, self.tokenizer_id, 0, 0))
+                else:
+                    crc = TOKENS_HEADER.unpack(raw)[3]
+                f.seek(0, os.SEEK_END)
+                while counted < total:
+                    stop = min(counted + SYNC_BATCH_SIZE, total)
+                    batch = history.entries(counted, stop)
+                    counts = array("I", (count_tokens(e) for e in batch))
+                    if sys.byteorder != "little":
+                        counts.byteswap()
+                    f.write(counts.tobytes())
+                    counted, crc = stop, entry_fingerprint(batch[-1])
+                f.seek(0)
+                f.write(TOKENS_HEADER.pack(TOKENS_MAGIC, self.tokenizer_id, counted, crc))
+                f.flush()
+                self._count = counted
+                if counted:
+                    self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            finally:
+                # The mmap holds a duplicate of the descriptor, which would keep the lock alive
+                unlock_fd(f.fileno())
+        return counted
+
+    def get(self, k: int) -> int:
+        return COUNT.unpack_from(self._mm, TOKENS_HEADER.size + k * COUNT.size)[0]
+
+
+class ContextBuilder:
+    def __init__(self, history, tokenizer: Optional[Callable[[str], int]] = None, tokenizer_name: Optional[str] = None,
+                 summarizer: Optional[Callable[[int, List[object]], str]] = None):
+        """
+        tokenizer counts tokens in a string (default: estimate_tokens); give tokenizer_name
+        when passing a custom tokenizer so cached counts are not mixed between tokenizers.
+        summarizer(omitted_count, recent_omitted_entries) returns a summary of older turns.
+        """
+        self.history = history
+        self.tokenizer = tokenizer or estimate_tokens
+        name = tokenizer_name or getattr(self.tokenizer, "__qualname__", "custom")
+        self.cache = TokenCountCache(history.history_path + ".tokens", name)
+        self.summarizer = summarizer or self.default_summary
+
+    def count_entry(self, entry) -> int:
+        return self.tokenizer(render_entry(entry))
+
+    @staticmethod
+    def default_summary(omitted: int, sample: List[object]) -> str:
+        commands = [e["cmd"] for e in sample if isinstance(e, dict) and isinstance(e.get("cmd"), str)]
+        text = f"[Earlier conversation: {omitted} older entries omitted."
+        if commands:
+            text += " Recent commands: " + ", ".join(commands[-5:]) + "."
+        return text + "]"
+
+    def build(self, budget: int, summarize: bool = True, max_entries: Optional[int] = None) -> dict:
+        """
+        Select the most recent entries whose total token count fits in budget, walking backwards
+        from the newest entry. Returns {"text", "entries", "tokens", "omitted", "summary"}.
+        """
+        total = self.cache.sync(self.history, self.count_entry)
+        used = 0
+        start = total
+        limit = total - max_entries if max_entries is not None else 0
+        while start > max(0, limit):
+            tokens = self.cache.get(start - 1)
+            if used + tokens > budget:
+                break
+            used += tokens
+            start -= 1
+        # Entries are only read once the selection is known
+        entries = self.history.entries(start, total)
+        summary = None
+        if summarize and start > 0:
+            sample = self.history.entries(max(0, start - 5), start)
+            summary = self.summarizer(start, sample)
+            summary_tokens = self.tokenizer(summary)
+            # Make room for the summary by dropping the oldest selected entries
+            while entries and used + summary_tokens > budget:
+                used -= self.cache.get(start)
+                entries.pop(0)
+                start += 1
+                summary = self.summarizer(start, self.history.entries(max(0, start - 5), start))
+                summary_tokens = self.tokenizer(summary)
+            if used + summary_tokens > budget:
+                summary = None
+            else:
+                used += summary_tokens
+        parts = ([summary] if summary else []) + [render_entry(e) for e in entries]
+        return {
+            "text": "\n\n".join(parts),
+            "entries": entries,
+            "tokens": used,
+            "omitted": start,
+            "summary": summary,
+        }
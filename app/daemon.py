@@ -0,0 +1,285 @@
+"""
+Persistent Coder-X daemon and thin Unix-socket client
+- `coder-x daemon start` serves CLI commands over a Unix domain socket (CODER_X_SOCKET,
+  default ~/.coder_x.sock) from one warm interpreter: modules are imported once and parsed
+  configs stay in the load_config cache
+- `python -m app ...` forwards argv to a running daemon and streams stdout/stderr back;
+  with no daemon, or one started with a different environment (CODER_X_*, OLLAMA_*, HOME,
+  PATH; see forwarded_env), the command runs in-process instead
+- Whether the client's stdout/stderr are terminals is forwarded, and the daemon's streams
+  report the same, so tty-dependent output (progress redraws, colours) matches
+- Wire format: one JSON request line, then newline-delimited JSON frames
+  ({"out": text}, {"err": text}, and finally {"exit": code} or {"fallback": reason})
+- Commands run one at a time, since they share the process's stdout, stderr and cwd
+- On start the configured model_pool_preload models are loaded into the warm pool in the
+  background
+"""
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Dict, List, Optional
+
+DEFAULT_SOCKET = "~/.coder_x.sock"
+CONNECT_TIMEOUT = 0.5
+
+
+def socket_path() -> str:
+    return os.path.expanduser(os.environ.get("CODER_X_SOCKET") or DEFAULT_SOCKET)
+
+
+FORWARDED_ENV_PREFIXES = ("CODER_X_", "OLLAMA_")
+FORWARDED_ENV_NAMES = ("HOME", "PATH")
+# Only locates the daemon; clients reaching it already agree on it
+UNFORWARDED_ENV_NAMES = ("CODER_X_SOCKET",)
+
+
+def _config_env() -> Optional[str]:
+    return os.environ.get("CODER_X_CONFIG")
+
+
+def forwarded_env() -> Dict[str, str]:
+    """The environment a command's behaviour depends on; the daemon only serves clients whose
+    forwarded_env equals its own."""
+    return {k: v for k, v in os.environ.items()
+            if (k.startswith(FORWARDED_ENV_PREFIXES) or k in FORWARDED_ENV_NAMES)
+            and k not in UNFORWARDED_ENV_NAMES}
+
+
+def _isatty(stream) -> bool:
+    try:
+        return bool(stream.isatty())
+    except (AttributeError, ValueError):
+        return False
+
+
+def runs_locally(argv: List[str]) -> bool:
+    """Commands that need the client's terminal, or manage the daemon itself, never forward."""
+    return argv[:1] in (["daemon"], ["batch"]) or argv == ["shell"] or argv[:2] == ["config", "setup"]
+
+
+class _FrameStream(io.TextIOBase):
+    """Text stream that forwards every write to the client as a JSON frame."""
+
+    encoding = "utf-8"
+    errors = "strict"
+
+    def __init__(self, send, key: str, tty: bool = False):
+        self._send = send
+        self._key = key
+        self._tty = tty
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        # The client's terminal, not the daemon's
+        return self._tty
+
+    def write(self, text: str) -> int:
+        # Rejecting bytes matters: click probes streams with write(b"") to find binary writers
+        if not isinstance(text, str):
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        if text:
+            self._send({self._key: text})
+        return len(text)
+
+
+def _send_frame(wfile, frame: dict):
+    wfile.write((json.dumps(frame) + "\n").encode())
+    wfile.flush()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+        except ValueError:
+            _send_frame(self.wfile, {"err": "[ERROR] Malformed daemon request.\n"})
+            _send_frame(self.wfile, {"exit": 2})
+            return
+        if request.get("control") == "stop":
+            _send_frame(self.wfile, {"exit": 0})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if request.get("control") == "ping":
+            _send_frame(self.wfile, {"exit": 0, "pid": os.getpid()})
+            return
+        if request.get("config") != self.server.config_env:
+            _send_frame(self.wfile, {"fallback": "daemon uses a different CODER_X_CONFIG"})
+            return
+        env = request.get("env")
+        if env != self.server.env:
+            differing = sorted(k for k in set(env or {}) | set(self.server.env)
+                               if (env or {}).get(k) != self.server.env.get(k))
+            _send_frame(self.wfile, {"fallback": f"daemon has a different environment ({', '.join(differing)})"})
+            return
+        try:
+            code = self.server.run_command(request.get("argv", []), request.get("cwd"),
+                                           lambda frame: _send_frame(self.wfile, frame), request.get("tty") or {})
+            _send_frame(self.wfile, {"exit": code})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self.config_env = _config_env()
+        self.env = forwarded_env()
+        self._run_lock = threading.Lock()
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(path, _Handler)
+        finally:
+            os.umask(old_umask)
+
+    def run_command(self, argv: List[str], cwd: Optional[str], send, tty: Optional[dict] = None) -> int:
+        from app.cli_entry import invoke
+        with self._run_lock:
+            previous_cwd = os.getcwd()
+            try:
+                if cwd:
+                    os.chdir(cwd)
+                tty = tty or {}
+                with redirect_stdout(_FrameStream(send, "out", bool(tty.get("out")))), \
+                        redirect_stderr(_FrameStream(send, "err", bool(tty.get("err")))):
+                    try:
+                        return invoke(argv)
+                    except (BrokenPipeError, ConnectionResetError):
+                        raise
+                    except Exception as e:
+                        print(f"[ERROR] {e}", file=sys.stderr)
+                        return 1
+            finally:
+                os.chdir(previous_cwd)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _warm_up():
+    """Import the modules and state that every command would otherwise load from scratch."""
+    from app import cli_entry, config, session_history, model_management, mcp_integration, file_operations  # noqa: F401
+    try:
+        config.load_config()
+    except ValueError:
+        pass
+    # Loading models into the runtime can take minutes, so the warm pool fills in the background
+    threading.Thread(target=_preload_models, name="coder-x-preload", daemon=True).start()
+
+
+def _preload_models():
+    from app.model_management import ModelManager
+    try:
+        mgr = ModelManager()
+        if getattr(mgr.config, "model_pool_preload", None):
+            mgr.preload_models()
+    except (ValueError, OSError):
+        pass
+
+
+def _connect(path: str) -> Optional[socket.socket]:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def create_server(path: Optional[str] = None) -> DaemonServer:
+    """Bind the daemon socket, replacing a stale one; raises RuntimeError if a daemon is running."""
+    path = path or socket_path()
+    if os.path.exists(path):
+        sock = _connect(path)
+        if sock is not None:
+            sock.close()
+            raise RuntimeError(f"A Coder-X daemon is already listening on {path}")
+        os.remove(path)
+    return DaemonServer(path)
+
+
+def serve(server: DaemonServer):
+    """Warm up and serve requests in the foreground until stopped, then remove the socket."""
+    _warm_up()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _request(request: dict, path: Optional[str] = None, stdout=None, stderr=None) -> Optional[dict]:
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+    sock = _connect(path)
+    if sock is None:
+        return None
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    # Once the request is sent the daemon may have produced output or side effects, so
+    # from here on a failure is reported instead of letting the caller re-run the command
+    error = ""
+    try:
+        with sock, sock.makefile("rwb") as f:
+            f.write((json.dumps(request) + "\n").encode())
+            f.flush()
+            for line in f:
+                frame = json.loads(line)
+                if "out" in frame:
+                    stdout.write(frame["out"])
+                    stdout.flush()
+                elif "err" in frame:
+                    stderr.write(frame["err"])
+                    stderr.flush()
+                else:
+                    return frame
+    except (OSError, ValueError) as e:
+        error = f": {e}"
+    stderr.write(f"[ERROR] Lost connection to the Coder-X daemon{error}.\n")
+    return {"exit": 1}
+
+
+def run_remote(argv: List[str], path: Optional[str] = None, stdout=None, stderr=None) -> Optional[int]:
+    """Run argv in a running daemon, streaming its output; returns the exit code,
+    or None if the command should run in-process instead."""
+    if runs_locally(argv):
+        return None
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    request = {"argv": argv, "cwd": os.getcwd(), "config": _config_env(), "env": forwarded_env(),
+               "tty": {"out": _isatty(stdout), "err": _isatty(stderr)}}
+    frame = _request(request, path, stdout, stderr)
+    if frame is None or "exit" not in frame:
+        return None
+    return frame["exit"]
+
+
+def ping(path: Optional[str] = None) -> Optional[int]:
+    """Return the daemon's pid, or None if no daemon is answering."""
+    frame = _request({"control": "ping"}, path)
+    return frame.get("pid") if frame else None
+
+
+def stop(path: Optional[str] = None) -> bool:
+    frame = _request({"control": "stop"}, path)
+    return frame is not None and frame.get("exit") == 0
@@ -0,0 +1,65 @@
+"""
+Advisory file locking for Coder-X
+- flock() on a sidecar lock file shared by every process using the same data file
+- Shared locks for concurrent appenders, exclusive locks for rewrites (migration, rotation, clear)
+- The sidecar can be removed (remove_lock) under the exclusive lock; waiters that locked the
+  removed file notice and retry on the current one
+- lock_fd()/unlock_fd() flock an already open file itself, for files that are their own lock
+- Falls back to no locking on platforms without fcntl; other modules import fcntl from here
+"""
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+
+@contextmanager
+def file_lock(lock_path: str, exclusive: bool = True):
+    """Hold a shared or exclusive advisory lock on lock_path for the duration of the block.
+
+    Locks are not re-entrant: do not take a second lock on the same path while holding one.
+    """
+    if fcntl is None:
+        yield
+        return
+    while True:
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            # The sidecar may have been removed (remove_lock) while we waited: a lock on the
+            # unlinked file would exclude no one, so start again with the current one
+            if os.path.samestat(os.fstat(fd), os.stat(lock_path)):
+                break
+        except FileNotFoundError:
+            pass
+        except BaseException:
+            os.close(fd)
+            raise
+        os.close(fd)
+    try:
+        yield
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
+
+
+def lock_fd(fd: int, exclusive: bool = True):
+    """flock the open file fd; released by unlock_fd or by closing every descriptor of it."""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+
+def unlock_fd(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def remove_lock(lock_path: str):
+    """Delete the sidecar lock file; call it while holding the exclusive lock on it."""
+    try:
+        os.remove(lock_path)
+    except FileNotFoundError:
+        pass
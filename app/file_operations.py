@@ -5,9 +5,123 @@ File operations for Claude Code Python Assistant
 - Run tests (pytest/unittest)
 - Lint code (flake8/pylint)
 - Track file changes/edits in session history
+- Range reads by line or byte, streamed in chunks, so huge logs and datasets are never loaded
+  whole. Line ranges in large files use a persistent mmap-backed line index (see
+  offset_index), kept under CODER_X_LINE_INDEX_DIR (default ~/.coder_x_line_index)
 """
+import codecs
+import hashlib
+import mmap
 import os
-from typing import Optional
+from typing import Iterator, Optional, Tuple
+from .profiling import timed
+
+READ_CHUNK_SIZE = 1024 * 1024
+# Line ranges in files at least this large use the persistent line index
+LINE_INDEX_MIN_SIZE = 8 * 1024 * 1024
+# Without an index yet, a line range near the start is found by scanning; past this many bytes
+# the scan gives up and the index is built instead
+LINE_SCAN_LIMIT = 64 * 1024 * 1024
+# `file read` and /file-read stream files larger than this instead of reading them whole
+STREAM_THRESHOLD = 1024 * 1024
+
+
+def line_index_dir() -> str:
+    return os.path.expanduser(os.environ.get("CODER_X_LINE_INDEX_DIR") or "~/.coder_x_line_index")
+
+
+def parse_range(spec: str) -> Tuple[Optional[int], Optional[int]]:
+    """Parse "A:B", where either side may be empty, into (A, B)."""
+    start, sep, stop = spec.partition(":")
+    try:
+        if not sep:
+            raise ValueError
+        return (int(start) if start.strip() else None), (int(stop) if stop.strip() else None)
+    except ValueError:
+        raise ValueError(f"Invalid range '{spec}' (expected A:B, e.g. 1000:2000)") from None
+
+
+def parse_line_range(spec: str) -> Tuple[int, Optional[int]]:
+    """Convert 1-based inclusive line numbers "A:B" (negative ones count from the end) to a 0-based slice."""
+    start, stop = parse_range(spec)
+    if start == 0 or stop == 0:
+        raise ValueError(f"Invalid range '{spec}' (line numbers start at 1)")
+    start = 0 if start is None else (start - 1 if start > 0 else start)
+    stop = None if stop is None or stop == -1 else (stop if stop > 0 else stop + 1)
+    return start, stop
+
+
+def _normalize(start: int, stop: Optional[int], total: int) -> Tuple[int, int]:
+    return slice(start, stop).indices(total)[:2]
+
+
+def _skip_lines(mm, pos: int, n: int, limit: Optional[int] = None) -> Optional[int]:
+    """Offset just past the n-th newline after pos (the end of mm if there are fewer); None past limit."""
+    end = len(mm)
+    while n > 0 and pos < end:
+        if limit is not None and pos >= limit:
+            return None
+        chunk_end = min(pos + READ_CHUNK_SIZE, end)
+        count = mm[pos:chunk_end].count(b"\n")
+        if count < n:
+            n -= count
+            pos = chunk_end
+            continue
+        for _ in range(n):
+            pos = mm.find(b"\n", pos, chunk_end) + 1
+        n = 0
+    return pos
+
+
+def _count_lines(mm) -> int:
+    count = 0
+    for pos in range(0, len(mm), READ_CHUNK_SIZE):
+        count += mm[pos:pos + READ_CHUNK_SIZE].count(b"\n")
+    # A last line without a newline still counts
+    return count + (1 if len(mm) and mm[-1:] != b"\n" else 0)
+
+
+def _scan_span(mm, start: int, stop: Optional[int], limit: Optional[int] = None) -> Optional[Tuple[int, int]]:
+    begin = _skip_lines(mm, 0, start, limit)
+    if begin is None:
+        return None
+    if stop is None:
+        return begin, len(mm)
+    end = _skip_lines(mm, begin, max(0, stop - start), limit)
+    return None if end is None else (begin, end)
+
+
+def _index_span(index, start: int, stop: Optional[int], size: int) -> Tuple[int, int]:
+    count, covered = len(index), index.covered
+    size = max(size, covered)
+    # The index holds complete lines only; a last line without a newline follows them
+    start, stop = _normalize(start, stop, count + (1 if size > covered else 0))
+
+    def offset(k):
+        if k < count:
+            return index.span(k, k + 1)[0]
+        return covered if k == count else size
+    begin = offset(start)
+    return begin, (offset(stop) if stop > start else begin)
+
+
+def _iter_text(filepath: str, begin: int, end: int, chunk_size: int) -> Iterator[str]:
+    # Invalid UTF-8, e.g. a character split by a byte range, is replaced rather than raised
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+    with open(filepath, "rb") as f:
+        f.seek(begin)
+        remaining = end - begin
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
 
 # Module-level functions for direct import (for CLI and tests)
 def read_file(filepath: str) -> Optional[str]:
@@ -19,10 +133,36 @@ def write_file(filepath: str, content: str) -> bool:
 def append_file(filepath: str, content: str) -> bool:
     return FileOps().append_file(filepath, content)
 
+def read_range(filepath: str, start: int = 0, stop: Optional[int] = None, by: str = "lines") -> Optional[str]:
+    return FileOps().read_range(filepath, start, stop, by)
+
+def is_large_file(filepath: str) -> bool:
+    """True if filepath should be streamed rather than read whole (see STREAM_THRESHOLD)."""
+    try:
+        return os.path.isfile(filepath) and os.path.getsize(filepath) > STREAM_THRESHOLD
+    except OSError:
+        return False
+
+def read_chunks(filepath: str, lines: Optional[str] = None, byte_range: Optional[str] = None) -> Iterator[str]:
+    """Stream filepath, or the part selected by a CLI range, as text chunks.
+
+    lines is "A:B" in 1-based, inclusive line numbers; byte_range is "A:B" in byte offsets, end
+    exclusive. Negative values count from the end and either side may be omitted. Raises
+    ValueError for an invalid range and OSError if the file cannot be read.
+    """
+    if lines and byte_range:
+        raise ValueError("Use either a line range or a byte range, not both")
+    if lines:
+        start, stop = parse_line_range(lines)
+        return FileOps().iter_range(filepath, start, stop)
+    start, stop = parse_range(byte_range) if byte_range else (None, None)
+    return FileOps().iter_range(filepath, start or 0, stop, by="bytes")
+
 class FileOps:
     def __init__(self):
         pass
 
+    @timed("file.read")
     def read_file(self, filepath: str) -> Optional[str]:
         if os.path.exists(filepath):
             try:
@@ -32,6 +172,87 @@ class FileOps:
                 return None
         return None
 
+    def line_index(self, filepath: str):
+        """Line index (offset_index.OffsetIndex) of filepath, brought up to date. Raises OSError."""
+        from .offset_index import OffsetIndex
+        path = os.path.realpath(filepath)
+        os.makedirs(line_index_dir(), exist_ok=True)
+        index = OffsetIndex(path, self._line_index_path(path))
+        index.refresh()
+        return index
+
+    def _line_index_path(self, path: str) -> str:
+        name = hashlib.sha1(os.path.realpath(path).encode("utf-8", "surrogateescape")).hexdigest()
+        return os.path.join(line_index_dir(), name + ".idx")
+
+    @timed("file.line_span")
+    def line_span(self, filepath: str, start: int = 0, stop: Optional[int] = None) -> Tuple[int, int]:
+        """Byte range (begin, end) of lines start..stop-1, 0-based with negative values counting from
+        the end as in slicing. A last line without a newline counts as a line. Raises OSError.
+        """
+        with open(filepath, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return 0, 0
+            with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+                large = size >= LINE_INDEX_MIN_SIZE
+                forward = start >= 0 and (stop is None or stop >= 0)
+                if large and forward and not os.path.exists(self._line_index_path(filepath)):
+                    # A range near the start is found faster by scanning than by indexing the file
+                    span = _scan_span(mm, start, stop, LINE_SCAN_LIMIT)
+                    if span is not None:
+                        return span
+                if large:
+                    try:
+                        index = self.line_index(filepath)
+                    except OSError:
+                        # No writable index directory: scan instead
+                        pass
+                    else:
+                        try:
+                            return _index_span(index, start, stop, size)
+                        finally:
+                            index.close()
+                if not forward:
+                    start, stop = _normalize(start, stop, _count_lines(mm))
+                return _scan_span(mm, start, stop)
+
+    def iter_range(self, filepath: str, start: int = 0, stop: Optional[int] = None, by: str = "lines",
+                   chunk_size: int = READ_CHUNK_SIZE) -> Iterator[str]:
+        """Stream lines (by="lines") or bytes (by="bytes") start..stop-1 of filepath as text chunks
+        of about chunk_size bytes. Indices are 0-based and sliced as in Python. The range is
+        resolved before this returns, so OSError is raised here rather than mid-stream.
+        """
+        if by == "lines":
+            begin, end = self.line_span(filepath, start, stop)
+        elif by == "bytes":
+            begin, end = _normalize(start, stop, os.path.getsize(filepath))
+        else:
+            raise ValueError(f"Unknown range unit '{by}' (expected lines or bytes)")
+        if not os.path.isfile(filepath):
+            raise IsADirectoryError(f"Not a file: '{filepath}'")
+        return _iter_text(filepath, begin, max(begin, end), chunk_size)
+
+    def iter_lines(self, filepath: str, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        """Stream lines start..stop-1 of filepath without their line endings."""
+        partial = ""
+        for chunk in self.iter_range(filepath, start, stop):
+            lines = (partial + chunk).split("\n")
+            partial = lines.pop()
+            for line in lines:
+                yield line[:-1] if line.endswith("\r") else line
+        if partial:
+            yield partial
+
+    @timed("file.read_range")
+    def read_range(self, filepath: str, start: int = 0, stop: Optional[int] = None, by: str = "lines") -> Optional[str]:
+        """Text of lines or bytes start..stop-1 (see iter_range); None if the file cannot be read."""
+        try:
+            return "".join(self.iter_range(filepath, start, stop, by))
+        except OSError:
+            return None
+
+    @timed("file.write")
     def write_file(self, filepath: str, content: str) -> bool:
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
@@ -40,6 +261,7 @@ class FileOps:
         except Exception:
             return False
 
+    @timed("file.append")
     def append_file(self, filepath: str, content: str) -> bool:
         try:
             with open(filepath, 'a', encoding='utf-8') as f:
@@ -0,0 +1,14 @@
+"""
+File change detection for Coder-X caches
+- Caches keyed on a file's mtime (config cache, model catalog, dedupe hash cache) only trust
+  an mtime once it is older than RACY_WINDOW_NS: on filesystems with coarse timestamps a file
+  modified this recently may change again without its mtime changing
+"""
+import time
+
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def is_settled(mtime_ns: int) -> bool:
+    """True if mtime_ns is old enough for a cache to be keyed on it."""
+    return time.time_ns() - mtime_ns > RACY_WINDOW_NS
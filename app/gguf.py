@@ -0,0 +1,272 @@
+"""
+GGUF / GGML model metadata for Coder-X
+- Memory-maps the model file and parses only the header, the key/value metadata and the tensor
+  descriptors; tensor data is never touched, so only the first few MB of a 70B-class file are
+  read (the pages the header occupies)
+- Large metadata arrays (tokenizer vocabularies) are skipped rather than materialised
+- model_info() summarises architecture, parameter count, quantization, context length and
+  tensor count; legacy GGML/GGMF/GGJT files report what their fixed llama header holds
+- encode_gguf() writes a header-only GGUF file (tests and benchmarks)
+"""
+import mmap
+import struct
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+GGUF_MAGIC = b"GGUF"
+LEGACY_MAGICS = {0x67676D6C: "ggml", 0x67676D66: "ggmf", 0x67676A74: "ggjt"}
+# Arrays longer than this are summarised as {"type", "count"} instead of being decoded
+MAX_ARRAY_ITEMS = 64
+
+# GGUF metadata value types, and the struct codes of the fixed-size ones
+UINT8, INT8, UINT16, INT16, UINT32, INT32, FLOAT32, BOOL, STRING, ARRAY, UINT64, INT64, FLOAT64 = range(13)
+SCALAR_TYPES = {
+    UINT8: "B", INT8: "b", UINT16: "H", INT16: "h", UINT32: "I", INT32: "i",
+    FLOAT32: "f", BOOL: "?", UINT64: "Q", INT64: "q", FLOAT64: "d",
+}
+TYPE_NAMES = {
+    UINT8: "uint8", INT8: "int8", UINT16: "uint16", INT16: "int16", UINT32: "uint32", INT32: "int32",
+    FLOAT32: "float32", BOOL: "bool", STRING: "string", ARRAY: "array", UINT64: "uint64",
+    INT64: "int64", FLOAT64: "float64",
+}
+
+# general.file_type values (llama.cpp LLAMA_FTYPE_*)
+FILE_TYPES = {
+    0: "F32", 1: "F16", 2: "Q4_0", 3: "Q4_1", 7: "Q8_0", 8: "Q5_0", 9: "Q5_1", 10: "Q2_K",
+    11: "Q3_K_S", 12: "Q3_K_M", 13: "Q3_K_L", 14: "Q4_K_S", 15: "Q4_K_M", 16: "Q5_K_S",
+    17: "Q5_K_M", 18: "Q6_K", 19: "IQ2_XXS", 20: "IQ2_XS", 21: "Q2_K_S", 22: "IQ3_XS",
+    23: "IQ3_XXS", 24: "IQ1_S", 25: "IQ4_NL", 26: "IQ3_S", 27: "IQ3_M", 28: "IQ2_S",
+    29: "IQ2_M", 30: "IQ4_XS", 31: "IQ1_M", 32: "BF16",
+}
+# Tensor element types (ggml_type)
+TENSOR_TYPES = {
+    0: "F32", 1: "F16", 2: "Q4_0", 3: "Q4_1", 6: "Q5_0", 7: "Q5_1", 8: "Q8_0", 9: "Q8_1",
+    10: "Q2_K", 11: "Q3_K", 12: "Q4_K", 13: "Q5_K", 14: "Q6_K", 15: "Q8_K", 16: "IQ2_XXS",
+    17: "IQ2_XS", 18: "IQ3_XXS", 19: "IQ1_S", 20: "IQ4_NL", 21: "IQ3_S", 22: "IQ2_S",
+    23: "IQ4_XS", 24: "I8", 25: "I16", 26: "I32", 27: "I64", 28: "F64", 29: "IQ1_M", 30: "BF16",
+}
+
+
+class GGUFError(ValueError):
+    """The file is not a readable GGUF/GGML model."""
+
+
+class _Reader:
+    """Sequential little/big-endian reader over a buffer (an mmap) without copying it."""
+
+    def __init__(self, buf, offset: int, order: str, legacy_v1: bool = False):
+        self.buf = buf
+        self.offset = offset
+        self.order = order
+        # GGUF v1 used 32-bit string lengths and counts
+        self.count_code = "I" if legacy_v1 else "Q"
+        self._structs: Dict[str, struct.Struct] = {}
+
+    def unpack(self, code: str):
+        s = self._structs.get(code)
+        if s is None:
+            s = self._structs[code] = struct.Struct(self.order + code)
+        try:
+            value = s.unpack_from(self.buf, self.offset)
+        except struct.error as e:
+            raise GGUFError(f"truncated header at offset {self.offset}") from e
+        self.offset += s.size
+        return value[0] if len(value) == 1 else value
+
+    def length(self) -> int:
+        return self.unpack(self.count_code)
+
+    def string(self) -> str:
+        n = self.length()
+        end = self.offset + n
+        if end > len(self.buf):
+            raise GGUFError(f"truncated string at offset {self.offset}")
+        data = self.buf[self.offset:end]
+        self.offset = end
+        return data.decode("utf-8", errors="replace")
+
+    def skip_strings(self, count: int):
+        s = struct.Struct(self.order + self.count_code)
+        buf, offset, size = self.buf, self.offset, s.size
+        try:
+            for _ in range(count):
+                offset += size + s.unpack_from(buf, offset)[0]
+        except struct.error as e:
+            raise GGUFError(f"truncated array at offset {offset}") from e
+        self.offset = offset
+
+    def value(self, vtype: int) -> Any:
+        code = SCALAR_TYPES.get(vtype)
+        if code is not None:
+            return self.unpack(code)
+        if vtype == STRING:
+            return self.string()
+        if vtype == ARRAY:
+            item_type = self.unpack("I")
+            count = self.length()
+            if count > MAX_ARRAY_ITEMS:
+                self.skip(item_type, count)
+                return {"type": TYPE_NAMES.get(item_type, str(item_type)), "count": count}
+            return [self.value(item_type) for _ in range(count)]
+        raise GGUFError(f"unknown metadata value type {vtype}")
+
+    def skip(self, vtype: int, count: int):
+        code = SCALAR_TYPES.get(vtype)
+        if code is not None:
+            self.offset += struct.calcsize(code) * count
+        elif vtype == STRING:
+            self.skip_strings(count)
+        else:
+            for _ in range(count):
+                self.value(vtype)
+
+
+def _open_map(path: str) -> Tuple[Any, mmap.mmap]:
+    f = open(path, "rb")
+    try:
+        return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError) as e:
+        f.close()
+        raise GGUFError(f"cannot map {path}: {e}") from e
+
+
+def read_gguf(buf) -> dict:
+    """Parse a GGUF header: {"version", "tensor_count", "metadata", "tensors"}."""
+    if bytes(buf[:4]) != GGUF_MAGIC:
+        raise GGUFError("not a GGUF file")
+    version = _Reader(buf, 4, "<").unpack("I")
+    order = "<"
+    if version > 0xFFFF:
+        # Big-endian GGUF files store the version (and everything after it) byte-swapped
+        order, version = ">", _Reader(buf, 4, ">").unpack("I")
+    r = _Reader(buf, 8, order, legacy_v1=version == 1)
+    tensor_count = r.length()
+    kv_count = r.length()
+    metadata: Dict[str, Any] = {}
+    for _ in range(kv_count):
+        key = r.string()
+        metadata[key] = r.value(r.unpack("I"))
+    tensors: List[dict] = []
+    for _ in range(tensor_count):
+        name = r.string()
+        n_dims = r.unpack("I")
+        dims = [r.length() for _ in range(n_dims)]
+        ttype = r.unpack("I")
+        r.unpack("Q")  # data offset
+        tensors.append({"name": name, "shape": dims, "type": TENSOR_TYPES.get(ttype, str(ttype))})
+    return {"version": version, "tensor_count": tensor_count, "metadata": metadata, "tensors": tensors}
+
+
+def _legacy_info(buf, fmt: str) -> dict:
+    r = _Reader(buf, 4, "<")
+    version = None if fmt == "ggml" else r.unpack("I")
+    n_vocab, n_embd, n_mult, n_head, n_layer, n_rot, ftype = r.unpack("7i")
+    return {
+        "format": fmt,
+        "version": version,
+        "architecture": "llama",
+        "name": None,
+        "parameter_count": None,
+        "quantization": FILE_TYPES.get(ftype % 1000),
+        "context_length": None,
+        "tensor_count": None,
+        "embedding_length": n_embd,
+        "block_count": n_layer,
+        "head_count": n_head,
+        "vocab_size": n_vocab,
+    }
+
+
+def _parameter_count(tensors: List[dict]) -> int:
+    total = 0
+    for t in tensors:
+        n = 1
+        for d in t["shape"]:
+            n *= d
+        total += n
+    return total
+
+
+def summarize(header: dict) -> dict:
+    meta = header["metadata"]
+    arch = meta.get("general.architecture")
+    types = Counter(t["type"] for t in header["tensors"])
+    file_type = meta.get("general.file_type")
+    quant = FILE_TYPES.get(file_type) if isinstance(file_type, int) else None
+    if quant is None and types:
+        # No file type recorded: name it after the most common tensor type
+        quant = types.most_common(1)[0][0]
+    tokens = meta.get("tokenizer.ggml.tokens")
+    return {
+        "format": "gguf",
+        "version": header["version"],
+        "architecture": arch,
+        "name": meta.get("general.name"),
+        "parameter_count": _parameter_count(header["tensors"]),
+        "quantization": quant,
+        "context_length": meta.get(f"{arch}.context_length"),
+        "tensor_count": header["tensor_count"],
+        "embedding_length": meta.get(f"{arch}.embedding_length"),
+        "block_count": meta.get(f"{arch}.block_count"),
+        "head_count": meta.get(f"{arch}.attention.head_count"),
+        "vocab_size": tokens["count"] if isinstance(tokens, dict) else len(tokens) if isinstance(tokens, list) else None,
+    }
+
+
+def model_info(path: str) -> dict:
+    """Summary of a GGUF or legacy GGML model file's header; raises GGUFError for anything else."""
+    f, buf = _open_map(path)
+    try:
+        with buf:
+            if bytes(buf[:4]) == GGUF_MAGIC:
+                return summarize(read_gguf(buf))
+            magic = struct.unpack_from("<I", buf, 0)[0] if len(buf) >= 4 else None
+            if magic in LEGACY_MAGICS:
+                return _legacy_info(buf, LEGACY_MAGICS[magic])
+            raise GGUFError(f"{path} is not a GGUF or GGML model")
+    finally:
+        f.close()
+
+
+def read_metadata(path: str) -> dict:
+    """Full GGUF header of path (metadata and tensor descriptors)."""
+    f, buf = _open_map(path)
+    try:
+        with buf:
+            return read_gguf(buf)
+    finally:
+        f.close()
+
+
+def _encode_value(value, vtype: Optional[int] = None) -> Tuple[int, bytes]:
+    if isinstance(value, bool):
+        return BOOL, struct.pack("<?", value)
+    if isinstance(value, int):
+        vtype = vtype if vtype is not None else UINT32 if 0 <= value < 2 ** 32 else INT64
+        return vtype, struct.pack("<" + SCALAR_TYPES[vtype], value)
+    if isinstance(value, float):
+        return FLOAT32, struct.pack("<f", value)
+    if isinstance(value, str):
+        data = value.encode()
+        return STRING, struct.pack("<Q", len(data)) + data
+    if isinstance(value, list):
+        item_type = _encode_value(value[0])[0] if value else UINT32
+        body = b"".join(_encode_value(v, item_type)[1] for v in value)
+        return ARRAY, struct.pack("<IQ", item_type, len(value)) + body
+    raise TypeError(f"cannot encode {type(value).__name__} as GGUF metadata")
+
+
+def encode_gguf(metadata: Dict[str, Any], tensors: List[Tuple[str, List[int], int]], version: int = 3) -> bytes:
+    """Header-only GGUF bytes for metadata and (name, shape, ggml type) tensor descriptors."""
+    out = [GGUF_MAGIC, struct.pack("<IQQ", version, len(tensors), len(metadata))]
+    for key, value in metadata.items():
+        vtype, data = _encode_value(value)
+        k = key.encode()
+        out.append(struct.pack("<Q", len(k)) + k + struct.pack("<I", vtype) + data)
+    offset = 0
+    for name, shape, ttype in tensors:
+        n = name.encode()
+        out.append(struct.pack("<Q", len(n)) + n + struct.pack("<I", len(shape))
+                   + struct.pack(f"<{len(shape)}Q", *shape) + struct.pack("<IQ", ttype, offset))
+        offset += 32
+    return b"".join(out)
@@ -0,0 +1,166 @@
+"""
+Streaming export of session history for Coder-X
+- Formats: jsonl, json (array), jsonl.gz, csv and md (Markdown transcript)
+- Entries are streamed one at a time, so memory use is constant
+- Unfiltered exports in the storage format copy bytes in the kernel
+  (copy_file_range/sendfile); gzip segments are copied verbatim into jsonl.gz
+- Optional time-range and entry-type filters are applied while streaming
+"""
+import csv
+import gzip
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Tuple
+
+from .history_search import entry_timestamp
+from .history_segments import _open_segment
+
+EXPORT_FORMATS = ("jsonl", "json", "jsonl.gz", "csv", "md")
+COPY_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def export_format_for(path: str) -> str:
+    """Guess the export format from a file name; defaults to jsonl."""
+    lowered = path.lower()
+    if lowered.endswith(".gz"):
+        return "jsonl.gz"
+    for ext, fmt in ((".json", "json"), (".csv", "csv"), (".md", "md"), (".markdown", "md")):
+        if lowered.endswith(ext):
+            return fmt
+    return "jsonl"
+
+
+def copy_file_data(src, dst):
+    """Copy the rest of src into dst, in the kernel when the platform allows it."""
+    dst.flush()
+    src_fd, dst_fd = src.fileno(), dst.fileno()
+    remaining = os.fstat(src_fd).st_size - src.tell()
+    try:
+        while remaining > 0:
+            if hasattr(os, "copy_file_range"):
+                n = os.copy_file_range(src_fd, dst_fd, min(remaining, COPY_CHUNK_SIZE))
+            else:
+                n = os.sendfile(dst_fd, src_fd, None, min(remaining, COPY_CHUNK_SIZE))
+            if n == 0:
+                break
+            remaining -= n
+    except OSError:
+        # e.g. cross-device copies on older kernels, or no sendfile to regular files;
+        # resume from wherever the kernel copy stopped
+        src.seek(os.lseek(src_fd, 0, os.SEEK_CUR))
+        dst.seek(0, os.SEEK_END)
+        shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+    dst.seek(0, os.SEEK_END)
+
+
+def _matches(entry, since: Optional[float], until: Optional[float], entry_type: Optional[str]) -> bool:
+    if entry_type is not None and not (isinstance(entry, dict) and entry.get("type") == entry_type):
+        return False
+    if since is not None or until is not None:
+        ts = entry_timestamp(entry)
+        if ts is None:
+            return False
+        if since is not None and ts < since:
+            return False
+        if until is not None and ts > until:
+            return False
+    return True
+
+
+def _filtered(entries: Iterable, since, until, entry_type) -> Iterator[Tuple[int, object]]:
+    for i, entry in enumerate(entries):
+        if _matches(entry, since, until, entry_type):
+            yield i, entry
+
+
+def _format_time(entry) -> str:
+    ts = entry_timestamp(entry)
+    return datetime.fromtimestamp(ts).isoformat(timespec="seconds") if ts is not None else ""
+
+
+def _write_markdown(entries: Iterator[Tuple[int, object]], dst):
+    dst.write("# Coder-X session history\n")
+    for i, entry in entries:
+        kind = entry.get("type") if isinstance(entry, dict) else None
+        title = " · ".join(part for part in (f"#{i}", kind, _format_time(entry)) if part)
+        dst.write(f"\n### {title}\n\n")
+        if isinstance(entry, dict) and isinstance(entry.get("cmd"), str):
+            dst.write(f"```\n$ {entry['cmd']}\n```\n")
+            output = entry.get("output")
+            if output:
+                dst.write(f"\n```\n{output if isinstance(output, str) else json.dumps(output, indent=2)}\n```\n")
+        elif isinstance(entry, str):
+            dst.write(entry + "\n")
+        else:
+            dst.write(f"```json\n{json.dumps(entry, indent=2)}\n```\n")
+
+
+def export_history(history, export_path: str, fmt: Optional[str] = None, since: Optional[float] = None,
+                   until: Optional[float] = None, entry_type: Optional[str] = None) -> int:
+    """Stream history to export_path in the given format; returns the number of entries written
+    (or -1 when the data was copied verbatim without counting)."""
+    fmt = fmt or export_format_for(export_path)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt} (expected one of {', '.join(EXPORT_FORMATS)})")
+    filtered = since is not None or until is not None or entry_type is not None
+    raw = not filtered and not history._is_legacy()
+    if raw and fmt == "jsonl":
+        with open(export_path, "wb") as dst:
+            for seg in history.segments.segments:
+                path = history.segments.segment_path(seg)
+                with _open_segment(path, "rb") as src:
+                    if path.endswith(".jsonl"):
+                        copy_file_data(src, dst)
+                    else:
+                        shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+            with open(history.history_path, "rb") as src:
+                copy_file_data(src, dst)
+        return -1
+    if raw and fmt == "jsonl.gz":
+        with open(export_path, "wb") as dst:
+            for seg in history.segments.segments:
+                path = history.segments.segment_path(seg)
+                if path.endswith(".gz"):
+                    # Concatenated gzip members are a valid gzip stream
+                    with open(path, "rb") as src:
+                        copy_file_data(src, dst)
+                else:
+                    with _open_segment(path, "rb") as src, gzip.GzipFile(fileobj=dst, mode="wb") as gz:
+                        shutil.copyfileobj(src, gz, COPY_CHUNK_SIZE)
+            with open(history.history_path, "rb") as src, gzip.GzipFile(fileobj=dst, mode="wb") as gz:
+                shutil.copyfileobj(src, gz, COPY_CHUNK_SIZE)
+        return -1
+    entries = _filtered(history.iter_entries(), since, until, entry_type)
+    count = 0
+
+    def counted(items):
+        nonlocal count
+        for item in items:
+            count += 1
+            yield item
+
+    if fmt in ("jsonl", "jsonl.gz"):
+        opener = gzip.open if fmt == "jsonl.gz" else open
+        with opener(export_path, "wt", encoding="utf-8") as dst:
+            for _, entry in counted(entries):
+                dst.write(json.dumps(entry) + "\n")
+    elif fmt == "json":
+        with open(export_path, "w", encoding="utf-8") as dst:
+            dst.write("[")
+            for _, entry in counted(entries):
+                dst.write(("\n  " if count == 1 else ",\n  ") + json.dumps(entry))
+            dst.write("\n]\n" if count else "]\n")
+    elif fmt == "csv":
+        with open(export_path, "w", encoding="utf-8", newline="") as dst:
+            writer = csv.writer(dst)
+            writer.writerow(["index", "ts", "type", "entry"])
+            for i, entry in counted(entries):
+                ts = entry_timestamp(entry)
+                kind = entry.get("type") if isinstance(entry, dict) else None
+                writer.writerow([i, "" if ts is None else ts, kind or "", json.dumps(entry)])
+    else:
+        with open(export_path, "w", encoding="utf-8") as dst:
+            _write_markdown(counted(entries), dst)
+    return count
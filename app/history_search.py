@@ -0,0 +1,170 @@
+"""
+Full-text search over session history for Coder-X
+- Persistent SQLite FTS5 index stored next to the history file
+- Kept in sync incrementally as entries are appended; rebuilt if the history was rewritten
+- Ranked (BM25) queries with optional field and time-range filters
+"""
+import json
+import sqlite3
+import zlib
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+INDEX_BATCH_SIZE = 5000
+TIMESTAMP_FIELDS = ("ts", "timestamp", "time")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+CREATE TABLE IF NOT EXISTS entries (id INTEGER PRIMARY KEY, ts REAL);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries(ts);
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(entry UNINDEXED, field UNINDEXED, value);
+"""
+
+
+def parse_timestamp(value) -> Optional[float]:
+    """Convert epoch seconds or an ISO-8601 string to epoch seconds (None if not a time)."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def entry_timestamp(entry) -> Optional[float]:
+    """Return the time recorded in an entry's ts/timestamp/time field, if any."""
+    if isinstance(entry, dict):
+        for key in TIMESTAMP_FIELDS:
+            ts = parse_timestamp(entry.get(key))
+            if ts is not None:
+                return ts
+    return None
+
+
+def _entry_fields(entry) -> Iterator[Tuple[str, str]]:
+    """Yield (field, text) pairs for an entry; nested values are flattened to JSON text."""
+    if isinstance(entry, dict):
+        for key, value in entry.items():
+            if value is None:
+                continue
+            yield str(key), value if isinstance(value, str) else json.dumps(value)
+    elif entry is not None:
+        yield "", entry if isinstance(entry, str) else json.dumps(entry)
+
+
+def entry_fingerprint(entry) -> int:
+    """crc32 of an entry's canonical JSON; detects a history rewritten under an index."""
+    return zlib.crc32(json.dumps(entry, sort_keys=True).encode())
+
+
+def _match_expression(query: str) -> str:
+    """Quote each term so user input cannot inject FTS5 query syntax; terms are ANDed."""
+    terms = query.split()
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+class HistorySearchIndex:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # Autocommit mode: sync() manages its own IMMEDIATE transactions so that
+            # concurrent processes never index the same entries twice
+            self._conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _meta(self, key: str) -> int:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def reset(self):
+        """Drop all indexed entries; the next sync re-indexes the whole history."""
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM history_fts")
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM meta")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def sync(self, history) -> int:
+        """Index any entries appended since the last sync; rebuild if the history was rewritten."""
+        total = history.count()
+        conn = self.conn
+        verified = False
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                indexed = self._meta("entries")
+                if not verified:
+                    if indexed > total or (indexed and entry_fingerprint(history.entry(indexed - 1)) != self._meta("fingerprint")):
+                        conn.execute("DELETE FROM history_fts")
+                        conn.execute("DELETE FROM entries")
+                        conn.execute("DELETE FROM meta")
+                        indexed = 0
+                    verified = True
+                if indexed >= total:
+                    conn.execute("COMMIT")
+                    return indexed
+                stop = min(indexed + INDEX_BATCH_SIZE, total)
+                batch = history.entries(indexed, stop)
+                conn.executemany(
+                    "INSERT INTO entries (id, ts) VALUES (?, ?)",
+                    ((indexed + i, entry_timestamp(e)) for i, e in enumerate(batch)),
+                )
+                conn.executemany(
+                    "INSERT INTO history_fts (entry, field, value) VALUES (?, ?, ?)",
+                    ((indexed + i, field, text) for i, e in enumerate(batch) for field, text in _entry_fields(e)),
+                )
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('entries', ?)", (stop,))
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)", (entry_fingerprint(batch[-1]),))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def search(self, query: str, field: Optional[str] = None, since: Optional[float] = None,
+               until: Optional[float] = None, limit: int = 20) -> List[Tuple[int, float]]:
+        """Return (entry number, score) pairs, best match first (lower BM25 score is better)."""
+        expression = _match_expression(query)
+        if not expression:
+            return []
+        sql = "SELECT entry, rank AS score FROM history_fts WHERE history_fts MATCH ?"
+        params: list = [expression]
+        if field is not None:
+            sql += " AND field = ?"
+            params.append(field)
+        sql = f"SELECT m.entry, MIN(m.score) AS best FROM ({sql}) m"
+        if since is not None or until is not None:
+            sql += " JOIN entries e ON e.id = m.entry WHERE 1"
+            if since is not None:
+                sql += " AND e.ts >= ?"
+                params.append(since)
+            if until is not None:
+                sql += " AND e.ts <= ?"
+                params.append(until)
+        sql += " GROUP BY m.entry ORDER BY best, m.entry DESC LIMIT ?"
+        params.append(limit)
+        return [(int(entry), score) for entry, score in self.conn.execute(sql, params)]
@@ -0,0 +1,180 @@
+"""
+Segmented storage for Coder-X session history
+- The hot history file is rotated into closed, compressed JSONL segments
+- A small JSON manifest records each segment's file, entry count and time span
+- Rotation first moves the hot file aside atomically, so an interrupted rotation
+  is finished on the next start instead of losing or duplicating entries
+- Retention drops (or summarizes) whole segments without touching the hot file
+"""
+import gzip
+import json
+import lzma
+import os
+import time
+from typing import Iterator, List, Optional
+
+from .history_search import entry_timestamp
+
+SEGMENT_SUFFIXES = {"gzip": ".jsonl.gz", "lzma": ".jsonl.xz", "none": ".jsonl"}
+
+
+def _open_segment(path: str, mode: str, compression: Optional[str] = None):
+    """Open a segment file, inferring the compression from its name unless given."""
+    if compression is None:
+        compression = next((c for c, suffix in SEGMENT_SUFFIXES.items() if c != "none" and path.endswith(suffix)), "none")
+    if compression == "gzip":
+        return gzip.open(path, mode)
+    if compression == "lzma":
+        return lzma.open(path, mode)
+    return open(path, mode)
+
+
+class SegmentStore:
+    def __init__(self, history_path: str, compression: str = "gzip"):
+        if compression not in SEGMENT_SUFFIXES:
+            raise ValueError(f"Unknown history segment compression: {compression}")
+        self.history_path = history_path
+        self.compression = compression
+        self.manifest_path = history_path + ".segments.json"
+        self.rotating_path = history_path + ".rotating"
+        self.directory = os.path.dirname(os.path.abspath(history_path))
+        self._manifest: Optional[dict] = None
+        self._manifest_stamp = None
+
+    @property
+    def manifest(self) -> dict:
+        """The segment manifest, re-read whenever another writer has replaced it."""
+        try:
+            st = os.stat(self.manifest_path)
+            stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if self._manifest is None or stamp != self._manifest_stamp:
+            if stamp is None:
+                self._manifest = {"next_id": 1, "hot_started": None, "segments": []}
+            else:
+                with open(self.manifest_path, "r") as f:
+                    self._manifest = json.load(f)
+            self._manifest_stamp = stamp
+        return self._manifest
+
+    def _save_manifest(self, manifest: dict):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        self._manifest = None
+
+    @property
+    def segments(self) -> List[dict]:
+        return self.manifest["segments"]
+
+    def total_entries(self) -> int:
+        return sum(seg["entries"] for seg in self.segments)
+
+    def segment_path(self, seg: dict) -> str:
+        return os.path.join(self.directory, seg["file"])
+
+    def iter_lines(self, seg: dict) -> Iterator[bytes]:
+        """Stream the raw, non-empty JSONL records of a closed segment."""
+        with _open_segment(self.segment_path(seg), "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield line.rstrip(b"\n")
+
+    def hot_started(self) -> Optional[float]:
+        return self.manifest.get("hot_started")
+
+    def mark_hot_started(self, when: Optional[float] = None):
+        manifest = dict(self.manifest)
+        manifest["hot_started"] = time.time() if when is None else when
+        self._save_manifest(manifest)
+
+    def rotate(self) -> Optional[dict]:
+        """Close the hot file as a new compressed segment and start an empty hot file."""
+        self.recover()
+        if os.path.getsize(self.history_path) == 0:
+            return None
+        os.replace(self.history_path, self.rotating_path)
+        open(self.history_path, "a").close()
+        return self.recover()
+
+    def recover(self) -> Optional[dict]:
+        """Compress a hot file that was moved aside for rotation and record it in the manifest."""
+        if not os.path.exists(self.rotating_path):
+            return None
+        manifest = dict(self.manifest)
+        seg_id = manifest["next_id"]
+        name = os.path.basename(self.history_path) + f".seg-{seg_id:06d}" + SEGMENT_SUFFIXES[self.compression]
+        seg_path = os.path.join(self.directory, name)
+        tmp_path = seg_path + ".tmp"
+        count, first_ts, last_ts = 0, None, None
+        with open(self.rotating_path, "rb") as src, _open_segment(tmp_path, "wb", self.compression) as dst:
+            for line in src:
+                if not line.strip():
+                    continue
+                ts = entry_timestamp(json.loads(line))
+                if ts is not None:
+                    first_ts = ts if first_ts is None else first_ts
+                    last_ts = ts
+                count += 1
+                dst.write(line if line.endswith(b"\n") else line + b"\n")
+        os.replace(tmp_path, seg_path)
+        seg = {
+            "file": name,
+            "entries": count,
+            "first_ts": first_ts,
+            "last_ts": last_ts,
+            "started": manifest.get("hot_started"),
+            "closed": time.time(),
+            "bytes": os.path.getsize(seg_path),
+        }
+        manifest["segments"] = self.segments + [seg]
+        manifest["next_id"] = seg_id + 1
+        manifest["hot_started"] = None
+        self._save_manifest(manifest)
+        os.remove(self.rotating_path)
+        return seg
+
+    def replace_segments(self, dropped: List[dict], summary: Optional[dict] = None):
+        """Remove closed segments, optionally replacing them with one summary segment."""
+        manifest = dict(self.manifest)
+        dropped_files = {seg["file"] for seg in dropped}
+        kept = [seg for seg in self.segments if seg["file"] not in dropped_files]
+        if summary is not None:
+            seg_id = manifest["next_id"]
+            name = os.path.basename(self.history_path) + f".seg-{seg_id:06d}" + SEGMENT_SUFFIXES[self.compression]
+            with _open_segment(os.path.join(self.directory, name), "wb") as f:
+                f.write(json.dumps(summary).encode() + b"\n")
+            kept.insert(0, {
+                "file": name,
+                "entries": 1,
+                "first_ts": summary.get("first_ts"),
+                "last_ts": summary.get("last_ts"),
+                "started": dropped[0].get("started") if dropped else None,
+                "closed": time.time(),
+                "bytes": os.path.getsize(os.path.join(self.directory, name)),
+                "summarized_entries": summary.get("summarized_entries"),
+            })
+            manifest["next_id"] = seg_id + 1
+        manifest["segments"] = kept
+        self._save_manifest(manifest)
+        for seg in dropped:
+            try:
+                os.remove(self.segment_path(seg))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """Delete every closed segment and the manifest."""
+        for seg in self.segments:
+            try:
+                os.remove(self.segment_path(seg))
+            except FileNotFoundError:
+                pass
+        for path in (self.manifest_path, self.rotating_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._manifest = None
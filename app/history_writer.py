@@ -0,0 +1,148 @@
+"""
+Write-behind history writer for Coder-X
+- Appends are queued in memory and written by a background thread in batches
+- A batch is written once it holds max_entries lines or max_delay_ms after its first line
+- Pending lines are flushed on flush(), at interpreter exit and on SIGTERM
+"""
+import atexit
+import os
+import signal
+import threading
+import time
+import weakref
+from typing import Callable, List, Optional
+
+_writers: "weakref.WeakSet[BufferedHistoryWriter]" = weakref.WeakSet()
+_hooks_installed = False
+_previous_sigterm = None
+
+
+def flush_all():
+    """Flush every live writer (used at exit and on SIGTERM)."""
+    for writer in list(_writers):
+        try:
+            writer.close()
+        except Exception:
+            pass
+
+
+def _on_sigterm(signum, frame):
+    flush_all()
+    previous = _previous_sigterm
+    if callable(previous):
+        previous(signum, frame)
+    elif previous != signal.SIG_IGN:
+        # Re-deliver with the default action so the exit status still says SIGTERM
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+
+def _install_hooks():
+    global _hooks_installed, _previous_sigterm
+    if _hooks_installed:
+        return
+    _hooks_installed = True
+    atexit.register(flush_all)
+    try:
+        _previous_sigterm = signal.signal(signal.SIGTERM, _on_sigterm)
+    except ValueError:
+        # signal handlers can only be installed from the main thread
+        pass
+
+
+class BufferedHistoryWriter:
+    def __init__(self, write_batch: Callable[[List[str]], None], max_entries: int = 64, max_delay_ms: int = 200):
+        self._write_batch = write_batch
+        self.max_entries = max(1, max_entries)
+        self.max_delay = max(0, max_delay_ms) / 1000.0
+        self._cond = threading.Condition()
+        self._pending: List[str] = []
+        self._first_at = 0.0
+        self._inflight = False
+        self._flush_waiters = 0
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="coder-x-history-writer", daemon=True)
+        self._thread.start()
+        _writers.add(self)
+        _install_hooks()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def submit(self, line: str):
+        """Queue one serialized record; raises any error from an earlier background write."""
+        with self._cond:
+            self._raise_error()
+            if self._closed:
+                raise RuntimeError("History writer is closed.")
+            if not self._pending:
+                self._first_at = time.monotonic()
+            self._pending.append(line)
+            # Wake the writer to start the delay timer (first line) or write a full batch
+            if len(self._pending) == 1 or len(self._pending) >= self.max_entries:
+                self._cond.notify_all()
+
+    def _next_batch(self) -> Optional[List[str]]:
+        with self._cond:
+            while True:
+                if self._pending and (self._closed or self._flush_waiters or len(self._pending) >= self.max_entries):
+                    break
+                if self._closed:
+                    return None
+                if self._pending:
+                    remaining = self._first_at + self.max_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                else:
+                    self._cond.wait()
+            batch, self._pending = self._pending, []
+            self._inflight = True
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._write_batch(batch)
+            except BaseException as e:
+                with self._cond:
+                    self._error = e
+            finally:
+                with self._cond:
+                    self._inflight = False
+                    self._cond.notify_all()
+
+    def flush(self):
+        """Block until every queued line has been written."""
+        if threading.current_thread() is self._thread:
+            return
+        with self._cond:
+            self._flush_waiters += 1
+            self._cond.notify_all()
+            try:
+                while (self._pending or self._inflight) and self._thread.is_alive():
+                    self._cond.wait()
+            finally:
+                self._flush_waiters -= 1
+            self._raise_error()
+
+    def close(self):
+        """Flush pending lines and stop the background thread."""
+        if self._closed:
+            return
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout=5)
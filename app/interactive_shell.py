@@ -9,7 +9,7 @@ import os
 import sys
 import json
 from app.model_management import ModelManager
-from app.file_operations import read_file, write_file, append_file
+from app.file_operations import is_large_file, read_chunks, read_file, write_file, append_file
 from app.config import load_config, save_config, set_config_key
 from app.session_history import SessionHistory
 from app.user_management import UserManager
@@ -81,11 +81,22 @@ class InteractiveShell:
             save_config(conf)
             print(f"Set {key} = {value}")
         elif cmd == "/file-read" and len(args) > 1:
-            content = read_file(args[1])
-            if content is not None:
-                print(content)
+            if len(args) > 2 or is_large_file(args[1]):
+                # /file-read PATH A:B prints lines A..B (1-based, inclusive); large files are streamed
+                try:
+                    last = ""
+                    for last in read_chunks(args[1], args[2] if len(args) > 2 else None):
+                        print(last, end="")
+                    if not last.endswith("\n"):
+                        print()
+                except (OSError, ValueError) as e:
+                    print(f"[ERROR] Could not read file: {args[1]} ({e})")
             else:
-                print(f"[ERROR] Could not read file: {args[1]}")
+                content = read_file(args[1])
+                if content is not None:
+                    print(content)
+                else:
+                    print(f"[ERROR] Could not read file: {args[1]}")
         elif cmd == "/file-write" and len(args) > 2:
             ok = write_file(args[1], ' '.join(args[2:]))
             if ok:
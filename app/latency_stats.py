@@ -0,0 +1,252 @@
+"""
+Persistent latency histograms for Coder-X
+- Every finished timing span (commands, model requests, MCP calls, shell runs, ...) is recorded
+  into a per-operation histogram with HDR-style log-linear buckets (~6% relative error,
+  1us to ~25 days), backed by a fixed-size array so histograms merge by adding counts
+- Histograms are merged into one small JSON file per day (latency-YYYY-MM-DD.json) under
+  CODER_X_STATS_DIR (default ~/.coder_x_stats) after each command; old days are pruned
+- Recording is on by default; CODER_X_STATS=0 turns it off. Without --profile it uses
+  profiling's duration sink (a perf_counter pair per span, no Span objects), so it costs one
+  small timer per span plus the merge into the daily file when the command exits
+- `coder-x stats` prints count, p50/p90/p99/max and throughput per operation
+"""
+import json
+import os
+import threading
+import time
+from array import array
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from .file_lock import file_lock
+
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# Values below 2 * SUB_BUCKETS us get one bucket each; every further power of two gets SUB_BUCKETS
+MAX_SHIFT = 36
+BUCKET_COUNT = 2 * SUB_BUCKETS + MAX_SHIFT * SUB_BUCKETS
+MAX_VALUE_US = (2 * SUB_BUCKETS << MAX_SHIFT) - 1
+RETENTION_DAYS = 30
+
+
+def bucket_index(value_us: int) -> int:
+    if value_us < 2 * SUB_BUCKETS:
+        return max(0, value_us)
+    value_us = min(value_us, MAX_VALUE_US)
+    shift = value_us.bit_length() - SUB_BUCKET_BITS - 1
+    return 2 * SUB_BUCKETS + (shift - 1) * SUB_BUCKETS + (value_us >> shift) - SUB_BUCKETS
+
+
+def bucket_bounds(index: int):
+    """Lowest and highest value (us) that fall into bucket index."""
+    if index < 2 * SUB_BUCKETS:
+        return index, index
+    shift = (index - 2 * SUB_BUCKETS) // SUB_BUCKETS + 1
+    sub = (index - 2 * SUB_BUCKETS) % SUB_BUCKETS + SUB_BUCKETS
+    return sub << shift, ((sub + 1) << shift) - 1
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total_us", "min_us", "max_us", "first_ts", "last_ts")
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * BUCKET_COUNT))
+        self.count = 0
+        self.total_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us: Optional[int] = None
+        self.first_ts: Optional[float] = None
+        self.last_ts: Optional[float] = None
+
+    def record(self, value_us: int, when: Optional[float] = None):
+        when = time.time() if when is None else when
+        self.counts[bucket_index(value_us)] += 1
+        self.count += 1
+        self.total_us += value_us
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+        self.max_us = value_us if self.max_us is None else max(self.max_us, value_us)
+        self.first_ts = when if self.first_ts is None else min(self.first_ts, when)
+        self.last_ts = when if self.last_ts is None else max(self.last_ts, when)
+
+    def merge(self, other: "Histogram"):
+        if not other.count:
+            return
+        for i, n in enumerate(other.counts):
+            if n:
+                self.counts[i] += n
+        self.count += other.count
+        self.total_us += other.total_us
+        for attr, pick in (("min_us", min), ("max_us", max), ("first_ts", min), ("last_ts", max)):
+            mine, theirs = getattr(self, attr), getattr(other, attr)
+            setattr(self, attr, theirs if mine is None else pick(mine, theirs))
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Value (us) at percentile p (0-100), reported as the midpoint of its bucket."""
+        if not self.count:
+            return None
+        rank = max(1, round(p / 100.0 * self.count))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                low, high = bucket_bounds(i)
+                return min(max((low + high) / 2, self.min_us), self.max_us)
+        return float(self.max_us)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total_us": self.total_us,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+            "first_ts": self.first_ts,
+            "last_ts": self.last_ts,
+            # Sparse bucket counts keep the daily file small
+            "buckets": {str(i): n for i, n in enumerate(self.counts) if n},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Histogram":
+        h = cls()
+        for i, n in data.get("buckets", {}).items():
+            if 0 <= int(i) < BUCKET_COUNT:
+                h.counts[int(i)] = n
+        h.count = data.get("count", 0)
+        h.total_us = data.get("total_us", 0)
+        h.min_us = data.get("min_us")
+        h.max_us = data.get("max_us")
+        h.first_ts = data.get("first_ts")
+        h.last_ts = data.get("last_ts")
+        return h
+
+
+def stats_dir() -> str:
+    return os.path.expanduser(os.environ.get("CODER_X_STATS_DIR") or "~/.coder_x_stats")
+
+
+def stats_enabled() -> bool:
+    return os.environ.get("CODER_X_STATS", "1") != "0"
+
+
+def day_path(day: date, directory: Optional[str] = None) -> str:
+    return os.path.join(directory or stats_dir(), f"latency-{day.isoformat()}.json")
+
+
+def load_day(path: str) -> Dict[str, Histogram]:
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return {op: Histogram.from_dict(h) for op, h in data.get("operations", {}).items()}
+
+
+def load_days(days: int = 1, directory: Optional[str] = None, today: Optional[date] = None) -> Dict[str, Histogram]:
+    """Merge the histograms of the last `days` daily files (today included)."""
+    today = today or date.today()
+    merged: Dict[str, Histogram] = {}
+    for back in range(max(1, days)):
+        for op, h in load_day(day_path(today - timedelta(days=back), directory)).items():
+            merged.setdefault(op, Histogram()).merge(h)
+    return merged
+
+
+class LatencyRecorder:
+    """Collects span latencies in memory and merges them into today's file on flush()."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Histogram] = {}
+
+    def record(self, op: str, value_us: int, when: Optional[float] = None):
+        with self._lock:
+            h = self._pending.get(op)
+            if h is None:
+                h = self._pending[op] = Histogram()
+            h.record(value_us, when)
+
+    def record_span(self, span):
+        self.record(span.name, (span.end_ns - span.start_ns) // 1000)
+
+    def record_ns(self, op: str, duration_ns: int):
+        self.record(op, duration_ns // 1000)
+
+    def flush(self, today: Optional[date] = None):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        directory = self.directory or stats_dir()
+        today = today or date.today()
+        os.makedirs(directory, exist_ok=True)
+        path = day_path(today, directory)
+        with file_lock(path + ".lock"):
+            merged = load_day(path)
+            for op, h in pending.items():
+                merged.setdefault(op, Histogram()).merge(h)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"day": today.isoformat(), "operations": {op: h.to_dict() for op, h in merged.items()}}, f)
+            os.replace(tmp_path, path)
+        self._prune(directory, today)
+
+    def _prune(self, directory: str, today: date):
+        cutoff = (today - timedelta(days=RETENTION_DAYS)).isoformat()
+        for name in os.listdir(directory):
+            if name.startswith("latency-") and name[len("latency-"):len("latency-") + 10] < cutoff:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+
+_recorder: Optional[LatencyRecorder] = None
+
+
+def start() -> Optional[LatencyRecorder]:
+    """Record every finished span into the process-wide recorder (unless CODER_X_STATS=0).
+
+    Profiled spans reach it as a listener; otherwise profiling stays off and only the
+    duration sink is set."""
+    global _recorder
+    if not stats_enabled():
+        return None
+    from . import profiling
+    if _recorder is None:
+        import atexit
+        _recorder = LatencyRecorder()
+        atexit.register(flush)
+    profiling.add_listener(_recorder.record_span)
+    profiling.set_duration_sink(_recorder.record_ns)
+    return _recorder
+
+
+def flush():
+    if _recorder is not None:
+        try:
+            _recorder.flush()
+        except OSError:
+            # Stats are best-effort and must never fail a command
+            pass
+
+
+def summarize(histograms: Dict[str, Histogram], prefix: Optional[str] = None) -> List[dict]:
+    """One row per operation: count, percentiles (ms), max (ms) and throughput (per minute)."""
+    rows = []
+    for op in sorted(histograms):
+        h = histograms[op]
+        if not h.count or (prefix and not op.startswith(prefix)):
+            continue
+        window = max(1.0, (h.last_ts or 0) - (h.first_ts or 0))
+        rows.append({
+            "op": op,
+            "count": h.count,
+            "p50_ms": h.percentile(50) / 1000,
+            "p90_ms": h.percentile(90) / 1000,
+            "p99_ms": h.percentile(99) / 1000,
+            "max_ms": h.max_us / 1000,
+            "mean_ms": h.total_us / h.count / 1000,
+            "per_min": h.count / window * 60,
+        })
+    return rows
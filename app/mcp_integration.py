@@ -5,6 +5,7 @@ MCP (Model Context Protocol) integration for Coder-X Python Assistant
 from typing import Optional
 import requests
 from .config import load_config
+from .profiling import span
 
 class MCPClient:
     def __init__(self, config=None):
@@ -21,7 +22,8 @@ class MCPClient:
         if not self.server_url:
             return None
         try:
-            resp = requests.get(f"{self.server_url}/context/{context_id}")
+            with span("mcp.get_context", url=self.server_url):
+                resp = requests.get(f"{self.server_url}/context/{context_id}")
             if resp.status_code == 200:
                 return resp.json()
         except Exception:
@@ -32,7 +34,8 @@ class MCPClient:
         if not self.server_url:
             return False
         try:
-            resp = requests.post(f"{self.server_url}/context/{context_id}", json=data)
+            with span("mcp.save_context", url=self.server_url):
+                resp = requests.post(f"{self.server_url}/context/{context_id}", json=data)
             return resp.status_code == 200
         except Exception:
             return False
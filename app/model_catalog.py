@@ -0,0 +1,208 @@
+"""
+Persistent model catalog for Coder-X
+- Caches what lives in the model storage path (name, kind, format, size, mtime, content hash)
+  in <model_storage_path>/.coder_x_catalog.json
+- A listing costs one stat of the storage directory while its mtime is unchanged; when it
+  changes, only new or modified entries are re-measured and re-hashed
+- Hashes are sampled (size plus head, middle and tail blocks) so multi-GB models on network
+  volumes are fingerprinted without reading them in full
+- GGUF/GGML entries also carry their header summary (architecture, parameters, quantization,
+  context length, tensor count; see gguf.model_info), parsed when the entry is (re-)measured
+- Also caches `ollama list` output, keyed on the mtimes of Ollama's manifest tree
+"""
+import hashlib
+import json
+import os
+from typing import Callable, Dict, List, Optional
+
+from .file_stamps import is_settled
+from .profiling import span
+
+CATALOG_NAME = ".coder_x_catalog.json"
+CATALOG_VERSION = 3
+MODEL_FORMATS = {".gguf": "gguf", ".ggml": "ggml", ".bin": "bin", ".pth": "pytorch"}
+HASH_SAMPLE_SIZE = 64 * 1024
+# Formats whose files may carry a GGUF/GGML header worth summarising
+HEADER_FORMATS = {"gguf", "ggml", "bin"}
+
+
+def model_format(name: str, is_dir: bool) -> Optional[str]:
+    """Catalog format for a storage entry, or None if it is not a model."""
+    if is_dir:
+        return "dir"
+    return MODEL_FORMATS.get(os.path.splitext(name)[1].lower())
+
+
+def sampled_hash(path: str, size: int) -> str:
+    """blake2b over the file size and three HASH_SAMPLE_SIZE blocks (the whole file if small)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(size).encode())
+    with open(path, "rb") as f:
+        if size <= 3 * HASH_SAMPLE_SIZE:
+            h.update(f.read())
+        else:
+            for offset in (0, size // 2 - HASH_SAMPLE_SIZE // 2, size - HASH_SAMPLE_SIZE):
+                f.seek(offset)
+                h.update(f.read(HASH_SAMPLE_SIZE))
+    return "sample:" + h.hexdigest()
+
+
+def header_info(path: str) -> Optional[dict]:
+    """gguf.model_info for path, or None if it has no readable GGUF/GGML header."""
+    from .gguf import GGUFError, model_info
+    try:
+        return model_info(path)
+    except (GGUFError, OSError):
+        return None
+
+
+def tree_size(path: str) -> int:
+    total = 0
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        total += tree_size(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return total
+
+
+def _tree_fingerprint(path: str) -> Optional[List]:
+    """(relative path, mtime_ns) of every directory under path; None if path is missing."""
+    if not os.path.isdir(path):
+        return None
+    stamps = []
+    for root, dirs, _ in os.walk(path):
+        try:
+            stamps.append([os.path.relpath(root, path), os.stat(root).st_mtime_ns])
+        except OSError:
+            continue
+        dirs.sort()
+    return stamps
+
+
+class ModelCatalog:
+    def __init__(self, storage_path: str, catalog_path: Optional[str] = None):
+        self.storage_path = storage_path
+        self.catalog_path = catalog_path or os.path.join(storage_path, CATALOG_NAME)
+        self._data: Optional[dict] = None
+
+    def _empty(self) -> dict:
+        return {"version": CATALOG_VERSION, "dir_mtime_ns": None, "entries": {}, "ollama": None}
+
+    def _load(self) -> dict:
+        if self._data is None:
+            try:
+                with open(self.catalog_path, "r") as f:
+                    data = json.load(f)
+                if data.get("version") != CATALOG_VERSION:
+                    data = self._empty()
+            except (OSError, ValueError):
+                data = self._empty()
+            self._data = data
+        return self._data
+
+    def _save(self):
+        # Rewritten in place rather than renamed over: a rename would change the storage
+        # directory's mtime and make the next listing rescan. A reader that catches a
+        # half-written file just sees an empty catalog and rescans.
+        try:
+            with open(self.catalog_path, "w") as f:
+                json.dump(self._data, f)
+        except OSError:
+            # Read-only volumes still get the in-memory catalog for this process
+            pass
+
+    def _measure(self, entry: os.DirEntry, fmt: str, previous: Optional[dict]) -> dict:
+        st = entry.stat()
+        is_dir = fmt == "dir"
+        if previous and previous["mtime_ns"] == st.st_mtime_ns and (is_dir or previous["size"] == st.st_size):
+            return previous
+        size = tree_size(entry.path) if is_dir else st.st_size
+        try:
+            content_hash = None if is_dir else sampled_hash(entry.path, size)
+        except OSError:
+            content_hash = None
+        return {
+            "name": entry.name,
+            "format": fmt,
+            "size": size,
+            "mtime_ns": st.st_mtime_ns,
+            "hash": content_hash,
+            "info": header_info(entry.path) if fmt in HEADER_FORMATS else None,
+        }
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rescan the storage path if its mtime changed (or force); returns True if it rescanned.
+
+        A directory's mtime changes when entries are added, removed or renamed, not when a file
+        is rewritten in place; use force=True to re-check every entry's size and mtime.
+        """
+        data = self._load()
+        if not os.path.exists(self.catalog_path) and os.path.isdir(self.storage_path):
+            # Create the catalog before taking the directory's mtime, since creating it changes it
+            self._save()
+        try:
+            dir_mtime = os.stat(self.storage_path).st_mtime_ns
+        except OSError:
+            data["entries"] = {}
+            data["dir_mtime_ns"] = None
+            return False
+        if not force and data["dir_mtime_ns"] == dir_mtime:
+            return False
+        with span("model.catalog_scan", path=self.storage_path):
+            entries: Dict[str, dict] = {}
+            previous = data["entries"]
+            with os.scandir(self.storage_path) as it:
+                for entry in it:
+                    if entry.name == CATALOG_NAME:
+                        continue
+                    try:
+                        fmt = model_format(entry.name, entry.is_dir())
+                        if fmt is not None:
+                            entries[entry.name] = self._measure(entry, fmt, previous.get(entry.name))
+                    except OSError:
+                        continue
+        data["entries"] = entries
+        data["dir_mtime_ns"] = dir_mtime if is_settled(dir_mtime) else None
+        self._save()
+        return True
+
+    def entries(self) -> List[dict]:
+        self.refresh()
+        return sorted(self._load()["entries"].values(), key=lambda e: e["name"])
+
+    def get(self, name: str) -> Optional[dict]:
+        self.refresh()
+        return self._load()["entries"].get(name)
+
+    def query(self, fmt: Optional[str] = None, min_size: Optional[int] = None,
+              max_size: Optional[int] = None) -> List[dict]:
+        """Catalog entries filtered by format and size range (bytes)."""
+        return [
+            e for e in self.entries()
+            if (fmt is None or e["format"] == fmt)
+            and (min_size is None or e["size"] >= min_size)
+            and (max_size is None or e["size"] <= max_size)
+        ]
+
+    def ollama_models(self, list_models: Callable[[], List[dict]], manifests_dir: str) -> List[dict]:
+        """`ollama list` records (name, size, digest, modified), re-run only when Ollama's manifest
+        tree has changed."""
+        fingerprint = _tree_fingerprint(manifests_dir)
+        data = self._load()
+        cached = data.get("ollama")
+        if fingerprint is not None and cached and cached.get("fingerprint") == fingerprint:
+            return list(cached["models"])
+        models = list_models()
+        settled = fingerprint is not None and all(is_settled(mtime) for _, mtime in fingerprint)
+        if settled and models:
+            data["ollama"] = {"fingerprint": fingerprint, "models": models}
+            self._save()
+        return models
@@ -0,0 +1,145 @@
+"""
+Model volume discovery for Coder-X
+- Walks volumes with os.scandir: whether an entry is a directory comes from the directory
+  listing itself (d_type), so only model files are stat-ed, for their size
+- Recurses to a configurable depth below each volume (DEFAULT_MAX_DEPTH)
+- Scans every volume concurrently on its own daemon thread against one shared deadline; a slow
+  or hung mount is reported as incomplete with whatever it found so far instead of blocking
+  the result (and, being a daemon thread, never blocks interpreter exit)
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .model_catalog import model_format
+from .profiling import span
+
+DEFAULT_MOUNT_ROOTS = ("/Volumes", "/mnt", "/media")
+DEFAULT_MAX_DEPTH = 2
+DEFAULT_TIMEOUT = 5.0
+
+
+class VolumeScan:
+    """Result of scanning one volume; `complete` is False if the deadline cut it short."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.found: list = []
+        self.complete = False
+        self.error: Optional[str] = None
+        self.elapsed_ms = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "root": self.root,
+            "found": list(self.found),
+            "complete": self.complete,
+            "error": self.error,
+            "elapsed_ms": round(self.elapsed_ms, 3),
+        }
+
+
+def scan_models(root: str, max_depth: int = DEFAULT_MAX_DEPTH, found: Optional[list] = None,
+                stop: Optional[threading.Event] = None) -> List[dict]:
+    """Model files under root, down to max_depth levels of subdirectories.
+
+    Results are appended to `found` as they are discovered, so a scan that is abandoned part way
+    still reports what it saw. Raises OSError if root itself cannot be listed.
+    """
+    found = [] if found is None else found
+
+    def walk(path: str, depth: int):
+        with os.scandir(path) as it:
+            for entry in it:
+                if stop is not None and stop.is_set():
+                    return
+                try:
+                    if entry.is_dir():
+                        if depth < max_depth:
+                            walk(entry.path, depth + 1)
+                        continue
+                    fmt = model_format(entry.name, False)
+                    if fmt is not None:
+                        found.append({"path": entry.path, "name": entry.name, "format": fmt,
+                                      "size": entry.stat().st_size})
+                except OSError:
+                    # Unreadable subdirectories and vanished files are skipped
+                    continue
+
+    walk(root, 0)
+    return found
+
+
+def list_subdirectories(root: str) -> List[str]:
+    """Immediate subdirectories of root (mount points under /Volumes, /mnt, ...); [] if unreadable."""
+    try:
+        with os.scandir(root) as it:
+            return sorted(entry.path for entry in it if _is_dir(entry))
+    except OSError:
+        return []
+
+
+def _is_dir(entry: os.DirEntry) -> bool:
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def _run_with_deadline(tasks: Dict[str, Callable], timeout: float) -> Dict[str, VolumeScan]:
+    """Run task(scan, stop) for every root on its own daemon thread; wait at most timeout overall."""
+    stop = threading.Event()
+    scans = {root: VolumeScan(root) for root in tasks}
+
+    def run(root: str):
+        scan = scans[root]
+        start = time.perf_counter()
+        try:
+            tasks[root](scan, stop)
+            scan.complete = not stop.is_set()
+        except OSError as e:
+            scan.error = str(e)
+        finally:
+            scan.elapsed_ms = (time.perf_counter() - start) * 1000
+
+    threads = []
+    for root in tasks:
+        t = threading.Thread(target=run, args=(root,), name=f"coder-x-scan:{root}", daemon=True)
+        t.start()
+        threads.append((root, t))
+    deadline = time.monotonic() + timeout
+    for root, t in threads:
+        t.join(max(0.0, deadline - time.monotonic()))
+    # Threads still blocked in the filesystem are abandoned; the rest stop at their next entry
+    stop.set()
+    for root, t in threads:
+        if t.is_alive():
+            scan = scans[root]
+            # Snapshot what was found so a late thread cannot change the returned result
+            scan.found = list(scan.found)
+            scan.error = f"timed out after {timeout:g}s"
+            scan.elapsed_ms = timeout * 1000
+    return scans
+
+
+def discover_models(roots: Iterable[str], max_depth: int = DEFAULT_MAX_DEPTH,
+                    timeout: float = DEFAULT_TIMEOUT) -> Dict[str, VolumeScan]:
+    """Scan every root concurrently for models; returns one VolumeScan per root, in input order."""
+    roots = list(dict.fromkeys(roots))
+    with span("model.discover", volumes=len(roots), depth=max_depth):
+        return _run_with_deadline(
+            {root: (lambda scan, stop, root=root: scan_models(root, max_depth, scan.found, stop)) for root in roots},
+            timeout)
+
+
+def discover_volumes(mount_roots: Optional[Iterable[str]] = None,
+                     timeout: float = DEFAULT_TIMEOUT) -> List[str]:
+    """Mounted volumes under the mount roots (default DEFAULT_MOUNT_ROOTS), listed concurrently;
+    a hung mount root is skipped."""
+    mount_roots = list(dict.fromkeys(DEFAULT_MOUNT_ROOTS if mount_roots is None else mount_roots))
+    with span("model.discover_volumes"):
+        scans = _run_with_deadline(
+            {root: (lambda scan, stop, root=root: scan.found.extend(list_subdirectories(root))) for root in mount_roots},
+            timeout)
+    return [path for root in mount_roots for path in scans[root].found if scans[root].complete]
@@ -8,29 +8,136 @@ import os
 from typing import List, Optional
 import subprocess
 from .config import get_model_storage_path, load_config, set_config_key
+from .model_discovery import DEFAULT_MAX_DEPTH, DEFAULT_TIMEOUT
+from .profiling import span, timed
 
 OLLAMA_MODELS_CMD = ["ollama", "list"]
 
+
+def ollama_models_dir() -> str:
+    return os.path.expanduser(os.environ.get("OLLAMA_MODELS") or "~/.ollama/models")
+
+
+def ollama_manifests_dir() -> str:
+    """Directory of Ollama's model manifests, which changes whenever a model is pulled or removed."""
+    return os.path.join(ollama_models_dir(), "manifests")
+
+
+def ollama_model_blob(name: str) -> Optional[str]:
+    """Path of the weights blob of an Ollama model such as "llama2" or "user/model:tag", if present."""
+    import json
+    model, _, tag = name.partition(":")
+    parts = model.split("/")
+    if len(parts) == 1:
+        parts = ["registry.ollama.ai", "library"] + parts
+    elif len(parts) == 2:
+        parts = ["registry.ollama.ai"] + parts
+    manifest = os.path.join(ollama_manifests_dir(), *parts, tag or "latest")
+    try:
+        with open(manifest, "r") as f:
+            layers = json.load(f).get("layers", [])
+    except (OSError, ValueError):
+        return None
+    for layer in layers:
+        if layer.get("mediaType") == "application/vnd.ollama.image.model":
+            blob = os.path.join(ollama_models_dir(), "blobs", layer.get("digest", "").replace(":", "-"))
+            return blob if os.path.isfile(blob) else None
+    return None
+
+SIZE_UNITS = {"B": 1, "KB": 10**3, "MB": 10**6, "GB": 10**9, "TB": 10**12}
+
+
+def parse_ollama_list_line(line: str) -> dict:
+    """One `ollama list` row (NAME, ID, SIZE, MODIFIED columns) as a model record."""
+    import re
+    cols = re.split(r"\s{2,}|\t", line.strip())
+    size = None
+    if len(cols) > 2:
+        number, _, unit = cols[2].partition(" ")
+        try:
+            size = int(float(number) * SIZE_UNITS.get(unit.upper(), 1))
+        except ValueError:
+            pass
+    return {
+        "name": cols[0].split()[0],
+        "size": size,
+        "digest": cols[1] if len(cols) > 1 else None,
+        "modified": cols[3] if len(cols) > 3 else None,
+    }
+
 class ModelManager:
     def __init__(self, config=None):
         self.config = config or load_config()
         self.storage_path = get_model_storage_path(self.config)
+        self._catalog = None
+        self._pool = None
 
+    @property
+    def catalog(self):
+        """Persistent catalog of the storage path (see model_catalog)."""
+        if self._catalog is None or self._catalog.storage_path != self.storage_path:
+            from .model_catalog import ModelCatalog
+            self._catalog = ModelCatalog(self.storage_path)
+        return self._catalog
+
+    @timed("model.list_local")
     def list_local_models(self) -> List[str]:
         """List all models in the configured storage path (Ollama or other)."""
-        models = []
-        if os.path.exists(self.storage_path):
-            for entry in os.listdir(self.storage_path):
-                if os.path.isdir(os.path.join(self.storage_path, entry)) or entry.endswith(('.bin', '.gguf', '.ggml', '.pth')):
-                    models.append(entry)
-        return models
+        return [entry["name"] for entry in self.catalog.entries()]
+
+    def find_models(self, fmt: Optional[str] = None, min_size: Optional[int] = None,
+                    max_size: Optional[int] = None) -> List[dict]:
+        """Catalog entries in the storage path filtered by format and size (bytes)."""
+        return self.catalog.query(fmt, min_size, max_size)
+
+    def model_info(self, name: str) -> dict:
+        """Header metadata (see gguf.model_info) of a model file, a storage-path entry or an Ollama model.
+
+        Raises FileNotFoundError if name cannot be resolved and gguf.GGUFError if it has no
+        readable GGUF/GGML header.
+        """
+        from .gguf import GGUFError, model_info
+        path = os.path.expanduser(name)
+        if not os.path.isfile(path):
+            entry = self.catalog.get(name)
+            if entry is not None:
+                if entry.get("info"):
+                    return dict(entry["info"], path=os.path.join(self.storage_path, name), file_size=entry["size"])
+                path = os.path.join(self.storage_path, name)
+                if entry["format"] == "dir":
+                    from .model_discovery import scan_models
+                    found = sorted(scan_models(path), key=lambda m: m["size"], reverse=True)
+                    if not found:
+                        raise GGUFError(f"No model file found in '{path}'")
+                    path = found[0]["path"]
+            else:
+                path = ollama_model_blob(name)
+                if path is None:
+                    raise FileNotFoundError(f"Model '{name}' not found in the storage path or Ollama")
+        return dict(model_info(path), path=path, file_size=os.path.getsize(path))
 
     def list_ollama_models(self) -> List[str]:
-        """List models available via Ollama CLI (if installed)."""
+        """List models available via Ollama (HTTP API, else the CLI if installed)."""
+        return [m["name"] for m in self.list_ollama_model_details()]
+
+    def list_ollama_model_details(self) -> List[dict]:
+        """Ollama models with name, size (bytes), digest and modified time.
+
+        Uses the Ollama HTTP API (cached for a few seconds); when the server is not reachable,
+        falls back to parsing `ollama list`, cached until Ollama's manifests change.
+        """
+        from .ollama_client import OllamaError, OllamaUnavailable, get_client
+        try:
+            return get_client().list_models()
+        except (OllamaUnavailable, OllamaError, ValueError):
+            return self.catalog.ollama_models(self._run_ollama_list, ollama_manifests_dir())
+
+    def _run_ollama_list(self) -> List[dict]:
         try:
-            result = subprocess.run(OLLAMA_MODELS_CMD, capture_output=True, text=True, check=True)
+            with span("model.list_ollama", cmd=" ".join(OLLAMA_MODELS_CMD)):
+                result = subprocess.run(OLLAMA_MODELS_CMD, capture_output=True, text=True, check=True)
             lines = result.stdout.strip().split('\n')
-            return [line.split()[0] for line in lines[1:] if line]
+            return [parse_ollama_list_line(line) for line in lines[1:] if line.strip()]
         except Exception:
             return []
 
@@ -60,24 +167,88 @@ class ModelManager:
     def get_active_model(self) -> Optional[str]:
         return getattr(self.config, "model", None)
 
-    def set_active_model(self, model_name: str):
+    def set_active_model(self, model_name: str, warm: bool = False) -> Optional[dict]:
+        """Make model_name the active model.
+
+        Only the config is updated unless warm is set: loading a model can take minutes and
+        may evict others from the pool, so it is left to `model set --warm` or `model preload`.
+        """
         self.config = set_config_key(self.config, "model", model_name)
         from .config import save_config
         save_config(self.config)
+        if warm and model_name:
+            return self.warm_model(model_name)
+        return None
+
+    @property
+    def pool(self):
+        """Warm pool of models resident in Ollama (see model_pool)."""
+        if self._pool is None:
+            from .model_pool import DEFAULT_KEEP_ALIVE, ModelPool, OllamaRuntime
+            runtime = OllamaRuntime(keep_alive=getattr(self.config, "model_pool_keep_alive", DEFAULT_KEEP_ALIVE))
+            self._pool = ModelPool(runtime, getattr(self.config, "model_pool_budget_mb", 0) * 1024 * 1024 or None)
+        return self._pool
+
+    def warm_model(self, model_name: str) -> Optional[dict]:
+        """Make model_name resident in the warm pool; None if the runtime cannot load it."""
+        from .ollama_client import OllamaError, OllamaUnavailable
+        try:
+            return self.pool.acquire(model_name)
+        except (OllamaUnavailable, OllamaError):
+            return None
+
+    def preload_models(self, names: Optional[List[str]] = None) -> List[dict]:
+        """Warm names (default: the configured model_pool_preload); failures are reported per model."""
+        names = names or list(getattr(self.config, "model_pool_preload", None) or [])
+        results = []
+        for name in names:
+            result = self.warm_model(name)
+            results.append(result if result is not None else {"model": name, "error": "could not be loaded"})
+        return results
 
     def load_model_ollama(self, model_name: str) -> bool:
-        """Pull (download) a model from Ollama registry and make it available locally."""
+        """Pull (download) a model from Ollama registry and make it available locally.
+
+        Progress events are published to model_pull listeners; interrupted downloads are retried
+        and resume from the layers already fetched.
+        """
+        from .model_pull import emit, pull_model
+        from .ollama_client import OllamaUnavailable
         try:
-            result = subprocess.run(["ollama", "pull", model_name], capture_output=True, text=True, check=True)
+            return pull_model(model_name)
+        except OllamaUnavailable:
+            pass
+        emit({"model": model_name, "status": "pulling via ollama CLI", "completed": 0, "total": 0, "percent": 0.0,
+              "rate": 0.0, "resumed": False, "done": False, "error": None})
+        try:
+            with span("model.pull", model=model_name):
+                result = subprocess.run(["ollama", "pull", model_name], capture_output=True, text=True, check=True)
             return result.returncode == 0
         except Exception as e:
             print(f"[ERROR] Failed to load model '{model_name}' via Ollama: {e}")
             return False
 
+    def load_models(self, model_names: List[str], max_concurrent: int = 2) -> dict:
+        """Pull several models at once (at most max_concurrent in flight); returns {name: succeeded}."""
+        from .model_pull import PullQueue
+        with PullQueue(self.load_model_ollama, max_concurrent) as queue:
+            for name in model_names:
+                queue.submit(name)
+            return queue.wait()
+
     def unload_model_ollama(self, model_name: str) -> bool:
         """Remove a model from Ollama's local storage."""
+        from .ollama_client import OllamaError, OllamaUnavailable, get_client
+        try:
+            return get_client().delete(model_name)
+        except OllamaError as e:
+            print(f"[ERROR] Failed to unload model '{model_name}' via Ollama: {e}")
+            return False
+        except OllamaUnavailable:
+            pass
         try:
-            result = subprocess.run(["ollama", "rm", model_name], capture_output=True, text=True, check=True)
+            with span("model.remove", model=model_name):
+                result = subprocess.run(["ollama", "rm", model_name], capture_output=True, text=True, check=True)
             return result.returncode == 0
         except Exception as e:
             print(f"[ERROR] Failed to unload model '{model_name}' via Ollama: {e}")
@@ -85,42 +256,91 @@ class ModelManager:
 
     def list_ollama_volumes(self) -> list:
         """List candidate parent directories for Ollama model storage."""
+        from .model_discovery import discover_volumes
         # Ollama stores models in ~/.ollama/models by default, but user may want to use a different volume
         default_path = os.path.expanduser("~/.ollama/models")
         candidates = [default_path]
         # Add any user-configured path
         if self.storage_path not in candidates:
             candidates.append(self.storage_path)
-        # Optionally scan for mounted volumes (macOS/Linux)
-        mounts = ["/Volumes", "/mnt", "/media"]
-        for m in mounts:
-            if os.path.exists(m):
-                for entry in os.listdir(m):
-                    p = os.path.join(m, entry)
-                    if os.path.isdir(p):
-                        candidates.append(p)
+        # Mounted volumes (macOS/Linux), listed concurrently so a hung mount cannot block
+        timeout = getattr(self.config, "model_discovery_timeout", DEFAULT_TIMEOUT)
+        candidates.extend(p for p in discover_volumes(timeout=timeout) if p not in candidates)
         return candidates
 
+    def probe_volumes(self, size: Optional[int] = None, timeout: Optional[float] = None) -> List[dict]:
+        """Candidate volumes with filesystem, free space and throughput, best first (see volume_probe)."""
+        from .volume_probe import DEFAULT_PROBE_TIMEOUT, PROBE_SIZE, probe_volumes
+        return probe_volumes(self.list_ollama_volumes(), size or PROBE_SIZE,
+                             DEFAULT_PROBE_TIMEOUT if timeout is None else timeout)
+
+    def discover_models(self, max_depth: Optional[int] = None, timeout: Optional[float] = None) -> List[dict]:
+        """Scan every candidate volume concurrently for model files (see model_discovery)."""
+        from .model_discovery import discover_models
+        max_depth = getattr(self.config, "model_discovery_depth", DEFAULT_MAX_DEPTH) if max_depth is None else max_depth
+        timeout = getattr(self.config, "model_discovery_timeout", DEFAULT_TIMEOUT) if timeout is None else timeout
+        scans = discover_models(self.list_ollama_volumes(), max_depth, timeout)
+        return [scan.to_dict() for scan in scans.values()]
+
+    def dedupe_models(self, paths: Optional[List[str]] = None, dry_run: bool = True, link: str = "auto",
+                      min_size: Optional[int] = None, workers: Optional[int] = None) -> dict:
+        """Find identical model files across the volumes and link them to one copy (see model_dedupe)."""
+        from .model_dedupe import DEFAULT_MIN_SIZE, DEFAULT_WORKERS, dedupe
+        roots = paths or self.list_ollama_volumes()
+        return dedupe([os.path.expanduser(p) for p in roots], dry_run=dry_run, link=link,
+                      min_size=DEFAULT_MIN_SIZE if min_size is None else min_size,
+                      workers=workers or DEFAULT_WORKERS)
+
     def set_ollama_volume(self, path: str) -> bool:
-        """Set the volume (directory) for Ollama model storage and update config."""
+        """Set the volume (directory) for Ollama model storage and update config.
+
+        Existing models in ~/.ollama/models, or on the volume it already links to, are migrated
+        into path (see model_migration), and ~/.ollama/models becomes (or is repointed as) a
+        symlink to it once every file is verified.
+        """
         try:
             if not os.path.exists(path):
                 os.makedirs(path, exist_ok=True)
             # Optionally, symlink ~/.ollama/models to the new location
             default_path = os.path.expanduser("~/.ollama/models")
-            if os.path.islink(default_path) or os.path.exists(default_path):
+            if os.path.realpath(path) == os.path.realpath(default_path):
+                print(f"[INFO] Ollama models are already stored in {path}.")
+                self.set_model_storage_path(path)
+                return True
+            # When ~/.ollama/models is already a link, the models live on the volume it points to
+            was_link = os.path.islink(default_path)
+            source = os.path.realpath(default_path)
+            migrated = False
+            if os.path.isdir(source):
+                from .model_migration import DEFAULT_WORKERS, migrate
+                workers = getattr(self.config, "model_migration_workers", DEFAULT_WORKERS)
+                try:
+                    report = migrate(source, path, workers)
+                except OSError as e:
+                    # The models stay in place; the checkpoint lets the next attempt resume
+                    print(f"[ERROR] Model migration stopped: {e}. Run set-volume again to resume.")
+                    return False
+                migrated = True
+                print(f"[OK] Migrated {report['files']} files ({report['bytes'] / 1e9:.2f} GB) in {report['seconds']:.1f}s")
+            if was_link:
+                # Repoint the existing link in one step, then drop the link migrate() left in
+                # place of the old volume's directory
+                tmp_link = default_path + ".coder-x-new"
                 try:
-                    if os.path.islink(default_path):
-                        os.unlink(default_path)
-                    else:
-                        import shutil
-                        shutil.move(default_path, path)
+                    if os.path.lexists(tmp_link):
+                        os.unlink(tmp_link)
+                    os.symlink(path, tmp_link)
+                    os.replace(tmp_link, default_path)
+                    if migrated and os.path.islink(source):
+                        os.unlink(source)
                 except Exception as e:
                     print(f"[WARN] Could not move/symlink Ollama models: {e}")
-            try:
-                os.symlink(path, default_path)
-            except Exception as e:
-                print(f"[WARN] Could not create symlink for Ollama models: {e}")
+            elif not migrated:
+                # migrate() already turned ~/.ollama/models into the link
+                try:
+                    os.symlink(path, default_path)
+                except Exception as e:
+                    print(f"[WARN] Could not create symlink for Ollama models: {e}")
             self.set_model_storage_path(path)
             return True
         except Exception as e:
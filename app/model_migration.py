@@ -0,0 +1,400 @@
+"""
+Model storage migration for Coder-X
+- migrate() moves the contents of one model directory (e.g. ~/.ollama/models) into another
+  and only then replaces the source by a symlink to the destination. Until that swap the
+  source is left untouched, so an interrupted migration loses nothing
+- On the same filesystem, into an empty destination, the whole directory is renamed into place
+  in one step. Otherwise files are copied in COPY_SEGMENT_SIZE segments on a thread pool, in
+  the kernel where possible (copy_file_range, then sendfile, then pread/pwrite)
+- Progress is checkpointed per segment in CHECKPOINT_NAME inside the destination; running the
+  migration again resumes from the segments already copied
+- Every copied file is verified against its source with model_dedupe.full_hash before the swap
+  (source hashes already in the dedupe hash cache are reused)
+- Progress events {"phase", "done", "total", "percent", "rate", "eta"} go to the optional
+  on_progress callback and to every registered listener (add_listener), as model pulls do, at
+  most every PROGRESS_INTERVAL seconds
+"""
+import errno
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from .profiling import span
+from .progress_events import EventListeners, human_bytes
+
+CHECKPOINT_NAME = ".coder_x_migration.json"
+PART_SUFFIX = ".coder-x-part"
+COPY_SEGMENT_SIZE = 256 * 1024 * 1024
+COPY_CHUNK_SIZE = 16 * 1024 * 1024
+DEFAULT_WORKERS = 4
+PROGRESS_INTERVAL = 0.5
+# copy_file_range / sendfile errors that mean "not supported here", not "copy failed"
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM, errno.EBADF}
+
+
+_listeners = EventListeners()
+add_listener = _listeners.add
+remove_listener = _listeners.remove
+emit = _listeners.emit
+
+
+class MigrationError(OSError):
+    """The migration stopped; the source is intact and running it again resumes."""
+
+
+def _copy_range(src_fd: int, dst_fd: int, offset: int, length: int):
+    """Copy length bytes at offset between two open files, in the kernel where supported."""
+    done = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while done < length:
+                n = os.copy_file_range(src_fd, dst_fd, min(COPY_CHUNK_SIZE, length - done),
+                                       offset + done, offset + done)
+                if n == 0:
+                    raise MigrationError(f"source ended {length - done} bytes early")
+                done += n
+            return
+        except OSError as e:
+            if isinstance(e, MigrationError) or e.errno not in _UNSUPPORTED:
+                raise
+    if hasattr(os, "sendfile"):
+        try:
+            os.lseek(dst_fd, offset + done, os.SEEK_SET)
+            while done < length:
+                n = os.sendfile(dst_fd, src_fd, offset + done, min(COPY_CHUNK_SIZE, length - done))
+                if n == 0:
+                    raise MigrationError(f"source ended {length - done} bytes early")
+                done += n
+            return
+        except OSError as e:
+            if isinstance(e, MigrationError) or e.errno not in _UNSUPPORTED:
+                raise
+    while done < length:
+        data = os.pread(src_fd, min(COPY_CHUNK_SIZE, length - done), offset + done)
+        if not data:
+            raise MigrationError(f"source ended {length - done} bytes early")
+        os.pwrite(dst_fd, data, offset + done)
+        done += len(data)
+
+
+def scan_tree(root: str) -> Dict[str, list]:
+    """{"dirs": [rel], "files": [(rel, stat)], "links": [(rel, target)]} under root."""
+    tree: Dict[str, list] = {"dirs": [], "files": [], "links": []}
+
+    def walk(path: str, rel: str):
+        with os.scandir(path) as it:
+            for entry in it:
+                name = os.path.join(rel, entry.name) if rel else entry.name
+                if entry.is_symlink():
+                    tree["links"].append((name, os.readlink(entry.path)))
+                elif entry.is_dir():
+                    tree["dirs"].append(name)
+                    walk(entry.path, name)
+                elif name != CHECKPOINT_NAME:
+                    tree["files"].append((name, entry.stat()))
+
+    walk(root, "")
+    return tree
+
+
+class Progress:
+    """Thread-safe byte counter that reports rate and ETA to a callback."""
+
+    def __init__(self, phase: str, total: int, on_progress: Optional[Callable[[dict], None]]):
+        self.phase = phase
+        self.total = total
+        self.done = 0
+        self._counted = 0
+        self._on_progress = on_progress
+        self._start = time.monotonic()
+        self._reported = 0.0
+        self._lock = threading.Lock()
+
+    def skip(self, n: int):
+        """Count bytes that need no work (already copied), without crediting them to the rate."""
+        with self._lock:
+            self.done += n
+
+    def add(self, n: int, final: bool = False):
+        with self._lock:
+            self.done += n
+            self._counted += n
+            now = time.monotonic()
+            if final or now - self._reported >= PROGRESS_INTERVAL:
+                self._reported = now
+                emit(self.event(now), self._on_progress)
+
+    def event(self, now: Optional[float] = None) -> dict:
+        elapsed = (now or time.monotonic()) - self._start
+        rate = self._counted / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.done
+        return {
+            "phase": self.phase,
+            "done": self.done,
+            "total": self.total,
+            "percent": 100.0 * self.done / self.total if self.total else 100.0,
+            "rate": rate,
+            "eta": remaining / rate if rate > 0 else None,
+        }
+
+
+class Checkpoint:
+    """Per-file record of copied segments and verified hashes, saved in the destination."""
+
+    def __init__(self, dst: str, src: str):
+        self.path = os.path.join(dst, CHECKPOINT_NAME)
+        self.src = src
+        self.files: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if data.get("source") == src:
+                self.files = data.get("files", {})
+        except (OSError, ValueError):
+            pass
+
+    def entry(self, rel: str, st: os.stat_result) -> dict:
+        """The record for rel, reset if the source file changed since it was written."""
+        with self._lock:
+            entry = self.files.get(rel)
+            if not entry or (entry["size"], entry["mtime_ns"]) != (st.st_size, st.st_mtime_ns):
+                entry = self.files[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "segments": []}
+            return entry
+
+    def update(self, rel: str, **fields):
+        with self._lock:
+            entry = self.files[rel]
+            for key, value in fields.items():
+                if key == "segment":
+                    entry["segments"].append(value)
+                else:
+                    entry[key] = value
+            self._save()
+
+    def forget(self, rel: str):
+        with self._lock:
+            self.files.pop(rel, None)
+            self._save()
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"source": self.src, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _run_all(pool: ThreadPoolExecutor, fn, items: list):
+    """Run fn over items on pool; on the first failure, cancel what has not started and re-raise."""
+    futures = [pool.submit(fn, item) for item in items]
+    try:
+        for future in futures:
+            future.result()
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+
+
+def _copy_tree(src: str, dst: str, tree: Dict[str, list], workers: int,
+               on_progress: Optional[Callable[[dict], None]]) -> dict:
+    """Copy and verify every file of tree from src to dst; returns {"copied", "resumed"} byte counts."""
+    from .model_dedupe import HashCache, full_hash
+    checkpoint = Checkpoint(dst, src)
+    files = sorted(tree["files"], key=lambda f: -f[1].st_size)
+    progress = Progress("copy", sum(st.st_size for _, st in files), on_progress)
+    tasks = []
+    pending = []
+    resumed = 0
+    for rel, st in files:
+        entry = checkpoint.entry(rel, st)
+        target = os.path.join(dst, rel)
+        if entry.get("hash") and os.path.exists(target) and os.path.getsize(target) == st.st_size:
+            progress.skip(st.st_size)
+            resumed += st.st_size
+            continue
+        pending.append((rel, st))
+        part = target + PART_SUFFIX
+        if not os.path.exists(part):
+            entry["segments"] = []
+        with open(part, "ab") as f:
+            f.truncate(st.st_size)
+        done = set(entry["segments"])
+        for index, offset in enumerate(range(0, st.st_size, COPY_SEGMENT_SIZE)):
+            length = min(COPY_SEGMENT_SIZE, st.st_size - offset)
+            if index in done:
+                progress.skip(length)
+                resumed += length
+            else:
+                tasks.append((rel, index, offset, length))
+
+    def copy_segment(task):
+        rel, index, offset, length = task
+        src_fd = os.open(os.path.join(src, rel), os.O_RDONLY)
+        try:
+            dst_fd = os.open(os.path.join(dst, rel) + PART_SUFFIX, os.O_WRONLY)
+            try:
+                _copy_range(src_fd, dst_fd, offset, length)
+                os.fsync(dst_fd)
+            finally:
+                os.close(dst_fd)
+        finally:
+            os.close(src_fd)
+        checkpoint.update(rel, segment=index)
+        progress.add(length)
+
+    cache = HashCache()
+    verify = Progress("verify", sum(st.st_size for _, st in pending), on_progress)
+    mismatched: List[str] = []
+
+    def verify_file(item):
+        rel, st = item
+        target = os.path.join(dst, rel)
+        part = target + PART_SUFFIX
+        src_path = os.path.join(src, rel)
+        source_hash = cache.get(os.path.realpath(src_path), st, "full") or full_hash(src_path, st.st_size, hash_pool)
+        if full_hash(part, st.st_size, hash_pool) != source_hash:
+            mismatched.append(rel)
+            os.remove(part)
+            checkpoint.forget(rel)
+        else:
+            shutil.copystat(src_path, part)
+            os.replace(part, target)
+            checkpoint.update(rel, hash=source_hash)
+        verify.add(st.st_size)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="coder-x-migrate") as pool, \
+            ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="coder-x-hash") as hash_pool:
+        _run_all(pool, copy_segment, tasks)
+        progress.add(0, final=True)
+        _run_all(pool, verify_file, pending)
+        verify.add(0, final=True)
+    if mismatched:
+        raise MigrationError(f"checksum mismatch for {', '.join(sorted(mismatched))}; run the migration again")
+    checkpoint.remove()
+    return {"copied": progress.total - resumed, "resumed": resumed}
+
+
+def _rename_tree(src: str, dst: str, tree: Dict[str, list], on_progress: Optional[Callable[[dict], None]]):
+    """Rename src onto the empty directory dst and point src at it (same filesystem: no data is copied).
+
+    One rename moves the whole tree, so an interruption never leaves it split across both paths.
+    """
+    progress = Progress("move", sum(st.st_size for _, st in tree["files"]), on_progress)
+    os.rename(src, dst)
+    try:
+        os.symlink(dst, src)
+    except OSError:
+        os.rename(dst, src)
+        raise
+    progress.add(progress.total, final=True)
+
+
+def _holds_tree(dst: str, parked: str, tree: Dict[str, list]) -> bool:
+    """True if dst has its own copy (not the parked file itself) of every file in tree."""
+    for rel, st in tree["files"]:
+        try:
+            copied = os.stat(os.path.join(dst, rel))
+            original = os.stat(os.path.join(parked, rel))
+        except OSError:
+            return False
+        if copied.st_size != st.st_size or os.path.samestat(copied, original):
+            return False
+    return True
+
+
+def _swap(src: str, dst: str, tree: Dict[str, list]):
+    """Park src, point it at dst, then drop the parked copy once dst is known to hold the tree."""
+    parked = src + ".coder-x-old"
+    os.rename(src, parked)
+    try:
+        os.symlink(dst, src)
+        if os.path.realpath(src) != os.path.realpath(dst) or not _holds_tree(dst, parked, tree):
+            raise MigrationError(f"{dst} does not hold a copy of every model file; {src} was left in place")
+    except OSError:
+        if os.path.islink(src):
+            os.unlink(src)
+        os.rename(parked, src)
+        raise
+    shutil.rmtree(parked, ignore_errors=True)
+
+
+def _same_filesystem(src: str, dst: str) -> bool:
+    return os.stat(src).st_dev == os.stat(dst).st_dev
+
+
+def migrate(src: str, dst: str, workers: int = DEFAULT_WORKERS,
+            on_progress: Optional[Callable[[dict], None]] = None) -> dict:
+    """Move the contents of directory src into dst and leave src as a symlink to dst.
+
+    Raises MigrationError (or OSError) if a step fails; src keeps its files until every copy
+    is verified, and calling migrate again resumes from the checkpoint.
+    """
+    src, dst = os.path.abspath(src), os.path.abspath(dst)
+    real_src, real_dst = os.path.realpath(src), os.path.realpath(dst)
+    if real_dst == real_src:
+        raise MigrationError(f"{dst} is the source directory")
+    if real_dst.startswith(real_src + os.sep) or real_src.startswith(real_dst + os.sep):
+        raise MigrationError(f"{dst} and {src} are nested in one another")
+    os.makedirs(dst, exist_ok=True)
+    start = time.monotonic()
+    with span("model.migrate", src=src, dst=dst):
+        tree = scan_tree(src)
+        same_device = _same_filesystem(src, dst)
+        if same_device and not os.listdir(dst):
+            _rename_tree(src, dst, tree, on_progress)
+            result = {"copied": 0, "resumed": 0}
+        else:
+            # Across filesystems, or into a directory that already has contents: copy, then swap
+            for rel in tree["dirs"]:
+                os.makedirs(os.path.join(dst, rel), exist_ok=True)
+            result = _copy_tree(src, dst, tree, workers, on_progress)
+            for rel, target in tree["links"]:
+                link = os.path.join(dst, rel)
+                if not os.path.lexists(link):
+                    os.symlink(target, link)
+            _swap(src, dst, tree)
+    seconds = time.monotonic() - start
+    total = sum(st.st_size for _, st in tree["files"])
+    return {
+        "files": len(tree["files"]),
+        "bytes": total,
+        "copied_bytes": result["copied"],
+        "resumed_bytes": result["resumed"],
+        "same_filesystem": same_device,
+        "seconds": seconds,
+        "rate": result["copied"] / seconds if seconds > 0 else 0.0,
+    }
+
+
+def format_progress(event: dict) -> str:
+    line = f"{event['phase']:<6} {human_bytes(event['done'])}/{human_bytes(event['total'])} {event['percent']:5.1f}%"
+    if event["rate"]:
+        line += f"  {human_bytes(event['rate'])}/s"
+    if event["eta"] is not None:
+        minutes, seconds = divmod(int(event["eta"]), 60)
+        line += f"  ETA {minutes}:{seconds:02d}"
+    return line
+
+
+class ProgressPrinter:
+    """on_progress callback writing format_progress lines (rewritten in place on a terminal)."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.tty = bool(getattr(stream, "isatty", lambda: False)())
+
+    def __call__(self, event: dict):
+        end = "\r" if self.tty and event["done"] < event["total"] else "\n"
+        self.stream.write(f"\x1b[K{format_progress(event)}{end}" if self.tty else format_progress(event) + end)
+        self.stream.flush()
@@ -0,0 +1,161 @@
+"""
+Model warm pool for Coder-X
+- Keeps recently used models resident in the local runtime (Ollama keep_alive) so switching to
+  one does not pay a cold load on its first request
+- The runtime is the source of truth for which models are resident and how much memory each
+  uses; the pool adds recency. Last-use times persist in a state file (CODER_X_MODEL_POOL,
+  default ~/.coder_x_model_pool.json), so LRU order survives between CLI invocations and is
+  shared with the daemon; pool changes are serialized across processes with file_lock
+- acquire(name) unloads least-recently-used models until name fits in the memory budget, then
+  loads it (or refreshes its keep-alive if it is already resident). Models resident in the
+  runtime but never used through the pool count as least recent
+- A runtime is any object with load(name), unload(name), running() -> {name: resident bytes}
+  and estimate(name) -> bytes; OllamaRuntime adapts the Ollama API client
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from .file_lock import file_lock
+from .profiling import span
+
+DEFAULT_KEEP_ALIVE = "30m"
+# Without a configured budget, use half of physical memory
+DEFAULT_BUDGET_FRACTION = 0.5
+FALLBACK_BUDGET = 8 * 1024 ** 3
+
+
+def state_path() -> str:
+    return os.path.expanduser(os.environ.get("CODER_X_MODEL_POOL") or "~/.coder_x_model_pool.json")
+
+
+def default_budget() -> int:
+    try:
+        return int(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") * DEFAULT_BUDGET_FRACTION)
+    except (AttributeError, ValueError, OSError):
+        return FALLBACK_BUDGET
+
+
+def canonical_name(name: str) -> str:
+    """Ollama's name for a model: the tag defaults to latest (a registry host may carry a port)."""
+    return name if ":" in name.rsplit("/", 1)[-1] else name + ":latest"
+
+
+class OllamaRuntime:
+    """Runtime backed by the Ollama API: loads keep models resident for keep_alive."""
+
+    def __init__(self, client=None, keep_alive=DEFAULT_KEEP_ALIVE):
+        from .ollama_client import get_client
+        self.client = client or get_client()
+        self.keep_alive = keep_alive
+
+    def load(self, name: str):
+        self.client.load(name, self.keep_alive)
+
+    def unload(self, name: str):
+        self.client.unload(name)
+
+    def running(self) -> Dict[str, int]:
+        return {canonical_name(m["name"]): m["size"] for m in self.client.running()}
+
+    def estimate(self, name: str) -> int:
+        """Size of the model's weights, a lower bound on its resident memory; 0 if unknown."""
+        for m in self.client.list_models():
+            if canonical_name(m["name"] or "") == name:
+                return m.get("size") or 0
+        return 0
+
+
+class ModelPool:
+    def __init__(self, runtime, budget_bytes: Optional[int] = None, path: Optional[str] = None):
+        self.runtime = runtime
+        self.budget_bytes = budget_bytes or default_budget()
+        self.path = path or state_path()
+        self._lock = threading.Lock()
+
+    def _load_state(self) -> Dict[str, float]:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f).get("last_used", {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, last_used: Dict[str, float]):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"last_used": last_used}, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # Recency is only a hint; without it every model counts as equally old
+            pass
+
+    def _evict(self, running: Dict[str, int], last_used: Dict[str, float], need: int, keep: str) -> List[str]:
+        used = sum(running.values())
+        evicted = []
+        for name in sorted((n for n in running if n != keep), key=lambda n: last_used.get(n, 0.0)):
+            if used + need <= self.budget_bytes:
+                break
+            self.runtime.unload(name)
+            used -= running.pop(name)
+            last_used.pop(name, None)
+            evicted.append(name)
+        return evicted
+
+    def acquire(self, name: str) -> dict:
+        """Make name resident, evicting least-recently-used models to stay within the budget.
+
+        Returns {"model", "cold", "evicted", "load_ms", "resident_bytes", "used_bytes",
+        "budget_bytes"}. A model larger than the whole budget is still loaded, alone.
+        Runtime errors (e.g. ollama_client.OllamaUnavailable) propagate.
+        """
+        name = canonical_name(name)
+        with self._lock, file_lock(self.path + ".lock"), span("model.pool.acquire", model=name):
+            last_used = self._load_state()
+            running = self.runtime.running()
+            cold = name not in running
+            evicted = self._evict(running, last_used, self.runtime.estimate(name), name) if cold else []
+            start = time.perf_counter()
+            # Also refreshes the keep-alive of a resident model
+            self.runtime.load(name)
+            load_ms = (time.perf_counter() - start) * 1000
+            running = self.runtime.running()
+            last_used[name] = time.time()
+            # The estimate is a lower bound: settle the budget with what the runtime reports
+            evicted += self._evict(running, last_used, 0, name)
+            self._save_state(last_used)
+        return {
+            "model": name,
+            "cold": cold,
+            "evicted": evicted,
+            "load_ms": load_ms,
+            "resident_bytes": running.get(name, 0),
+            "used_bytes": sum(running.values()),
+            "budget_bytes": self.budget_bytes,
+        }
+
+    def preload(self, names: Iterable[str]) -> List[dict]:
+        """Acquire each of names in turn (so the last is the most recently used)."""
+        return [self.acquire(name) for name in names]
+
+    def evict(self, name: str) -> bool:
+        """Unload name if it is resident."""
+        name = canonical_name(name)
+        with self._lock, file_lock(self.path + ".lock"):
+            if name not in self.runtime.running():
+                return False
+            self.runtime.unload(name)
+            last_used = self._load_state()
+            last_used.pop(name, None)
+            self._save_state(last_used)
+        return True
+
+    def status(self) -> dict:
+        """Resident models, most recently used first, with memory use against the budget."""
+        running = self.runtime.running()
+        last_used = self._load_state()
+        models = [{"model": n, "resident_bytes": size, "last_used": last_used.get(n)}
+                  for n, size in sorted(running.items(), key=lambda item: -last_used.get(item[0], 0.0))]
+        return {"budget_bytes": self.budget_bytes, "used_bytes": sum(running.values()), "models": models}
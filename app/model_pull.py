@@ -0,0 +1,222 @@
+"""
+Model pulls with progress for Coder-X
+- pull_model() streams an Ollama pull and turns the server's per-layer events into progress
+  events for the whole model: {"model", "status", "completed", "total", "percent", "rate",
+  "resumed", "done", "error"}
+- Resumable: Ollama keeps partially downloaded layers, so when a pull drops mid-download it is
+  retried (with backoff) and carries on from those layers; a layer whose first event shows it
+  part way through is flagged "resumed"
+- Events go to the optional on_event callback and to every registered listener (add_listener),
+  the same way profiling spans reach their listeners
+- PullQueue runs several pulls at once on a bounded thread pool
+- ProgressRenderer draws live progress lines (redrawn in place on a terminal)
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from .profiling import span
+from .progress_events import EventListeners, human_bytes
+
+PULL_RETRIES = 3
+PULL_BACKOFF = 1.0
+DEFAULT_CONCURRENT_PULLS = 2
+
+_listeners = EventListeners()
+add_listener = _listeners.add
+remove_listener = _listeners.remove
+emit = _listeners.emit
+
+
+class PullProgress:
+    """Aggregates one model's per-layer pull events into whole-model progress."""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.layers: Dict[str, list] = {}
+        self._seen: set = set()
+        self.status = "queued"
+        self.done = False
+        self.resumed = False
+        self._start = time.monotonic()
+        self._start_completed: Optional[int] = None
+
+    @property
+    def downloading(self) -> bool:
+        return bool(self.layers)
+
+    def new_attempt(self):
+        self._seen = set()
+
+    def event(self, status: Optional[str] = None, error: Optional[str] = None) -> dict:
+        total = sum(t for t, _ in self.layers.values())
+        completed = sum(c for _, c in self.layers.values())
+        elapsed = time.monotonic() - self._start
+        rate = (completed - (self._start_completed or 0)) / elapsed if elapsed > 0 and self.layers else 0.0
+        return {
+            "model": self.model,
+            "status": status or self.status,
+            "completed": completed,
+            "total": total,
+            "percent": 100.0 * completed / total if total else (100.0 if self.done else 0.0),
+            "rate": rate,
+            "resumed": self.resumed,
+            "done": self.done,
+            "error": error,
+        }
+
+    def update(self, raw: dict) -> dict:
+        self.status = raw.get("status", self.status)
+        digest = raw.get("digest")
+        if digest and raw.get("total"):
+            completed = raw.get("completed", 0)
+            if digest not in self._seen:
+                self._seen.add(digest)
+                # A layer that starts part way through was resumed from an earlier download
+                # (one that starts complete was already on disk)
+                self.resumed = self.resumed or 0 < completed < raw["total"]
+            previous = self.layers.get(digest, [0, 0])[1]
+            # Never let progress run backwards when a retried pull re-reports a layer
+            self.layers[digest] = [raw["total"], max(previous, completed)]
+            if self._start_completed is None:
+                self._start_completed = sum(c for _, c in self.layers.values())
+        if self.status == "success":
+            self.done = True
+        return self.event()
+
+
+def pull_model(name: str, on_event: Optional[Callable[[dict], None]] = None, client=None,
+               retries: int = PULL_RETRIES, backoff: float = PULL_BACKOFF) -> bool:
+    """Pull name through the Ollama API, reporting progress; returns True on success.
+
+    Raises OllamaUnavailable if the server cannot be reached at all (so the caller can fall back
+    to the CLI). A pull that fails after layers started downloading is retried up to `retries`
+    times; errors before that (e.g. an unknown model) are reported at once.
+    """
+    from .ollama_client import OllamaError, OllamaUnavailable, get_client
+    client = client or get_client()
+    progress = PullProgress(name)
+    attempt = 0
+    with span("model.pull", model=name):
+        while True:
+            progress.new_attempt()
+            try:
+                for raw in client.pull_stream(name):
+                    emit(progress.update(raw), on_event)
+                if not progress.done:
+                    raise OllamaUnavailable("pull stream ended before success")
+                return True
+            except (OllamaUnavailable, OllamaError) as e:
+                if isinstance(e, OllamaUnavailable) and attempt == 0 and not progress.downloading:
+                    raise
+                permanent = isinstance(e, OllamaError) and (e.status is not None or not progress.downloading)
+                attempt += 1
+                if permanent or attempt > retries:
+                    emit(progress.event("failed", error=str(e)), on_event)
+                    return False
+                emit(progress.event(f"retrying ({attempt}/{retries})", error=str(e)), on_event)
+                time.sleep(backoff * 2 ** (attempt - 1))
+
+
+class PullQueue:
+    """Bounded pool of concurrent pulls; submitting a model already queued returns its future."""
+
+    def __init__(self, pull: Callable[[str], bool], max_concurrent: int = DEFAULT_CONCURRENT_PULLS):
+        self._pull = pull
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_concurrent), thread_name_prefix="coder-x-pull")
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name: str) -> Future:
+        with self._lock:
+            future = self._futures.get(name)
+            if future is None:
+                emit({"model": name, "status": "queued", "completed": 0, "total": 0, "percent": 0.0,
+                      "rate": 0.0, "resumed": False, "done": False, "error": None})
+                future = self._futures[name] = self._pool.submit(self._run, name)
+            return future
+
+    def _run(self, name: str) -> bool:
+        try:
+            return bool(self._pull(name))
+        except Exception as e:
+            emit({"model": name, "status": "failed", "completed": 0, "total": 0, "percent": 0.0,
+                  "rate": 0.0, "resumed": False, "done": False, "error": str(e)})
+            return False
+
+    def wait(self) -> Dict[str, bool]:
+        """Block until every submitted pull finishes; returns {model: succeeded}."""
+        with self._lock:
+            futures = dict(self._futures)
+        return {name: future.result() for name, future in futures.items()}
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def format_event(event: dict) -> str:
+    line = f"{event['model']:<24} {event['status'][:28]:<28}"
+    if event.get("total"):
+        line += f" {event['percent']:5.1f}%  {human_bytes(event['completed'])}/{human_bytes(event['total'])}"
+        if event.get("rate") and not event.get("done"):
+            line += f"  {human_bytes(event['rate'])}/s"
+    if event.get("resumed"):
+        line += "  (resumed)"
+    if event.get("error"):
+        line += f"  [{event['error']}]"
+    return line
+
+
+class ProgressRenderer:
+    """Pull-event listener that draws one progress line per model.
+
+    On a terminal the lines are redrawn in place (at most `interval` seconds apart unless a pull
+    finishes); otherwise a line is written when a model's status changes or passes another 10%.
+    """
+
+    def __init__(self, stream, interval: float = 0.1):
+        self.stream = stream
+        self.interval = interval
+        self.tty = bool(getattr(stream, "isatty", lambda: False)())
+        self._lines: Dict[str, str] = {}
+        self._last: Dict[str, tuple] = {}
+        self._drawn = 0
+        self._drawn_at = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, event: dict):
+        with self._lock:
+            self._lines[event["model"]] = format_event(event)
+            if self.tty:
+                final = event.get("done") or event.get("error")
+                if final or time.monotonic() - self._drawn_at >= self.interval:
+                    self._redraw()
+                return
+            key = (event["status"], int(event["percent"] // 10), event.get("error"))
+            if self._last.get(event["model"]) != key:
+                self._last[event["model"]] = key
+                self.stream.write(self._lines[event["model"]] + "\n")
+                self.stream.flush()
+
+    def _redraw(self):
+        if self._drawn:
+            # Move back to the first progress line and overwrite the block
+            self.stream.write(f"\x1b[{self._drawn}F")
+        for line in self._lines.values():
+            self.stream.write(f"\x1b[K{line}\n")
+        self.stream.flush()
+        self._drawn = len(self._lines)
+        self._drawn_at = time.monotonic()
+
+    def finish(self):
+        with self._lock:
+            if self.tty and self._lines:
+                self._redraw()
@@ -0,0 +1,180 @@
+"""
+Sidecar byte-offset index for newline-delimited files (JSONL history, logs)
+- Stores the start offset of every line as a packed array of little-endian uint64
+- Memory-maps the index so record k is found without reading the data file
+- Catches up incrementally as the data file grows and rebuilds itself if the
+  data file was truncated, replaced or rewritten
+"""
+import os
+import sys
+import mmap
+import struct
+import zlib
+from array import array
+from typing import List, Optional, Tuple
+
+from .file_lock import lock_fd
+
+INDEX_MAGIC = b"CXOIDX1\0"
+# magic, indexed data bytes, data file inode, crc32 of the bytes just before the indexed end
+INDEX_HEADER = struct.Struct("<8sQQQ")
+OFFSET = struct.Struct("<Q")
+FINGERPRINT_BYTES = 64
+SCAN_CHUNK_SIZE = 1024 * 1024
+
+
+class OffsetIndex:
+    def __init__(self, data_path: str, index_path: Optional[str] = None, skip_blank: bool = False):
+        self.data_path = data_path
+        self.index_path = index_path or data_path + ".idx"
+        # When set, whitespace-only lines are not counted as records
+        self.skip_blank = skip_blank
+        self._mm: Optional[mmap.mmap] = None
+        self._count = 0
+        self._covered = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def covered(self) -> int:
+        """Bytes of the data file covered by the index: up to the end of its last complete line."""
+        return self._covered
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def _fingerprint(self, f, end: int) -> int:
+        start = max(0, end - FINGERPRINT_BYTES)
+        f.seek(start)
+        return zlib.crc32(f.read(end - start))
+
+    def _read_header(self, idx) -> Optional[Tuple[int, int, int]]:
+        idx.seek(0)
+        raw = idx.read(INDEX_HEADER.size)
+        if len(raw) < INDEX_HEADER.size:
+            return None
+        magic, covered, ino, crc = INDEX_HEADER.unpack(raw)
+        if magic != INDEX_MAGIC:
+            return None
+        return covered, ino, crc
+
+    def _is_current(self, idx, data, st) -> bool:
+        header = self._read_header(idx)
+        if header is None:
+            return False
+        covered, ino, crc = header
+        if ino != st.st_ino or covered > st.st_size:
+            return False
+        if (os.fstat(idx.fileno()).st_size - INDEX_HEADER.size) % OFFSET.size:
+            return False
+        return self._fingerprint(data, covered) == crc
+
+    def _scan(self, idx, data, covered: int, end: int):
+        """Append offsets for every complete line in data[covered:end]."""
+        idx.seek(0, os.SEEK_END)
+        data.seek(covered)
+        pos = covered
+        partial = b""
+        while pos + len(partial) < end:
+            chunk = data.read(min(SCAN_CHUNK_SIZE, end - pos - len(partial)))
+            if not chunk:
+                break
+            lines = (partial + chunk).split(b"\n")
+            partial = lines.pop()
+            offsets = array("Q")
+            for line in lines:
+                if not self.skip_blank or line.strip():
+                    offsets.append(pos)
+                pos += len(line) + 1
+            if offsets:
+                if sys.byteorder != "little":
+                    offsets.byteswap()
+                idx.write(offsets.tobytes())
+        return pos
+
+    def refresh(self) -> int:
+        """Bring the index up to date with the data file and return the record count."""
+        self.close()
+        if not os.path.exists(self.data_path):
+            self._count = self._covered = 0
+            return 0
+        fd = os.open(self.index_path, os.O_RDWR | os.O_CREAT, 0o644)
+        with os.fdopen(fd, "r+b") as idx, open(self.data_path, "rb") as data:
+            lock_fd(idx.fileno())
+            st = os.fstat(data.fileno())
+            if self._is_current(idx, data, st):
+                covered = self._read_header(idx)[0]
+            else:
+                idx.seek(0)
+                idx.truncate()
+                idx.write(INDEX_HEADER.pack(INDEX_MAGIC, 0, st.st_ino, 0))
+                covered = 0
+            if covered < st.st_size:
+                covered = self._scan(idx, data, covered, st.st_size)
+                idx.seek(0)
+                idx.write(INDEX_HEADER.pack(INDEX_MAGIC, covered, st.st_ino, self._fingerprint(data, covered)))
+            idx.flush()
+            size = os.fstat(idx.fileno()).st_size
+            self._count = (size - INDEX_HEADER.size) // OFFSET.size
+            self._covered = covered
+            if self._count:
+                self._mm = mmap.mmap(idx.fileno(), size, access=mmap.ACCESS_READ)
+        return self._count
+
+    def rebuild(self) -> int:
+        """Discard the index and rebuild it from scratch."""
+        self.invalidate()
+        return self.refresh()
+
+    def invalidate(self):
+        """Remove the on-disk index, e.g. after the data file was rewritten."""
+        self.close()
+        self._count = self._covered = 0
+        try:
+            os.remove(self.index_path)
+        except FileNotFoundError:
+            pass
+
+    def _offset(self, k: int) -> int:
+        return OFFSET.unpack_from(self._mm, INDEX_HEADER.size + k * OFFSET.size)[0]
+
+    def span(self, start: int, stop: int) -> Tuple[int, int]:
+        """Return the (begin, end) byte range covering records start..stop-1."""
+        begin = self._offset(start)
+        end = self._offset(stop) if stop < self._count else self._covered
+        return begin, end
+
+    def _normalize(self, start: int, stop: Optional[int]) -> Tuple[int, int]:
+        count = self._count
+        if stop is None:
+            stop = count
+        if start < 0:
+            start += count
+        if stop < 0:
+            stop += count
+        return max(0, min(start, count)), max(0, min(stop, count))
+
+    def read(self, k: int) -> bytes:
+        """Return the raw bytes of record k (negative k counts from the end)."""
+        if k < 0:
+            k += self._count
+        if not 0 <= k < self._count:
+            raise IndexError(f"Record {k} out of range (0..{self._count - 1})")
+        return self.read_range(k, k + 1)[0]
+
+    def read_range(self, start: int, stop: Optional[int] = None) -> List[bytes]:
+        """Return the raw bytes of records start..stop-1 with a single seek and read."""
+        start, stop = self._normalize(start, stop)
+        if start >= stop:
+            return []
+        begin, end = self.span(start, stop)
+        with open(self.data_path, "rb") as data:
+            data.seek(begin)
+            blob = data.read(end - begin)
+        lines = blob.split(b"\n")
+        if self.skip_blank:
+            lines = [line for line in lines if line.strip()]
+        return lines[:stop - start]
@@ -0,0 +1,228 @@
+"""
+Ollama REST API client for Coder-X
+- Talks to the Ollama server (OLLAMA_HOST, default 127.0.0.1:11434) over one pooled keep-alive
+  requests.Session, so repeated calls reuse a connection instead of spawning `ollama` processes
+- Model listings (/api/tags) are cached for LIST_TTL seconds and invalidated by pull/delete
+- Raises OllamaUnavailable when the server cannot be reached; callers fall back to the CLI.
+  An unreachable server is remembered for UNAVAILABLE_TTL seconds so fallbacks stay fast
+- pull_stream() yields the server's NDJSON progress events as they arrive
+- load()/unload() keep a model resident in server memory (keep_alive) or release it; running()
+  lists resident models (/api/ps) with their memory use
+- get_client() shares one client per host within the process (and so across daemon commands)
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from .profiling import span
+
+DEFAULT_HOST = "http://127.0.0.1:11434"
+LIST_TTL = 5.0
+UNAVAILABLE_TTL = 2.0
+CONNECT_TIMEOUT = 0.5
+READ_TIMEOUT = 30.0
+# Longest silence tolerated between progress events of a streaming pull
+STREAM_READ_TIMEOUT = 120.0
+# Loading a large model into memory can take minutes on a slow volume
+LOAD_TIMEOUT = 600.0
+
+
+class OllamaUnavailable(Exception):
+    """The Ollama API could not be reached."""
+
+
+class OllamaError(RuntimeError):
+    """The Ollama API answered with an error."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+def ollama_host(value: Optional[str] = None) -> str:
+    """Base URL for OLLAMA_HOST, which (like the ollama CLI) may omit the scheme and port."""
+    value = (value if value is not None else os.environ.get("OLLAMA_HOST", "")).strip().rstrip("/")
+    if not value:
+        return DEFAULT_HOST
+    if "://" not in value:
+        value = "http://" + value
+    scheme, rest = value.split("://", 1)
+    host, _, path = rest.partition("/")
+    if host.startswith("0.0.0.0"):
+        # A server bound to every interface is reached through loopback
+        host = "127.0.0.1" + host[len("0.0.0.0"):]
+    if ":" not in host.rsplit("]", 1)[-1]:
+        host += ":443" if scheme == "https" else ":11434"
+    return f"{scheme}://{host}" + (f"/{path}" if path else "")
+
+
+def model_info(data: dict) -> dict:
+    """Structured model record from an /api/tags entry."""
+    details = data.get("details") or {}
+    return {
+        "name": data.get("name") or data.get("model"),
+        "size": data.get("size"),
+        "digest": data.get("digest"),
+        "modified": data.get("modified_at"),
+        "format": details.get("format"),
+        "family": details.get("family"),
+        "parameter_size": details.get("parameter_size"),
+        "quantization": details.get("quantization_level"),
+    }
+
+
+def _model_field(name: str) -> dict:
+    # Current servers read "model"; releases before it was renamed only read "name"
+    return {"model": name, "name": name}
+
+
+class OllamaClient:
+    def __init__(self, host: Optional[str] = None, list_ttl: float = LIST_TTL):
+        self.host = ollama_host(host)
+        self.list_ttl = list_ttl
+        self._session = None
+        self._lock = threading.Lock()
+        self._models: Optional[List[dict]] = None
+        self._models_at = 0.0
+        self._unavailable_until = 0.0
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            # Local server: keep a few connections alive, never retry behind the caller's back
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0))
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0))
+            self._session = session
+        return self._session
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _request(self, method: str, path: str, read_timeout: Optional[float] = READ_TIMEOUT, **kwargs):
+        import requests
+        if time.monotonic() < self._unavailable_until:
+            raise OllamaUnavailable(f"Ollama API at {self.host} is not reachable")
+        try:
+            resp = self.session.request(method, self.host + path, timeout=(CONNECT_TIMEOUT, read_timeout), **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            self._unavailable_until = time.monotonic() + UNAVAILABLE_TTL
+            raise OllamaUnavailable(f"Ollama API at {self.host} is not reachable: {e}") from e
+        if resp.status_code >= 400:
+            try:
+                message = resp.json().get("error") or resp.text
+            except ValueError:
+                message = resp.text
+            raise OllamaError(f"Ollama API {method} {path} failed ({resp.status_code}): {message}", resp.status_code)
+        return resp
+
+    def invalidate(self):
+        with self._lock:
+            self._models = None
+
+    def list_models(self, refresh: bool = False) -> List[dict]:
+        """Models known to the server (see model_info), cached for list_ttl seconds."""
+        with self._lock:
+            if not refresh and self._models is not None and time.monotonic() - self._models_at < self.list_ttl:
+                return list(self._models)
+        with span("ollama.tags", host=self.host):
+            data = self._request("GET", "/api/tags").json()
+        models = [model_info(m) for m in data.get("models", [])]
+        with self._lock:
+            self._models, self._models_at = models, time.monotonic()
+        return list(models)
+
+    def pull(self, name: str) -> bool:
+        """Download a model; blocks until the server reports success."""
+        try:
+            with span("ollama.pull", model=name):
+                data = self._request("POST", "/api/pull", read_timeout=None,
+                                     json=dict(_model_field(name), stream=False)).json()
+        finally:
+            self.invalidate()
+        return data.get("status") == "success"
+
+    def pull_stream(self, name: str) -> Iterator[dict]:
+        """Start a pull and yield its progress events ({"status", "digest", "total", "completed"}).
+
+        Raises OllamaUnavailable if the connection fails or drops mid-stream, and OllamaError for an
+        error status or an {"error": ...} event; the server keeps partially downloaded layers, so
+        pulling again resumes them.
+        """
+        import requests
+        try:
+            resp = self._request("POST", "/api/pull", read_timeout=STREAM_READ_TIMEOUT,
+                                 json=dict(_model_field(name), stream=True), stream=True)
+            with resp:
+                try:
+                    for line in resp.iter_lines():
+                        if not line:
+                            continue
+                        event = json.loads(line)
+                        if "error" in event:
+                            raise OllamaError(event["error"])
+                        yield event
+                except (requests.ConnectionError, requests.Timeout,
+                        requests.exceptions.ChunkedEncodingError) as e:
+                    raise OllamaUnavailable(f"Lost connection to the Ollama API at {self.host}: {e}") from e
+        finally:
+            self.invalidate()
+
+    def delete(self, name: str) -> bool:
+        try:
+            with span("ollama.delete", model=name):
+                self._request("DELETE", "/api/delete", json=_model_field(name))
+        finally:
+            self.invalidate()
+        return True
+
+    def load(self, name: str, keep_alive="30m"):
+        """Load name into server memory and keep it resident for keep_alive (a duration or seconds)."""
+        with span("ollama.load", model=name):
+            self._request("POST", "/api/generate", read_timeout=LOAD_TIMEOUT,
+                          json={"model": name, "keep_alive": keep_alive, "stream": False})
+
+    def unload(self, name: str):
+        """Release name from server memory (keep_alive 0)."""
+        with span("ollama.unload", model=name):
+            self._request("POST", "/api/generate", json={"model": name, "keep_alive": 0, "stream": False})
+
+    def running(self) -> List[dict]:
+        """Models resident in server memory: [{"name", "size", "size_vram", "expires_at"}]."""
+        data = self._request("GET", "/api/ps").json()
+        return [{
+            "name": m.get("name") or m.get("model"),
+            "size": m.get("size") or 0,
+            "size_vram": m.get("size_vram") or 0,
+            "expires_at": m.get("expires_at"),
+        } for m in data.get("models", [])]
+
+    def version(self) -> Optional[str]:
+        return self._request("GET", "/api/version").json().get("version")
+
+
+_clients: Dict[str, OllamaClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(host: Optional[str] = None) -> OllamaClient:
+    """Shared client for host (default OLLAMA_HOST), so its connection pool and cache are reused."""
+    url = ollama_host(host)
+    with _clients_lock:
+        client = _clients.get(url)
+        if client is None:
+            client = _clients[url] = OllamaClient(url)
+        return client
+
+
+def reset_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,250 @@
+"""
+Timing spans and profiling for Coder-X
+- `with span("config.load", path=p): ...` records a timed, nested span while profiling is on
+- Disabled by default: span() then returns a shared no-op context manager, so instrumented
+  code pays one global lookup and a call per span
+- Enabled by `coder-x --profile ...` or CODER_X_PROFILE=1; the span tree is printed to stderr
+  when the command finishes
+- `--profile-output PATH` (or CODER_X_PROFILE=PATH) also writes a Chrome trace (*.json, open
+  in chrome://tracing or Perfetto) or cProfile stats (*.prof / *.pstats, read with pstats)
+- Listeners can consume finished spans while profiling is on. With profiling off, a duration
+  sink (set_duration_sink, used by latency_stats) gets (name, ns) from a perf_counter pair per
+  span instead, so recording stats allocates no Span and keeps no tree
+"""
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, List, Optional
+
+_enabled = False
+_keep_tree = False
+_local = threading.local()
+_lock = threading.Lock()
+_roots: List["Span"] = []
+_listeners: List[Callable[["Span"], None]] = []
+_duration_sink: Optional[Callable[[str, int], None]] = None
+_profiler = None
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start_ns", "end_ns", "thread_id", "children")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self.start_ns = 0
+        self.end_ns = 0
+        self.thread_id = threading.get_ident()
+        self.children: List["Span"] = []
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def __enter__(self):
+        if not _keep_tree:
+            self.start_ns = time.perf_counter_ns()
+            return self
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        if stack:
+            stack[-1].children.append(self)
+        else:
+            with _lock:
+                _roots.append(self)
+        stack.append(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        stack = getattr(_local, "stack", None)
+        if stack and stack[-1] is self:
+            stack.pop()
+        for listener in _listeners:
+            listener(self)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Timer:
+    """Stand-in for Span while only a duration sink is set: one perf_counter pair, no tree."""
+    __slots__ = ("name", "sink", "start_ns")
+
+    def __init__(self, name: str, sink: Callable[[str, int], None]):
+        self.name = name
+        self.sink = sink
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.sink(self.name, time.perf_counter_ns() - self.start_ns)
+        return False
+
+
+def span(name: str, **attrs):
+    """Time the enclosed block as a span (a no-op unless profiling or a duration sink is on)."""
+    if not _enabled:
+        return _NULL_SPAN if _duration_sink is None else _Timer(name, _duration_sink)
+    return Span(name, attrs)
+
+
+def timed(name: str):
+    """Decorator form of span() for whole functions."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                if _duration_sink is None:
+                    return func(*args, **kwargs)
+                with _Timer(name, _duration_sink):
+                    return func(*args, **kwargs)
+            with Span(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def add_listener(listener: Callable[[Span], None]):
+    """Call listener(span) whenever a span finishes (only while profiling is enabled)."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def set_duration_sink(sink: Optional[Callable[[str, int], None]]):
+    """Call sink(name, duration_ns) for every span that finishes while profiling is off."""
+    global _duration_sink
+    _duration_sink = sink
+
+
+def enable(cprofile: bool = False, keep_tree: bool = True):
+    """Start timing spans; keep_tree=False only feeds listeners and records no span tree."""
+    global _enabled, _keep_tree, _profiler
+    _keep_tree = keep_tree or (_enabled and _keep_tree)
+    _enabled = True
+    if cprofile and _profiler is None:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+def disable():
+    global _enabled, _profiler
+    _enabled = False
+    if _profiler is not None:
+        _profiler.disable()
+
+
+def reset():
+    """Disable profiling, drop the duration sink and forget every recorded span."""
+    global _profiler, _keep_tree, _duration_sink
+    disable()
+    _keep_tree = False
+    _profiler = None
+    _duration_sink = None
+    _local.__dict__.clear()
+    with _lock:
+        _roots.clear()
+
+
+def roots() -> List[Span]:
+    with _lock:
+        return list(_roots)
+
+
+def format_tree(spans: Optional[List[Span]] = None, min_ms: float = 0.0) -> str:
+    """Render spans as an indented tree with durations and share of the parent's time."""
+    spans = roots() if spans is None else spans
+    lines = []
+
+    def walk(s: Span, depth: int, parent_ms: Optional[float]):
+        share = f" {100 * s.duration_ms / parent_ms:5.1f}%" if parent_ms else ""
+        attrs = " ".join(f"{k}={v}" for k, v in s.attrs.items())
+        lines.append(f"{s.duration_ms:10.3f} ms{share}  {'  ' * depth}{s.name}{'  ' + attrs if attrs else ''}")
+        for child in s.children:
+            if child.duration_ms >= min_ms:
+                walk(child, depth + 1, s.duration_ms or None)
+
+    for s in spans:
+        walk(s, 0, None)
+    return "\n".join(lines)
+
+
+def chrome_trace(spans: Optional[List[Span]] = None) -> dict:
+    """Spans as Chrome trace-event JSON ("X" complete events, microsecond timestamps)."""
+    spans = roots() if spans is None else spans
+    pid = os.getpid()
+    events = []
+
+    def walk(s: Span):
+        events.append({
+            "name": s.name,
+            "ph": "X",
+            "ts": s.start_ns / 1000,
+            "dur": (s.end_ns - s.start_ns) / 1000,
+            "pid": pid,
+            "tid": s.thread_id,
+            "args": {k: str(v) for k, v in s.attrs.items()},
+        })
+        for child in s.children:
+            walk(child)
+
+    for s in spans:
+        walk(s)
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_report(output: Optional[str] = None, stream=None):
+    """Print the span tree and write the optional trace/pstats file."""
+    stream = stream or sys.stderr
+    disable()
+    stream.write("[PROFILE] span tree (ms, % of parent):\n" + (format_tree() or "  (no spans recorded)") + "\n")
+    if not output:
+        return
+    if output.endswith((".prof", ".pstats")):
+        if _profiler is None:
+            stream.write("[ERROR] cProfile was not enabled; no stats written.\n")
+            return
+        _profiler.dump_stats(output)
+    else:
+        with open(output, "w") as f:
+            json.dump(chrome_trace(), f)
+    stream.write(f"[PROFILE] wrote {output}\n")
+
+
+def start_from_env(flag: bool = False, output: Optional[str] = None) -> Optional[str]:
+    """Enable profiling when asked to by the --profile flags or CODER_X_PROFILE
+    (1 for the span tree only, or an output path). Returns the output path, or "" for tree only,
+    or None when profiling stays off."""
+    env = os.environ.get("CODER_X_PROFILE", "")
+    if not (flag or output or env not in ("", "0")):
+        return None
+    if output is None and env not in ("", "0", "1"):
+        output = env
+    reset()
+    enable(cprofile=bool(output) and output.endswith((".prof", ".pstats")))
+    return output or ""
@@ -0,0 +1,36 @@
+"""
+Progress events shared by long-running model operations for Coder-X
+- EventListeners holds the listeners of one kind of event (model pulls, model migrations):
+  emit() passes each event to an optional per-call callback and then to every listener
+- human_bytes() formats byte counts and rates for progress lines
+"""
+from typing import Callable, List, Optional
+
+
+class EventListeners:
+    """Registered callbacks for one module's progress events."""
+
+    def __init__(self):
+        self._listeners: List[Callable[[dict], None]] = []
+
+    def add(self, listener: Callable[[dict], None]):
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove(self, listener: Callable[[dict], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def emit(self, event: dict, callback: Optional[Callable[[dict], None]] = None):
+        if callback is not None:
+            callback(event)
+        for listener in list(self._listeners):
+            listener(event)
+
+
+def human_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1000:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1000
+    return f"{n:.1f} TB"
@@ -2,11 +2,26 @@
 Session/history management for Claude Code Python Assistant
 - Store conversation/command history
 - Allow user to view, clear, export history
+
+History is stored as JSONL (one JSON entry per line) so that appends are a
+single O(1) write. Legacy files holding one JSON array are still readable and
+are migrated to JSONL on the first append. When segment limits are configured
+the hot file is rotated into compressed segments (see history_segments.py);
+entry numbers always count across all segments.
 """
 import os
 import json
-from typing import List, Optional
+import time
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
 from .config import load_config, save_config
+from .file_lock import file_lock, remove_lock
+from .offset_index import OffsetIndex
+from .profiling import timed
+from .history_segments import SegmentStore
+
+# Block size used when scanning the history file backwards from the end
+TAIL_BLOCK_SIZE = 64 * 1024
 
 class SessionHistory:
     def __init__(self, config=None):
@@ -15,38 +30,406 @@ class SessionHistory:
         if os.path.isdir(self.history_path):
             raise IsADirectoryError(f"History path {self.history_path} is a directory.")
         if not os.path.exists(self.history_path):
-            with open(self.history_path, "w") as f:
-                json.dump([], f)
+            open(self.history_path, "w").close()
+        # Set once the file has been checked (and migrated if needed) for appending
+        self._append_ready = False
+        # Sidecar byte-offset index for random access, created on first use
+        self._index: Optional[OffsetIndex] = None
+        self.index_path = self.history_path + ".idx"
+        # Full-text search index, also created on first use
+        self._search_index = None
+        self.search_path = self.history_path + ".search.db"
+        # Rotation into compressed segments (0 disables the corresponding limit)
+        self.segment_max_bytes = getattr(self.config, "history_segment_max_bytes", 0) or 0
+        self.segment_max_age = getattr(self.config, "history_segment_max_age", 0) or 0
+        self.retention_days = getattr(self.config, "history_retention_days", 0) or 0
+        self.segments = SegmentStore(self.history_path, getattr(self.config, "history_segment_compression", "gzip") or "gzip")
+        # Appenders hold this lock shared; migration, rotation, clear and compaction hold it exclusively
+        self.lock_path = self.history_path + ".lock"
+        if os.path.exists(self.segments.rotating_path):
+            with file_lock(self.lock_path):
+                self.segments.recover()
+        # "flush": write each append immediately; "fsync": also fsync it;
+        # "buffered": queue appends for a background writer thread
+        self.durability = getattr(self.config, "history_durability", "flush") or "flush"
+        self._writer = None
+        # Set by the writer thread after a batch lands; rotation and index upkeep then run on
+        # the caller's thread, since the SQLite search index is bound to the thread that opened it
+        self._upkeep_due = False
+        if self.durability == "buffered":
+            from .history_writer import BufferedHistoryWriter
+            self._writer = BufferedHistoryWriter(
+                self._write_buffered,
+                max_entries=getattr(self.config, "history_flush_entries", 64),
+                max_delay_ms=getattr(self.config, "history_flush_interval_ms", 200),
+            )
 
-    def append(self, entry: dict):
+    def _check_path(self):
         if os.path.isdir(self.history_path):
             raise IsADirectoryError(f"History path {self.history_path} is a directory.")
-        history = self.load()
-        history.append(entry)
-        with open(self.history_path, "w") as f:
-            json.dump(history, f, indent=2)
 
+    def _is_legacy(self) -> bool:
+        """Return True if the history file holds a single JSON array (pre-JSONL format)."""
+        with open(self.history_path, "rb") as f:
+            first = f.readline()
+        if not first.lstrip().startswith(b"["):
+            return False
+        # json.dump(..., indent=2) puts the bracket on its own line; a compact
+        # array has no trailing newline. JSONL records always end with one.
+        return first.strip() == b"[" or not first.endswith(b"\n")
+
+    @timed("history.migrate")
+    def _migrate(self):
+        """Rewrite a legacy JSON-array history file as JSONL."""
+        with open(self.history_path, "r") as f:
+            content = f.read()
+        entries = json.loads(content) if content.strip() else []
+        tmp_path = self.history_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.history_path)
+        self.index.invalidate()
+
+    def _tail_lines(self, n: int) -> List[bytes]:
+        """Return the last n non-empty raw lines, reading backwards from the end of the file."""
+        if n <= 0:
+            return []
+        lines: List[bytes] = []
+        with open(self.history_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            buf = b""
+            while pos > 0 and len(lines) < n:
+                step = min(TAIL_BLOCK_SIZE, pos)
+                pos -= step
+                f.seek(pos)
+                buf = f.read(step) + buf
+                parts = buf.split(b"\n")
+                # The first part may be the tail of a line that starts in an earlier block
+                buf = parts.pop(0)
+                lines[:0] = [p for p in parts if p.strip()]
+            if pos == 0 and buf.strip() and len(lines) < n:
+                lines.insert(0, buf)
+        return lines[-n:]
+
+    def _check_tail(self):
+        """Parse the last record so a corrupt file is not silently appended to."""
+        for line in self._tail_lines(1):
+            json.loads(line)
+
+    def _prepare_append(self):
+        if self._append_ready:
+            return
+        if self._is_legacy():
+            with file_lock(self.lock_path):
+                # Another process may have migrated the file while we waited
+                if self._is_legacy():
+                    self._migrate()
+        else:
+            self._check_tail()
+        self._append_ready = True
+
+    def append(self, entry: dict):
+        self._check_path()
+        self._prepare_append()
+        line = json.dumps(entry) + "\n"
+        if self._writer is not None and not self._writer.closed:
+            self._writer.submit(line)
+            self._run_upkeep()
+        else:
+            self._write_lines([line])
+
+    def flush(self):
+        """Write out any appends still queued by the buffered writer."""
+        if self._writer is not None:
+            self._writer.flush()
+            self._run_upkeep()
+
+    def close(self):
+        """Flush and stop the buffered writer, if any."""
+        if self._writer is not None:
+            self._writer.close()
+            self._run_upkeep()
+
+    @timed("history.write")
+    def _write_lines(self, lines: List[str]):
+        self._append_raw(lines)
+        self._after_write()
+
+    @timed("history.write")
+    def _write_buffered(self, lines: List[str]):
+        # Runs on the writer thread: only the raw append, the upkeep is left to _run_upkeep
+        self._append_raw(lines)
+        self._upkeep_due = True
+
+    def _run_upkeep(self):
+        if self._upkeep_due:
+            self._upkeep_due = False
+            self._after_write()
+
+    def _append_raw(self, lines: List[str]):
+        # A single O_APPEND write keeps records from concurrent processes intact;
+        # the shared lock only keeps rotation/clear from swapping the file underneath us
+        data = "".join(lines).encode("utf-8")
+        with file_lock(self.lock_path, exclusive=False):
+            fd = os.open(self.history_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                written = os.write(fd, data)
+                while written < len(data):
+                    written += os.write(fd, data[written:])
+                if self.durability == "fsync":
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _after_write(self):
+        self._maybe_rotate()
+        # Only keep the offset index current if someone has started using it
+        if self._index is not None or os.path.exists(self.index_path):
+            self.index.refresh()
+        if self._search_index is not None or os.path.exists(self.search_path):
+            self.search_index.sync(self)
+
+    def _rotation_due(self) -> bool:
+        if self.segment_max_bytes and os.path.getsize(self.history_path) >= self.segment_max_bytes:
+            return True
+        if self.segment_max_age:
+            started = self.segments.hot_started()
+            return started is not None and time.time() - started >= self.segment_max_age
+        return False
+
+    def _maybe_rotate(self):
+        if self.segment_max_age and self.segments.hot_started() is None:
+            with file_lock(self.lock_path):
+                if self.segments.hot_started() is None:
+                    self.segments.mark_hot_started()
+        if self._rotation_due():
+            with file_lock(self.lock_path):
+                # Re-check under the lock: another process may have rotated already
+                seg = self.segments.rotate() if self._rotation_due() else None
+            if seg is not None and self.retention_days:
+                self.compact(max_age_days=self.retention_days)
+
+    @timed("history.rotate")
+    def rotate(self) -> Optional[dict]:
+        """Close the hot file as a compressed segment; applies retention if configured."""
+        self.flush()
+        self._check_path()
+        self._prepare_append()
+        with file_lock(self.lock_path):
+            seg = self.segments.rotate()
+        if seg is not None and self.retention_days:
+            self.compact(max_age_days=self.retention_days)
+        return seg
+
+    @timed("history.load")
     def load(self) -> List[dict]:
-        if os.path.isdir(self.history_path):
-            raise IsADirectoryError(f"History path {self.history_path} is a directory.")
+        return list(self.iter_entries())
+
+    def iter_entries(self) -> Iterator[dict]:
+        """Yield history entries oldest-first, streaming from disk one line at a time."""
+        self.flush()
+        self._check_path()
+        for seg in self.segments.segments:
+            for line in self.segments.iter_lines(seg):
+                yield json.loads(line)
+        if self._is_legacy():
+            with open(self.history_path, "r") as f:
+                content = f.read()
+            yield from (json.loads(content) if content.strip() else [])
+            return
+        with open(self.history_path, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    @timed("history.tail")
+    def tail(self, n: int) -> List[dict]:
+        """Return the last n entries without reading the rest of the history."""
+        self.flush()
+        self._check_path()
+        if n <= 0:
+            return []
+        if self._is_legacy():
+            entries = self._legacy_entries()[-n:]
+        else:
+            entries = [json.loads(line) for line in self._tail_lines(n)]
+        for seg in reversed(self.segments.segments):
+            if len(entries) >= n:
+                break
+            older = [json.loads(line) for line in self.segments.iter_lines(seg)]
+            entries = older[-(n - len(entries)):] + entries
+        return entries
+
+    def _legacy_entries(self) -> List[dict]:
         with open(self.history_path, "r") as f:
             content = f.read()
-            if not content.strip():
-                return []
-            return json.loads(content)
+        return json.loads(content) if content.strip() else []
+
+    @property
+    def index(self) -> OffsetIndex:
+        if self._index is None:
+            self._index = OffsetIndex(self.history_path, self.index_path, skip_blank=True)
+        return self._index
+
+    def _indexed(self) -> Optional[OffsetIndex]:
+        """Return an up-to-date offset index of the hot file, or None if it is not JSONL yet."""
+        self._check_path()
+        if self._is_legacy():
+            return None
+        self.index.refresh()
+        return self.index
+
+    def _hot_count(self) -> int:
+        self.flush()
+        index = self._indexed()
+        return len(index) if index is not None else len(self._legacy_entries())
 
+    def count(self) -> int:
+        """Return the number of history entries across all segments."""
+        return self.segments.total_entries() + self._hot_count()
+
+    def entry(self, k: int) -> dict:
+        """Return entry k (negative k counts from the end); hot entries need a single seek."""
+        total = self.count()
+        if k < 0:
+            k += total
+        if not 0 <= k < total:
+            raise IndexError(f"History entry {k} out of range (0..{total - 1})")
+        return self.entries(k, k + 1)[0]
+
+    def _normalize(self, start: int, stop: Optional[int], total: int) -> Tuple[int, int]:
+        if stop is None:
+            stop = total
+        if start < 0:
+            start += total
+        if stop < 0:
+            stop += total
+        return max(0, min(start, total)), max(0, min(stop, total))
+
+    @timed("history.entries")
+    def entries(self, start: int, stop: Optional[int] = None) -> List[dict]:
+        """Return entries start..stop-1; the hot-file part is read with a single seek."""
+        self.flush()
+        seg_total = self.segments.total_entries()
+        start, stop = self._normalize(start, stop, seg_total + self._hot_count())
+        if start >= stop:
+            return []
+        result: List[dict] = []
+        if start < seg_total:
+            base = 0
+            for seg in self.segments.segments:
+                n = seg["entries"]
+                if base < stop and base + n > start:
+                    lo, hi = max(start, base) - base, min(stop, base + n) - base
+                    result.extend(json.loads(line) for line in islice(self.segments.iter_lines(seg), lo, hi))
+                base += n
+                if base >= stop:
+                    break
+        if stop > seg_total:
+            hot_start, hot_stop = max(start, seg_total) - seg_total, stop - seg_total
+            index = self._indexed()
+            if index is None:
+                result.extend(self._legacy_entries()[hot_start:hot_stop])
+            else:
+                result.extend(json.loads(line) for line in index.read_range(hot_start, hot_stop))
+        return result
+
+    def page(self, offset: int = 0, limit: Optional[int] = None) -> List[dict]:
+        """Return up to limit entries starting at entry number offset."""
+        stop = None if limit is None else offset + limit
+        return self.entries(offset, stop)
+
+    @property
+    def search_index(self):
+        if self._search_index is None:
+            from .history_search import HistorySearchIndex
+            self._search_index = HistorySearchIndex(self.search_path)
+        return self._search_index
+
+    @timed("history.search")
+    def search(self, query: str, field: Optional[str] = None, since: Optional[float] = None,
+               until: Optional[float] = None, limit: int = 20) -> List[dict]:
+        """Full-text search; returns ranked {"index", "score", "entry"} dicts."""
+        index = self.search_index
+        index.sync(self)
+        hits = index.search(query, field=field, since=since, until=until, limit=limit)
+        return [{"index": k, "score": score, "entry": self.entry(k)} for k, score in hits]
+
+    def get_history(self, tail: Optional[int] = None, offset: int = 0, limit: Optional[int] = None) -> List[dict]:
+        """Return history entries, either the last `tail` entries or a page from `offset`."""
+        if tail is not None:
+            return self.tail(tail)
+        return self.page(offset, limit)
+
+    @timed("history.compact")
+    def compact(self, keep_segments: Optional[int] = None, max_age_days: Optional[float] = None,
+                summarize: bool = False) -> int:
+        """
+        Drop the oldest closed segments beyond keep_segments or older than max_age_days.
+        With summarize=True they are replaced by a single summary entry.
+        Returns the number of entries removed.
+        """
+        self.flush()
+        with file_lock(self.lock_path):
+            segs = self.segments.segments
+            cutoff = time.time() - max_age_days * 86400 if max_age_days else None
+            dropped = []
+            # Only a prefix of (oldest) segments is ever dropped, so entry order is preserved
+            for i, seg in enumerate(segs):
+                too_many = keep_segments is not None and len(segs) - i > keep_segments
+                too_old = cutoff is not None and (seg.get("last_ts") or seg["closed"]) < cutoff
+                if not (too_many or too_old):
+                    break
+                dropped.append(seg)
+            if not dropped:
+                return 0
+            summary = None
+            if summarize:
+                first_ts = next((seg["first_ts"] for seg in dropped if seg.get("first_ts") is not None), None)
+                last_ts = next((seg["last_ts"] for seg in reversed(dropped) if seg.get("last_ts") is not None), None)
+                summary = {
+                    "type": "summary",
+                    "summarized_entries": sum(seg.get("summarized_entries") or seg["entries"] for seg in dropped),
+                    "first_ts": first_ts,
+                    "last_ts": last_ts,
+                }
+            self.segments.replace_segments(dropped, summary)
+        # Entry numbers shifted, so the search index has to be rebuilt
+        if self._search_index is not None or os.path.exists(self.search_path):
+            self.search_index.reset()
+        return sum(seg["entries"] for seg in dropped) - (1 if summary else 0)
+
+    @timed("history.clear")
     def clear(self):
-        if os.path.isdir(self.history_path):
-            raise IsADirectoryError(f"History path {self.history_path} is a directory.")
-        with open(self.history_path, "w") as f:
-            json.dump([], f)
+        self._check_path()
+        self.flush()
+        with file_lock(self.lock_path):
+            with open(self.history_path, "w"):
+                pass
+            self.segments.clear()
+            self.index.invalidate()
+            # Nothing is left to protect, so do not leave the sidecar behind
+            remove_lock(self.lock_path)
+        self._append_ready = True
+        if self._search_index is not None or os.path.exists(self.search_path):
+            self.search_index.sync(self)
 
-    def export(self, export_path: str) -> bool:
+    @timed("history.export")
+    def export(self, export_path: str, fmt: Optional[str] = None, since: Optional[float] = None,
+               until: Optional[float] = None, entry_type: Optional[str] = None) -> bool:
+        """
+        Stream the whole history (all segments, then the hot file) to export_path.
+        fmt is one of jsonl, json, jsonl.gz, csv or md (default: guessed from the file name).
+        """
         try:
-            if os.path.isdir(self.history_path):
-                raise IsADirectoryError(f"History path {self.history_path} is a directory.")
-            with open(self.history_path, "r") as src, open(export_path, "w") as dst:
-                dst.write(src.read())
+            self._check_path()
+            self.flush()
+            from .history_export import export_history
+            # Hold off rotation/compaction (but not appends) so no entry is skipped or repeated
+            with file_lock(self.lock_path, exclusive=False):
+                export_history(self, export_path, fmt=fmt, since=since, until=until, entry_type=entry_type)
             return True
         except Exception:
             return False
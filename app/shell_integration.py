@@ -6,6 +6,7 @@ Shell integration for Coder-X
 """
 import subprocess
 from typing import List, Optional
+from .profiling import span
 
 SAFE_COMMANDS = [
     'ls', 'cat', 'echo', 'pwd', 'whoami', 'date', 'head', 'tail', 'grep', 'find', 'df', 'du', 'ps', 'top', 'htop',
@@ -24,7 +25,8 @@ class ShellIntegration:
         if not override and command[0] not in self.allowed_commands:
             return {"error": f"Command '{command[0]}' is not allowed."}
         try:
-            result = subprocess.run(command, capture_output=True, text=True)
+            with span("shell.run", cmd=command[0]):
+                result = subprocess.run(command, capture_output=True, text=True)
             return {
                 "stdout": result.stdout,
                 "stderr": result.stderr,
@@ -0,0 +1,293 @@
+"""
+Storage volume probing for Coder-X
+- parse_mounts() reads /proc/mounts (mount point, device, filesystem type and options); each
+  candidate directory is matched to the mount holding it, and candidates on one filesystem are
+  probed once
+- probe_directory() measures free space (statvfs) and sequential write and read throughput
+  with a bounded temp file (PROBE_SIZE, written in PROBE_BLOCK blocks). I/O bypasses the page
+  cache with O_DIRECT where the filesystem allows it; otherwise writes use O_DSYNC and the
+  file is dropped from the cache (posix_fadvise DONTNEED) before it is read back, and the
+  result is marked "cached" when neither is available. "direct_io" reports whether both the
+  write and the read actually used O_DIRECT
+- Probe files are named after the probing pid; leftovers are removed only once that process
+  is gone or the file is older than DEFAULT_PROBE_TIMEOUT
+- Each probe runs on a daemon thread with model_discovery's deadline, so a hung mount is
+  reported as timed out; probes run one after another so they do not compete for a disk
+- rank_volumes() orders the results by read throughput (what model loads wait on), then write
+  throughput and free space; volumes that could not be probed come last
+"""
+import errno
+import mmap
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .file_lock import fcntl
+from .profiling import span
+
+MOUNTS_FILE = "/proc/mounts"
+PROBE_SIZE = 64 * 1024 * 1024
+PROBE_BLOCK = 1024 * 1024
+PROBE_PREFIX = ".coder-x-probe-"
+DEFAULT_PROBE_TIMEOUT = 30.0
+
+
+def _unescape(field: str) -> str:
+    # /proc/mounts escapes space, tab, newline and backslash as \\ooo octal
+    if "\\" not in field:
+        return field
+    out, i = [], 0
+    while i < len(field):
+        if field[i] == "\\" and field[i + 1:i + 4].isdigit():
+            out.append(chr(int(field[i + 1:i + 4], 8)))
+            i += 4
+        else:
+            out.append(field[i])
+            i += 1
+    return "".join(out)
+
+
+def parse_mounts(path: str = MOUNTS_FILE) -> List[dict]:
+    """Mounts listed in path: [{"device", "mount_point", "fstype", "options"}]; [] if unreadable."""
+    mounts = []
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 4:
+                    mounts.append({
+                        "device": _unescape(fields[0]),
+                        "mount_point": _unescape(fields[1]),
+                        "fstype": fields[2],
+                        "options": fields[3].split(","),
+                    })
+    except OSError:
+        pass
+    return mounts
+
+
+def existing_ancestor(path: str) -> str:
+    """path, or its nearest parent that exists (a volume may be chosen before it is created)."""
+    path = os.path.realpath(os.path.expanduser(path))
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    return path
+
+
+def mount_for(path: str, mounts: List[dict]) -> Optional[dict]:
+    """The mount holding path: the longest mount point that prefixes it (later mounts win ties)."""
+    path = os.path.realpath(os.path.expanduser(path))
+    best = None
+    for mount in mounts:
+        point = mount["mount_point"]
+        if path == point or path.startswith(point.rstrip("/") + "/"):
+            if best is None or len(point) >= len(best["mount_point"]):
+                best = mount
+    return best
+
+
+def _open_direct(path: str, flags: int):
+    """Open path with O_DIRECT if supported, else without; returns (fd, direct)."""
+    direct = getattr(os, "O_DIRECT", 0)
+    if direct:
+        try:
+            return os.open(path, flags | direct, 0o600), True
+        except OSError as e:
+            if e.errno != errno.EINVAL:
+                raise
+    return os.open(path, flags, 0o600), False
+
+
+def _no_cache(fd: int):
+    # macOS has no O_DIRECT; F_NOCACHE turns off caching for the descriptor instead
+    if fcntl is not None and hasattr(fcntl, "F_NOCACHE"):
+        fcntl.fcntl(fd, fcntl.F_NOCACHE, 1)
+        return True
+    return False
+
+
+def _timed_write(path: str, buf: mmap.mmap, blocks: int, direct: bool) -> Tuple[float, bool]:
+    """Write buf blocks times to a fresh file at path and sync it; returns (MB/s, O_DIRECT used)."""
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    if direct:
+        fd, direct = _open_direct(path, flags)
+        if not direct:
+            # The fallback descriptor is buffered; reopen it with O_DSYNC below
+            os.close(fd)
+    if not direct:
+        fd = os.open(path, flags | getattr(os, "O_DSYNC", getattr(os, "O_SYNC", 0)), 0o600)
+        _no_cache(fd)
+    try:
+        start = time.perf_counter()
+        for _ in range(blocks):
+            os.write(fd, buf)
+        os.fsync(fd)
+        return blocks * len(buf) / 1e6 / (time.perf_counter() - start), direct
+    finally:
+        os.close(fd)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # e.g. EPERM: the process exists but belongs to another user
+        return True
+    return True
+
+
+def _clean_stale_probes(directory: str, max_age: float = DEFAULT_PROBE_TIMEOUT):
+    # A probe abandoned at its deadline cannot remove its own file. Files are named after the
+    # probing pid, so only those of dead processes, or untouched for longer than a probe may
+    # run, are removed; a probe still running elsewhere keeps its file
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if not entry.name.startswith(PROBE_PREFIX):
+                    continue
+                pid = entry.name[len(PROBE_PREFIX):]
+                try:
+                    if (pid.isdigit() and _pid_alive(int(pid))
+                            and time.time() - entry.stat(follow_symlinks=False).st_mtime < max_age):
+                        continue
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+    except OSError:
+        pass
+
+
+def measure_throughput(directory: str, size: int = PROBE_SIZE, block: int = PROBE_BLOCK) -> dict:
+    """Sequential write then read of a size-byte temp file in directory, in MB/s.
+
+    Raises OSError if the directory is not writable. The file is always removed.
+    """
+    size = max(block, size - size % block)
+    # An anonymous map is page-aligned, as O_DIRECT requires
+    buf = mmap.mmap(-1, block)
+    buf.write(os.urandom(block))
+    path = os.path.join(directory, f"{PROBE_PREFIX}{os.getpid()}")
+    result = {"direct_io": False, "cached": False}
+    try:
+        try:
+            result["write_mb_s"], write_direct = _timed_write(path, buf, size // block, direct=True)
+        except OSError as e:
+            # Some filesystems accept O_DIRECT at open and only refuse the first write
+            if e.errno != errno.EINVAL:
+                raise
+            result["write_mb_s"], write_direct = _timed_write(path, buf, size // block, direct=False)
+
+        fd, direct = _open_direct(path, os.O_RDONLY)
+        try:
+            if not direct and not _no_cache(fd):
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+                else:
+                    result["cached"] = True
+            start = time.perf_counter()
+            remaining = size
+            while remaining > 0:
+                n = os.readv(fd, [buf])
+                if n <= 0:
+                    break
+                remaining -= n
+            result["read_mb_s"] = (size - remaining) / 1e6 / (time.perf_counter() - start)
+        finally:
+            os.close(fd)
+        result["direct_io"] = write_direct and direct
+    finally:
+        buf.close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    result["probe_bytes"] = size
+    return result
+
+
+def probe_directory(directory: str, size: int = PROBE_SIZE, mounts: Optional[List[dict]] = None) -> dict:
+    """Free space, filesystem and throughput of the volume holding directory."""
+    target = existing_ancestor(directory)
+    mount = mount_for(target, parse_mounts() if mounts is None else mounts)
+    st = os.statvfs(target)
+    result = {
+        "path": directory,
+        "mount_point": mount["mount_point"] if mount else None,
+        "fstype": mount["fstype"] if mount else None,
+        "free_bytes": st.f_bavail * st.f_frsize,
+        "total_bytes": st.f_blocks * st.f_frsize,
+        "read_mb_s": None,
+        "write_mb_s": None,
+        "error": None,
+    }
+    if mount and "ro" in mount["options"]:
+        result["error"] = "read-only filesystem"
+        return result
+    _clean_stale_probes(target)
+    try:
+        result.update(measure_throughput(target, size))
+    except OSError as e:
+        result["error"] = f"throughput probe failed: {e}"
+    return result
+
+
+def rank_volumes(results: Iterable[dict]) -> List[dict]:
+    """Results ordered best first, each with a 1-based "rank"."""
+    def key(r):
+        probed = r.get("read_mb_s") is not None
+        return (not probed, -(r.get("read_mb_s") or 0), -(r.get("write_mb_s") or 0), -(r.get("free_bytes") or 0))
+    ranked = sorted(results, key=key)
+    for i, r in enumerate(ranked, 1):
+        r["rank"] = i
+    return ranked
+
+
+def probe_volumes(paths: Iterable[str], size: int = PROBE_SIZE, timeout: float = DEFAULT_PROBE_TIMEOUT,
+                  mounts: Optional[List[dict]] = None) -> List[dict]:
+    """Probe every path (once per filesystem) and return the ranked results, one per path."""
+    from .model_discovery import _run_with_deadline
+    mounts = parse_mounts() if mounts is None else mounts
+    paths = list(dict.fromkeys(paths))
+    by_device: Dict[object, dict] = {}
+    results = []
+    with span("model.probe_volumes", volumes=len(paths)):
+        for path in paths:
+            try:
+                device = os.stat(existing_ancestor(path)).st_dev
+            except OSError as e:
+                results.append({"path": path, "error": str(e), "read_mb_s": None, "write_mb_s": None,
+                                "free_bytes": None})
+                continue
+            shared = by_device.get(device)
+            if shared is not None:
+                results.append(dict(shared, path=path, shared_with=shared["path"]))
+                continue
+            scans = _run_with_deadline(
+                {path: lambda scan, stop, path=path: scan.found.append(probe_directory(path, size, mounts))}, timeout)
+            scan = scans[path]
+            result = scan.found[0] if scan.found else {"path": path, "read_mb_s": None, "write_mb_s": None,
+                                                       "free_bytes": None}
+            if scan.error and not result.get("error"):
+                result["error"] = scan.error
+            by_device[device] = result
+            results.append(result)
+    return rank_volumes(results)
+
+
+def format_volume(result: dict) -> str:
+    def gb(n):
+        return f"{n / 1e9:.1f} GB" if n is not None else "?"
+
+    def rate(n):
+        return f"{n:.0f} MB/s" if n is not None else "?"
+    line = (f"{result['rank']:>2}. {result['path']}  [{result.get('fstype') or '?'}]  read {rate(result['read_mb_s'])}"
+            f"  write {rate(result['write_mb_s'])}  free {gb(result['free_bytes'])}")
+    if result.get("shared_with"):
+        line += f"  (same filesystem as {result['shared_with']})"
+    if result.get("cached"):
+        line += "  (page cache not bypassed)"
+    if result.get("error"):
+        line += f"  [{result['error']}]"
+    return line
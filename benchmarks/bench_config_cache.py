@@ -0,0 +1,58 @@
+"""
+Benchmark for the load_config cache.
+
+A CLI command typically loads the config several times (ModelManager,
+SessionHistory and MCPClient each call load_config). This compares the time
+spent on those loads with the cache disabled (cleared before every call) and
+enabled.
+
+Usage:
+    python benchmarks/bench_config_cache.py [--commands 2000] [--loads-per-command 3]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import config
+from app.config_schema import CoderXConfig
+
+
+def run(path: str, commands: int, loads: int, cached: bool) -> float:
+    config.clear_config_cache()
+    start = time.perf_counter()
+    for _ in range(commands):
+        for _ in range(loads):
+            if not cached:
+                config.clear_config_cache()
+            config.load_config(path)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--commands", type=int, default=2000)
+    parser.add_argument("--loads-per-command", type=int, default=3)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "config.json")
+        with open(path, "w") as f:
+            json.dump(CoderXConfig(api_keys={"openai": "x" * 40}).model_dump(), f, indent=2)
+        # Age the file past the racy window so it is eligible for caching
+        old = time.time() - 60
+        os.utime(path, (old, old))
+        results = {}
+        for label, cached in (("uncached", False), ("cached", True)):
+            elapsed = run(path, args.commands, args.loads_per_command, cached)
+            per_command = elapsed / args.commands * 1e6
+            results[label] = per_command
+            print(f"{label:>9}: {per_command:8.1f} us/command ({args.loads_per_command} loads each)")
+        print(f"  speedup: {results['uncached'] / results['cached']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark for model deduplication.
+
+Writes --files random files of --size-mb each into two synthetic volumes, with
+--duplicates of them copied into the second volume, then compares:
+  naive  - sequential full sha256 of every file
+  cold   - model_dedupe.dedupe with an empty hash cache (size and sampled-hash
+           prefilter, then parallel segmented hashing of the remaining candidates)
+  warm   - the same run again, served from the persistent hash cache
+All runs are dry runs; nothing is linked.
+
+Usage:
+    python benchmarks/bench_dedupe.py [--files 16] [--size-mb 64] [--duplicates 4] [--workers 4]
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import model_dedupe
+from app.model_dedupe import HashCache, dedupe
+
+
+def make_volumes(tmp: str, files: int, size: int, duplicates: int):
+    a, b = os.path.join(tmp, "vol_a"), os.path.join(tmp, "vol_b")
+    os.makedirs(a)
+    os.makedirs(b)
+    for i in range(files):
+        path = os.path.join(a, f"model{i}.gguf")
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+        if i < duplicates:
+            shutil.copyfile(path, os.path.join(b, f"sha256-{i:04d}"))
+    for path in [os.path.join(d, n) for d in (a, b) for n in os.listdir(d)]:
+        # Older than the racy window, so the hashes are cached
+        t = time.time() - 60
+        os.utime(path, (t, t))
+    return [a, b]
+
+
+def naive(roots):
+    for root in roots:
+        for name in os.listdir(root):
+            h = hashlib.sha256()
+            with open(os.path.join(root, name), "rb") as f:
+                for chunk in iter(lambda: f.read(model_dedupe.HASH_CHUNK_SIZE), b""):
+                    h.update(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--duplicates", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=model_dedupe.DEFAULT_WORKERS)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        roots = make_volumes(tmp, args.files, args.size_mb * 1024 * 1024, args.duplicates)
+        cache_file = os.path.join(tmp, "cache.json")
+        start = time.perf_counter()
+        naive(roots)
+        naive_ms = (time.perf_counter() - start) * 1000
+        results = []
+        for label in ("cold", "warm"):
+            start = time.perf_counter()
+            report = dedupe(roots, min_size=1, workers=args.workers, cache=HashCache(cache_file))
+            results.append((label, (time.perf_counter() - start) * 1000, report))
+        total = (args.files + args.duplicates) * args.size_mb
+        print(f"{args.files + args.duplicates} files, {total} MB, {args.duplicates} duplicates (page cache warm)")
+        print(f"naive: {naive_ms:8.1f} ms  hashed {total} MB")
+        for label, ms, report in results:
+            print(f"{label}:  {ms:8.1f} ms  hashed {report['bytes_hashed'] / 2**20:.0f} MB, "
+                  f"reclaimable {report['reclaimable_bytes'] / 2**20:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark for model discovery across volumes.
+
+Builds synthetic volumes holding --entries files and directories in total (mostly
+non-model files, as on a real data disk) and times three ways of finding the
+model files in them:
+
+  listdir   the old pattern: os.listdir + os.path.isdir per entry, one volume after another
+  scandir   model_discovery.scan_models, one volume after another
+  parallel  model_discovery.discover_models (one thread per volume, shared deadline)
+
+--delay-ms adds a sleep to every directory listing to mimic a network mount, where the
+per-call round trip rather than CPU dominates and concurrent volumes overlap their waits.
+
+Usage:
+    python benchmarks/bench_discovery.py [--entries 100000] [--volumes 4] [--depth 3] [--delay-ms 0]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import model_discovery
+from app.model_discovery import discover_models, scan_models
+
+MODEL_EXTENSIONS = (".bin", ".gguf", ".ggml", ".pth")
+
+
+def build_volume(root: str, entries: int, depth: int, fanout: int = 10) -> int:
+    """Fill root with about `entries` entries spread over `depth` levels; returns models created."""
+    os.makedirs(root, exist_ok=True)
+    dirs = [root]
+    for _ in range(depth):
+        dirs = [os.path.join(d, f"d{i}") for d in dirs for i in range(fanout)]
+        for d in dirs:
+            os.mkdir(d)
+    created = len(dirs) * (depth > 0)
+    models = 0
+    i = 0
+    while created < entries:
+        d = dirs[i % len(dirs)]
+        if i % 50 == 0:
+            name = f"model{i}{MODEL_EXTENSIONS[i % len(MODEL_EXTENSIONS)]}"
+            models += 1
+        else:
+            name = f"data{i}.txt"
+        with open(os.path.join(d, name), "w"):
+            pass
+        created += 1
+        i += 1
+    return models
+
+
+def listdir_walk(path: str, depth: int, max_depth: int, found: list):
+    for name in os.listdir(path):
+        full = os.path.join(path, name)
+        if os.path.isdir(full):
+            if depth < max_depth:
+                listdir_walk(full, depth + 1, max_depth, found)
+        elif name.endswith(MODEL_EXTENSIONS):
+            found.append({"path": full, "size": os.path.getsize(full)})
+    return found
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=100_000, help="Total entries across all volumes")
+    parser.add_argument("--volumes", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=3, help="Directory levels in each volume")
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="Simulated latency per directory listing")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        roots = [os.path.join(tmp, f"vol{v}") for v in range(args.volumes)]
+        start = time.perf_counter()
+        models = sum(build_volume(r, args.entries // args.volumes, args.depth) for r in roots)
+        print(f"built {args.volumes} volumes, {args.entries} entries, {models} models "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        if args.delay_ms:
+            delay = args.delay_ms / 1000
+            real_listdir, real_scandir = os.listdir, os.scandir
+
+            def slow_listdir(path):
+                time.sleep(delay)
+                return real_listdir(path)
+
+            def slow_scandir(path):
+                time.sleep(delay)
+                return real_scandir(path)
+            os.listdir = slow_listdir
+            model_discovery.os.scandir = slow_scandir
+
+        max_depth = args.depth
+        runs = {
+            "listdir": lambda: [m for r in roots for m in listdir_walk(r, 0, max_depth, [])],
+            "scandir": lambda: [m for r in roots for m in scan_models(r, max_depth)],
+            "parallel": lambda: [m for s in discover_models(roots, max_depth, timeout=600).values() for m in s.found],
+        }
+        results = {}
+        for label, fn in runs.items():
+            fn()  # warm the dentry cache so every variant sees the same filesystem state
+            elapsed, found = timed(fn)
+            results[label] = elapsed
+            assert len(found) == models, f"{label} found {len(found)} of {models} models"
+            print(f"{label:>9}: {elapsed:9.1f} ms")
+        print(f"  scandir vs listdir:  {results['listdir'] / results['scandir']:.1f}x")
+        print(f"  parallel vs listdir: {results['listdir'] / results['parallel']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
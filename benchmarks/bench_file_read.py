@@ -0,0 +1,68 @@
+"""
+Benchmark for line-range reads of large files.
+
+Writes a --size-mb log of short lines, then times reading --count lines:
+  whole      - FileOps.read_file and slicing splitlines() (the previous `file read`)
+  near-start - read_range of lines 1000.. before any index exists (bounded forward scan)
+  cold       - read_range of lines in the middle, building the persistent line index
+  warm       - the same range again, from the memory-mapped index
+  tail       - the last --count lines, from the index
+
+Usage:
+    python benchmarks/bench_file_read.py [--size-mb 512] [--count 1000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.file_operations import FileOps
+
+LINE = b"2024-05-01T10:00:00.000Z INFO worker-3 processed request id=1234567 in 12ms status=ok\n"
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--count", type=int, default=1000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["CODER_X_LINE_INDEX_DIR"] = os.path.join(tmp, "line_index")
+        path = os.path.join(tmp, "big.log")
+        lines = args.size_mb * 1024 * 1024 // len(LINE)
+        with open(path, "wb") as f:
+            block = LINE * 10000
+            for _ in range(lines // 10000):
+                f.write(block)
+        lines = lines // 10000 * 10000
+        fo = FileOps()
+        middle = lines // 2
+        runs = [
+            ("whole", lambda: "".join(fo.read_file(path).splitlines(keepends=True)[middle:middle + args.count])),
+            ("near-start", lambda: fo.read_range(path, 1000, 1000 + args.count)),
+            ("cold", lambda: fo.read_range(path, middle, middle + args.count)),
+            ("warm", lambda: fo.read_range(path, middle, middle + args.count)),
+            ("tail", lambda: fo.read_range(path, -args.count)),
+        ]
+        print(f"{lines} lines, {args.size_mb} MB (page cache warm), reading {args.count} lines")
+        expected = None
+        for label, fn in runs:
+            ms, text = timed(fn)
+            if label == "whole":
+                expected = text
+            elif label in ("cold", "warm"):
+                assert text == expected
+            print(f"{label:10s} {ms:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark for reading GGUF model metadata.
+
+Writes a header shaped like a 70B llama model (723 tensors, 128k-token vocabulary)
+followed by a sparse tail standing in for the tensor data, so the file reports
+its full size without using the disk space, then times gguf.model_info on it.
+Only the pages holding the header are ever read.
+
+Usage:
+    python benchmarks/bench_gguf.py [--runs 20] [--vocab 128000] [--size-gb 40]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.gguf import encode_gguf, model_info
+
+Q4_K, Q6_K, F32 = 12, 14, 0
+
+
+def llama_70b_header(vocab: int) -> bytes:
+    meta = {
+        "general.architecture": "llama",
+        "general.name": "Synthetic 70B",
+        "general.file_type": 15,
+        "llama.context_length": 8192,
+        "llama.embedding_length": 8192,
+        "llama.block_count": 80,
+        "llama.attention.head_count": 64,
+        "tokenizer.ggml.tokens": [f"token{i}" for i in range(vocab)],
+        "tokenizer.ggml.scores": [0.0] * vocab,
+        "tokenizer.ggml.token_type": [1] * vocab,
+    }
+    tensors = [("token_embd.weight", [8192, vocab], Q4_K), ("output.weight", [8192, vocab], Q6_K),
+               ("output_norm.weight", [8192], F32)]
+    for b in range(80):
+        for name, shape in (("attn_q", [8192, 8192]), ("attn_k", [8192, 1024]), ("attn_v", [8192, 1024]),
+                            ("attn_output", [8192, 8192]), ("ffn_gate", [8192, 28672]),
+                            ("ffn_up", [8192, 28672]), ("ffn_down", [28672, 8192]),
+                            ("attn_norm", [8192]), ("ffn_norm", [8192])):
+            tensors.append((f"blk.{b}.{name}.weight", shape, F32 if len(shape) == 1 else Q4_K))
+    return encode_gguf(meta, tensors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--vocab", type=int, default=128_000)
+    parser.add_argument("--size-gb", type=float, default=40)
+    args = parser.parse_args()
+    header = llama_70b_header(args.vocab)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.gguf")
+        with open(path, "wb") as f:
+            f.write(header)
+            f.truncate(int(args.size_gb * 10**9))
+        times = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            info = model_info(path)
+            times.append((time.perf_counter() - start) * 1000)
+        print(f"file: {os.path.getsize(path) / 1e9:.0f} GB, header: {len(header) / 1e6:.1f} MB")
+        print(f"model_info: median {statistics.median(times):.1f} ms, max {max(times):.1f} ms over {args.runs} runs")
+        print(f"  {info['architecture']} {info['parameter_count'] / 1e9:.1f}B params, {info['quantization']}, "
+              f"ctx {info['context_length']}, {info['tensor_count']} tensors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Stress benchmark for concurrent SessionHistory appends.
+
+Runs N writer processes against one history file, checks that every entry
+survived exactly once, and reports aggregate throughput for each N.
+
+Usage:
+    python benchmarks/bench_history_concurrency.py [--entries 2000] [--writers 1,2,4,8]
+        [--segment-bytes 0] [--durability flush]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.session_history import SessionHistory
+
+
+class BenchConfig:
+    def __init__(self, history_path, segment_bytes, durability):
+        self.history_path = history_path
+        self.history_segment_max_bytes = segment_bytes
+        self.history_durability = durability
+
+
+def _writer(config, writer_id, entries, start_event):
+    sh = SessionHistory(config=config)
+    start_event.wait()
+    for i in range(entries):
+        sh.append({"writer": writer_id, "seq": i, "cmd": "echo stress-test payload"})
+    sh.close()
+
+
+def run(writers: int, entries: int, segment_bytes: int, durability: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        config = BenchConfig(os.path.join(tmp, "history.jsonl"), segment_bytes, durability)
+        SessionHistory(config=config)
+        start_event = multiprocessing.Event()
+        procs = [multiprocessing.Process(target=_writer, args=(config, w, entries, start_event)) for w in range(writers)]
+        for p in procs:
+            p.start()
+        t0 = time.perf_counter()
+        start_event.set()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - t0
+        seen = [(e["writer"], e["seq"]) for e in SessionHistory(config=config).iter_entries()]
+        expected = writers * entries
+        return {
+            "writers": writers,
+            "entries": len(seen),
+            "expected": expected,
+            "lost": expected - len(set(seen)),
+            "duplicated": len(seen) - len(set(seen)),
+            "seconds": round(elapsed, 3),
+            "appends_per_sec": round(expected / elapsed) if elapsed else None,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=2000, help="Appends per writer")
+    parser.add_argument("--writers", default="1,2,4,8", help="Comma-separated writer counts")
+    parser.add_argument("--segment-bytes", type=int, default=0, help="Rotate the hot file at this size (0 = off)")
+    parser.add_argument("--durability", default="flush", choices=["flush", "fsync", "buffered"])
+    args = parser.parse_args()
+    ok = True
+    for n in (int(w) for w in args.writers.split(",")):
+        result = run(n, args.entries, args.segment_bytes, args.durability)
+        ok = ok and result["lost"] == 0 and result["duplicated"] == 0
+        print(json.dumps(result))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Startup-time benchmark for the coder-x CLI.
+
+Runs each subcommand in a fresh interpreter under `python -X importtime -m app ...`
+and reports wall time plus the time spent importing modules (interpreter startup
+modules such as `site` are excluded). "cold" runs cannot use any cached bytecode,
+"warm" runs use the normal __pycache__ directories (median of --runs).
+
+Warm import times are checked against a per-subcommand budget; the script exits
+with status 1 if any budget is exceeded, so it can be used as a regression gate.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--top 3] [--scale 1.0]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Warm import-time budgets in milliseconds (scale with --scale on slow machines)
+BUDGETS_MS = {
+    "version": 5,
+    "--help": 350,
+    "config show": 350,
+    "history show": 350,
+    "file read": 100,
+}
+
+STARTUP_MODULES = {"site", "encodings", "_frozen_importlib_external", "zipimport", "codecs", "io", "abc", "runpy"}
+
+
+def parse_importtime(stderr: str):
+    """Return (total import ms, [(ms, module)]) for top-level imports in -X importtime output."""
+    top = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith("  "):  # nested import, already counted by its parent
+            continue
+        name = name.strip()
+        if name in STARTUP_MODULES:
+            continue
+        top.append((int(cumulative) / 1000.0, name))
+    return sum(ms for ms, _ in top), sorted(top, reverse=True)
+
+
+def run_once(args, env):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-m", "app"] + args,
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    wall = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"coder-x {' '.join(args)} failed:\n{proc.stdout}{proc.stderr}")
+    imports, top = parse_importtime(proc.stderr)
+    return wall, imports, top
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=3, help="Show the N slowest top-level imports")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget by this factor")
+    args = parser.parse_args()
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, "config.json")
+        with open(config_path, "w") as f:
+            json.dump({"history_path": os.path.join(tmp, "history.json")}, f)
+        sample = os.path.join(tmp, "sample.txt")
+        with open(sample, "w") as f:
+            f.write("hello\n")
+        commands = {
+            "version": ["version"],
+            "--help": ["--help"],
+            "config show": ["config", "show"],
+            "history show": ["history"],
+            "file read": ["file", "read", sample],
+        }
+        env = dict(os.environ, HOME=tmp, CODER_X_CONFIG=config_path)
+        print(f"{'command':<14} {'cold wall':>10} {'cold imp':>9} {'warm wall':>10} {'warm imp':>9} {'budget':>7}")
+        for label, argv in commands.items():
+            # An empty cache prefix that is never written to: every module is compiled from source
+            cold_env = dict(env, PYTHONPYCACHEPREFIX=os.path.join(tmp, "no-cache"), PYTHONDONTWRITEBYTECODE="1")
+            cold_wall, cold_imports, _ = run_once(argv, cold_env)
+            run_once(argv, env)  # make sure the regular bytecode cache is populated
+            warm = [run_once(argv, env) for _ in range(args.runs)]
+            warm_wall = statistics.median(w for w, _, _ in warm)
+            warm_imports = statistics.median(im for _, im, _ in warm)
+            budget = BUDGETS_MS[label] * args.scale
+            status = "" if warm_imports <= budget else "  OVER BUDGET"
+            if status:
+                failed.append(label)
+            print(f"{label:<14} {cold_wall:9.1f}ms {cold_imports:8.1f}ms {warm_wall:9.1f}ms {warm_imports:8.1f}ms "
+                  f"{budget:6.0f}ms{status}")
+            slowest = ", ".join(f"{name} {ms:.1f}ms" for ms, name in warm[-1][2][:args.top])
+            if slowest:
+                print(f"{'':<14} slowest: {slowest}")
+    if failed:
+        print(f"[ERROR] Startup budget exceeded for: {', '.join(failed)}")
+        return 1
+    print("[OK] All subcommands within startup budget.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+import pytest
+
+@pytest.fixture(autouse=True)
+def isolated_latency_stats(tmp_path_factory, monkeypatch):
+    # CLI commands record latency stats; keep them out of the real home directory
+    monkeypatch.setenv("CODER_X_STATS_DIR", str(tmp_path_factory.getbasetemp() / "latency_stats"))
+
+
+@pytest.fixture(autouse=True)
+def unreachable_ollama(monkeypatch):
+    # Never talk to a real Ollama server: API calls fail fast and fall back to the (mocked) CLI
+    from app import ollama_client
+    monkeypatch.setenv("OLLAMA_HOST", "127.0.0.1:9")
+    ollama_client.reset_clients()
+    yield
+    ollama_client.reset_clients()
+
+
+@pytest.fixture(autouse=True)
+def isolated_model_pool(tmp_path_factory, monkeypatch):
+    # Warming models records recency in the pool; keep its state file out of the real home directory
+    monkeypatch.setenv("CODER_X_MODEL_POOL", str(tmp_path_factory.getbasetemp() / "model_pool.json"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_line_index(tmp_path_factory, monkeypatch):
+    # Range reads of large files keep line indexes; keep them out of the real home directory
+    monkeypatch.setenv("CODER_X_LINE_INDEX_DIR", str(tmp_path_factory.getbasetemp() / "line_index"))
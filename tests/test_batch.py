@@ -0,0 +1,74 @@
+import io
+import json
+import threading
+import time
+import pytest
+from app import batch
+from app.batch import BatchRunner, parse_request, is_read_only
+
+def _run(lines, workers=1):
+    out = io.StringIO()
+    failed = BatchRunner(out, workers=workers).run(lines)
+    return failed, [json.loads(line) for line in out.getvalue().splitlines()]
+
+def test_parse_request():
+    assert parse_request("  ", 1) is None
+    assert parse_request("# comment", 1) is None
+    assert parse_request("file read 'a b.txt'", 3) == {"id": 3, "argv": ["file", "read", "a b.txt"]}
+    assert parse_request('{"id": "x", "argv": ["version"]}', 1) == {"id": "x", "argv": ["version"]}
+    assert parse_request('{"line": "help"}', 2) == {"id": 2, "line": "help"}
+    with pytest.raises(ValueError):
+        parse_request('{"nothing": 1}', 1)
+
+def test_read_only_classification():
+    assert is_read_only({"argv": ["file", "read", "x"]})
+    assert is_read_only({"argv": ["history", "--tail", "3"]})
+    assert not is_read_only({"argv": ["file", "write", "x", "y"]})
+    assert not is_read_only({"argv": ["history", "export", "out.jsonl"]})
+    assert is_read_only({"line": "help"})
+    assert not is_read_only({"line": "config set model x"})
+
+def test_runs_typer_and_line_commands(tmp_path):
+    target = tmp_path / "t.txt"
+    lines = [
+        f"file write {target} hello",
+        json.dumps({"id": "r", "argv": ["file", "read", str(target)]}),
+        '{"line": "help"}',
+        "no-such-command",
+        "{broken",
+    ]
+    failed, records = _run(lines)
+    assert failed == 2
+    assert [r["id"] for r in records] == [1, "r", 3, 4, 5]
+    assert records[1]["ok"] and "hello" in records[1]["output"]
+    assert "Coder-X CLI" in records[2]["output"]
+    assert records[3]["exit"] == 2 and "No such command" in records[3]["error"]
+    assert records[4]["exit"] == 2 and "Invalid batch request" in records[4]["error"]
+    assert all(r["elapsed_ms"] >= 0 for r in records)
+
+def test_commands_cannot_read_batch_input(monkeypatch):
+    import sys
+    monkeypatch.setattr("app.cli.run_command_line", lambda line: repr(sys.stdin.readline()))
+    failed, records = _run(['{"line": "prompting"}', '{"line": "next"}'])
+    # A prompt sees EOF instead of consuming the next batch line
+    assert [r["output"] for r in records] == ["''\n", "''\n"]
+
+def test_workers_run_read_only_commands_concurrently(monkeypatch):
+    active, peak = [0], [0]
+    lock = threading.Lock()
+    def fake_invoke(argv):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        print(" ".join(argv))
+        with lock:
+            active[0] -= 1
+        return 0
+    monkeypatch.setattr("app.cli_entry.invoke", fake_invoke)
+    lines = [f"file read f{i}" for i in range(6)] + ["file write w x"] + [f"file read g{i}" for i in range(2)]
+    failed, records = _run(lines, workers=3)
+    assert failed == 0
+    # Output stays in input order and each record holds only its own command's output
+    assert [r["output"].strip() for r in records] == [l for l in lines]
+    assert peak[0] > 1
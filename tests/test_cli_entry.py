@@ -1,3 +1,5 @@
+import json
+import os
 import pytest
 from typer.testing import CliRunner
 from app.cli_entry import app
@@ -241,3 +243,111 @@ def test_shell(monkeypatch):
     result = runner.invoke(app, ["shell", "echo", "hi"])
     assert result.exit_code == 0
     assert "ok" in result.output
+
+def test_history_tail(monkeypatch):
+    class DummySH:
+        def tail(self, n): return [{"cmd": str(i)} for i in range(n)]
+    monkeypatch.setattr("app.session_history.SessionHistory", DummySH)
+    result = runner.invoke(app, ["history", "--tail", "2"])
+    assert result.exit_code == 0
+    assert result.output.splitlines() == ['{"cmd": "0"}', '{"cmd": "1"}']
+
+def test_history_search(monkeypatch):
+    called = {}
+    class DummySH:
+        def search(self, query, **kw):
+            called.update(kw, query=query)
+            return [{"index": 3, "score": -1.0, "entry": {"cmd": "git log"}}]
+    monkeypatch.setattr("app.session_history.SessionHistory", DummySH)
+    result = runner.invoke(app, ["history", "search", "git", "--field", "cmd", "--since", "10"])
+    assert result.exit_code == 0
+    assert '"git log"' in result.output
+    assert called["query"] == "git" and called["field"] == "cmd" and called["since"] == 10.0
+
+@pytest.mark.parametrize("option", ["--since", "--until"])
+def test_history_rejects_bad_time_bounds(monkeypatch, option):
+    class DummySH:
+        def search(self, query, **kw):
+            pytest.fail("searched without the time bound")
+    monkeypatch.setattr("app.session_history.SessionHistory", DummySH)
+    result = runner.invoke(app, ["history", "search", "git", option, "yesterday"])
+    assert result.exit_code == 2
+    assert "yesterday" in result.output
+
+def test_history_compact(monkeypatch):
+    class DummySH:
+        def compact(self, keep_segments=None, max_age_days=None, summarize=False):
+            assert keep_segments == 2 and summarize
+            return 7
+    monkeypatch.setattr("app.session_history.SessionHistory", DummySH)
+    result = runner.invoke(app, ["history", "compact", "--keep", "2", "--summarize"])
+    assert result.exit_code == 0
+    assert "Removed 7" in result.output
+
+def test_history_export(monkeypatch):
+    called = {}
+    class DummySH:
+        def export(self, path, **kw):
+            called.update(kw, path=path)
+            return True
+    monkeypatch.setattr("app.session_history.SessionHistory", DummySH)
+    result = runner.invoke(app, ["history", "export", "out.csv", "--format", "csv", "--type", "cmd"])
+    assert result.exit_code == 0
+    assert "[OK] History exported to out.csv" in result.output
+    assert called["fmt"] == "csv" and called["entry_type"] == "cmd" and called["path"] == "out.csv"
+
+def test_history_context(monkeypatch):
+    class DummyBuilder:
+        def __init__(self, history): pass
+        def build(self, budget): return {"text": f"budget={budget}"}
+    monkeypatch.setattr("app.session_history.SessionHistory", lambda: object())
+    monkeypatch.setattr("app.context_builder.ContextBuilder", DummyBuilder)
+    result = runner.invoke(app, ["history", "context", "--budget", "50"])
+    assert result.exit_code == 0
+    assert "budget=50" in result.output
+
+HEAVY_MODULES = ("pydantic", "requests", "readline", "prompt_toolkit", "cryptography")
+
+def _loaded_after(code):
+    import subprocess, sys
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", code + "; import sys; print(' '.join(sorted(sys.modules)))"],
+                         cwd=root, capture_output=True, text=True, check=True).stdout
+    return set(out.split())
+
+def test_cli_entry_import_is_lazy():
+    loaded = _loaded_after("import app.cli_entry")
+    assert not [m for m in HEAVY_MODULES if m in loaded]
+
+def test_version_fast_path_skips_typer(capsys):
+    from app.__main__ import main
+    assert main(["version"]) == 0
+    assert "Coder-X version" in capsys.readouterr().out
+    loaded = _loaded_after("from app.__main__ import main; main(['--version'])")
+    assert "typer" not in loaded and "click" not in loaded
+
+def test_daemon_status_without_daemon(tmp_path):
+    result = runner.invoke(app, ["daemon", "status", "--socket", str(tmp_path / "none.sock")])
+    assert result.exit_code == 1
+    assert "No Coder-X daemon is running" in result.output
+
+def test_batch_from_file(tmp_path):
+    commands = tmp_path / "cmds.txt"
+    commands.write_text("version\n")
+    result = runner.invoke(app, ["batch", str(commands)])
+    assert result.exit_code == 0
+    record = json.loads(result.output.splitlines()[0])
+    assert record["ok"] and "Coder-X version" in record["output"]
+
+def test_model_catalog_query(tmp_path, monkeypatch):
+    from app.config_schema import CoderXConfig
+    model_dir = tmp_path / "models"
+    model_dir.mkdir()
+    (model_dir / "llama.gguf").write_bytes(b"g" * 100)
+    (model_dir / "tiny.bin").write_bytes(b"b" * 10)
+    monkeypatch.setattr("app.model_management.load_config", lambda: CoderXConfig(model_storage_path=str(model_dir)))
+    result = runner.invoke(app, ["model", "catalog", "gguf"])
+    assert result.exit_code == 0
+    assert [e["name"] for e in json.loads(result.output)] == ["llama.gguf"]
+    result = runner.invoke(app, ["model", "catalog", "--max-size", "50", "--rescan"])
+    assert [e["name"] for e in json.loads(result.output)] == ["tiny.bin"]
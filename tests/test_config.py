@@ -63,3 +63,50 @@ def test_load_config_validation_error(tmp_path):
     result = config.load_config(str(path))
     from app.config_schema import CoderXConfig
     assert isinstance(result, CoderXConfig)
+
+def _old_config_file(tmp_path, data):
+    path = tmp_path / "cached.json"
+    path.write_text(json.dumps(data))
+    # Outside the racy window, so the file is eligible for caching
+    os.utime(path, (1_000_000, 1_000_000))
+    return str(path)
+
+def test_load_config_cached_until_file_changes(tmp_path, monkeypatch):
+    config.clear_config_cache()
+    path = _old_config_file(tmp_path, {"model": "first"})
+    calls = []
+    real = config._load_config_file
+    monkeypatch.setattr(config, "_load_config_file", lambda p: calls.append(p) or real(p))
+    a = config.load_config(path)
+    b = config.load_config(path)
+    assert len(calls) == 1
+    assert a.model == b.model == "first"
+    # Callers get independent copies
+    a.model = "mutated"
+    assert config.load_config(path).model == "first"
+    with open(path, "w") as f:
+        f.write(json.dumps({"model": "second!"}))
+    os.utime(path, (2_000_000, 2_000_000))
+    assert config.load_config(path).model == "second!"
+    assert len(calls) == 2
+
+def test_save_config_invalidates_cache(tmp_path):
+    config.clear_config_cache()
+    path = _old_config_file(tmp_path, {"model": "aaaa"})
+    conf = config.load_config(path)
+    conf.model = "bbbb"
+    config.save_config(conf, path)
+    # Same size, and pin the old mtime so only the explicit invalidation can help
+    os.utime(path, (1_000_000, 1_000_000))
+    assert config.load_config(path).model == "bbbb"
+
+def test_recently_modified_config_not_cached(tmp_path, monkeypatch):
+    config.clear_config_cache()
+    path = tmp_path / "fresh.json"
+    path.write_text(json.dumps({"model": "fresh"}))
+    calls = []
+    real = config._load_config_file
+    monkeypatch.setattr(config, "_load_config_file", lambda p: calls.append(p) or real(p))
+    config.load_config(str(path))
+    config.load_config(str(path))
+    assert len(calls) == 2
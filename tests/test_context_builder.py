@@ -0,0 +1,76 @@
+import os
+from app.session_history import SessionHistory
+from app.context_builder import ContextBuilder, TokenCountCache, estimate_tokens, render_entry
+
+def _history(tmp_path, n=0):
+    class DummyConf:
+        history_path = str(tmp_path / "hist.json")
+    sh = SessionHistory(config=DummyConf())
+    for i in range(n):
+        sh.append({"cmd": f"cmd{i}"})
+    return sh
+
+def word_tokens(text):
+    return len(text.split())
+
+def test_render_entry():
+    assert render_entry({"role": "user", "content": "hi"}) == "user: hi"
+    assert render_entry({"cmd": "ls", "output": "a"}) == "$ ls\na"
+    assert render_entry("plain") == "plain"
+    assert render_entry({"x": 1}) == '{"x": 1}'
+    assert estimate_tokens("") == 1 and estimate_tokens("abcdefgh") == 2
+
+def test_fills_budget_from_newest(tmp_path):
+    sh = _history(tmp_path, 10)
+    # Every "$ cmdN" entry is two word-tokens
+    builder = ContextBuilder(sh, tokenizer=word_tokens, tokenizer_name="words")
+    window = builder.build(6, summarize=False)
+    assert [e["cmd"] for e in window["entries"]] == ["cmd7", "cmd8", "cmd9"]
+    assert window["tokens"] == 6
+    assert window["omitted"] == 7
+    assert window["text"] == "$ cmd7\n\n$ cmd8\n\n$ cmd9"
+
+def test_summary_of_older_turns(tmp_path):
+    sh = _history(tmp_path, 10)
+    builder = ContextBuilder(sh, tokenizer=word_tokens, tokenizer_name="words",
+                             summarizer=lambda omitted, sample: f"[{omitted} omitted]")
+    window = builder.build(7)
+    # 2 tokens for the summary leaves room for two entries
+    assert window["summary"] == "[8 omitted]"
+    assert [e["cmd"] for e in window["entries"]] == ["cmd8", "cmd9"]
+    assert window["tokens"] == 6
+    assert window["text"].startswith("[8 omitted]")
+
+def test_everything_fits(tmp_path):
+    sh = _history(tmp_path, 3)
+    window = ContextBuilder(sh).build(10000)
+    assert window["omitted"] == 0 and window["summary"] is None
+    assert len(window["entries"]) == 3
+
+def test_old_turns_are_not_retokenized(tmp_path):
+    sh = _history(tmp_path, 5)
+    calls = []
+    def counting(text):
+        calls.append(text)
+        return 1
+    builder = ContextBuilder(sh, tokenizer=counting, tokenizer_name="counting")
+    builder.build(100, summarize=False)
+    assert len(calls) == 5
+    sh.append({"cmd": "new"})
+    calls.clear()
+    ContextBuilder(sh, tokenizer=counting, tokenizer_name="counting").build(100, summarize=False)
+    assert calls == ["$ new"]
+    assert os.path.exists(sh.history_path + ".tokens")
+
+def test_cache_recounts_when_history_rewritten_or_tokenizer_changes(tmp_path):
+    sh = _history(tmp_path, 3)
+    cache = TokenCountCache(sh.history_path + ".tokens", "a")
+    assert cache.sync(sh, lambda e: 5) == 3
+    assert cache.get(2) == 5
+    sh.clear()
+    sh.append({"cmd": "x"})
+    assert cache.sync(sh, lambda e: 7) == 1
+    assert cache.get(0) == 7
+    other = TokenCountCache(sh.history_path + ".tokens", "b")
+    other.sync(sh, lambda e: 9)
+    assert other.get(0) == 9
@@ -0,0 +1,134 @@
+import io
+import json
+import os
+import threading
+import pytest
+from app import daemon
+
+@pytest.fixture
+def running_daemon(tmp_path, monkeypatch):
+    conf = tmp_path / "conf.json"
+    conf.write_text(json.dumps({"history_path": str(tmp_path / "hist.json")}))
+    monkeypatch.setenv("CODER_X_CONFIG", str(conf))
+    path = str(tmp_path / "d.sock")
+    monkeypatch.setenv("CODER_X_SOCKET", path)
+    server = daemon.create_server(path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join(timeout=5)
+
+def _remote(argv):
+    out, err = io.StringIO(), io.StringIO()
+    code = daemon.run_remote(argv, stdout=out, stderr=err)
+    return code, out.getvalue(), err.getvalue()
+
+def test_runs_commands_and_streams_output(running_daemon, tmp_path):
+    sample = tmp_path / "sample.txt"
+    sample.write_text("hello daemon\n")
+    code, out, _ = _remote(["file", "read", str(sample)])
+    assert code == 0
+    assert "hello daemon" in out
+    code, out, _ = _remote(["version"])
+    assert code == 0 and "Coder-X version" in out
+
+def test_uses_client_cwd(running_daemon, tmp_path, monkeypatch):
+    (tmp_path / "rel.txt").write_text("relative")
+    monkeypatch.chdir(tmp_path)
+    code, out, _ = _remote(["file", "read", "rel.txt"])
+    assert code == 0 and "relative" in out
+
+def test_exit_codes_are_forwarded(running_daemon):
+    code, _, err = _remote(["no-such-command"])
+    assert code == 2
+    assert "No such command" in err
+
+def test_falls_back_when_config_differs(running_daemon, monkeypatch, tmp_path):
+    monkeypatch.setenv("CODER_X_CONFIG", str(tmp_path / "other.json"))
+    assert _remote(["version"])[0] is None
+
+def test_falls_back_when_environment_differs(running_daemon, monkeypatch, tmp_path):
+    monkeypatch.setenv("CODER_X_HISTORY", str(tmp_path / "other_history.json"))
+    out, err = io.StringIO(), io.StringIO()
+    assert daemon.run_remote(["version"], stdout=out, stderr=err) is None
+    assert out.getvalue() == err.getvalue() == ""
+    monkeypatch.delenv("CODER_X_HISTORY")
+    monkeypatch.setenv("OLLAMA_HOST", "10.0.0.2:11434")
+    assert _remote(["version"])[0] is None
+    monkeypatch.setenv("OLLAMA_HOST", "127.0.0.1:9")
+    assert _remote(["version"])[0] == 0
+
+def test_client_tty_flags_are_forwarded(running_daemon, monkeypatch):
+    import sys
+
+    def report_tty(argv):
+        print(f"out={sys.stdout.isatty()} err={sys.stderr.isatty()}")
+        return 0
+    monkeypatch.setattr("app.cli_entry.invoke", report_tty)
+
+    class Terminal(io.StringIO):
+        def isatty(self):
+            return True
+    out = Terminal()
+    assert daemon.run_remote(["version"], stdout=out, stderr=io.StringIO()) == 0
+    assert out.getvalue() == "out=True err=False\n"
+    assert _remote(["version"])[1] == "out=False err=False\n"
+
+def test_local_commands_are_not_forwarded(running_daemon):
+    assert daemon.runs_locally(["shell"])
+    assert daemon.runs_locally(["config", "setup"])
+    assert not daemon.runs_locally(["shell", "ls"])
+    assert _remote(["daemon", "status"])[0] is None
+
+def test_ping_stop_and_stale_socket(tmp_path):
+    path = str(tmp_path / "d.sock")
+    assert daemon.ping(path) is None
+    server = daemon.create_server(path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    assert daemon.ping(path) == os.getpid()
+    with pytest.raises(RuntimeError):
+        daemon.create_server(path)
+    assert daemon.stop(path)
+    thread.join(timeout=5)
+    # The socket file is left behind until server_close; a new daemon replaces it
+    assert os.path.exists(path)
+    server.server_close()
+    open(path, "w").close()
+    daemon.create_server(path).server_close()
+    assert not os.path.exists(path)
+
+def test_lost_connection_after_send_is_not_rerun(tmp_path):
+    import socket
+    path = str(tmp_path / "d.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+
+    def half_answer():
+        conn, _ = listener.accept()
+        with conn, conn.makefile("rwb") as f:
+            f.readline()
+            f.write(b'{"out": "partial\\n"}\n{"exit"')
+    thread = threading.Thread(target=half_answer, daemon=True)
+    thread.start()
+    out, err = io.StringIO(), io.StringIO()
+    try:
+        assert daemon.run_remote(["version"], path, stdout=out, stderr=err) == 1
+    finally:
+        thread.join(timeout=5)
+        listener.close()
+    assert out.getvalue() == "partial\n"
+    assert "[ERROR] Lost connection to the Coder-X daemon" in err.getvalue()
+
+def test_main_falls_back_without_daemon(tmp_path, monkeypatch, capsys):
+    from app.__main__ import main
+    monkeypatch.setenv("CODER_X_SOCKET", str(tmp_path / "missing.sock"))
+    sample = tmp_path / "sample.txt"
+    sample.write_text("local run")
+    with pytest.raises(SystemExit) as exc:
+        main(["file", "read", str(sample)])
+    assert exc.value.code == 0
+    assert "local run" in capsys.readouterr().out
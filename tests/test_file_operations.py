@@ -1,5 +1,7 @@
 import os
 import tempfile
+
+import pytest
 from app.file_operations import FileOps
 
 def test_read_write_append_file():
@@ -161,3 +163,94 @@ def test_lint_code_exception(monkeypatch):
     monkeypatch.setattr("subprocess.run", lambda *a, **kw: (_ for _ in ()).throw(Exception("bad linter")))
     out = fo.lint_code("foo.py")
     assert "bad linter" in out
+
+# --- Range reads ---
+SLICES = [(0, None), (0, 2), (1, 3), (3, None), (4, 10), (-2, None), (-3, -1), (2, 1), (10, 20)]
+
+
+def _lines_file(tmp_path, count=5, tail=True):
+    text = "".join(f"line {i} {'x' * i}\n" for i in range(count)) + ("tail" if tail else "")
+    path = tmp_path / "data.log"
+    path.write_text(text)
+    return str(path), text.splitlines(keepends=True)
+
+
+def test_read_range_by_line_and_byte(tmp_path):
+    fo = FileOps()
+    path, lines = _lines_file(tmp_path)
+    for start, stop in SLICES:
+        assert fo.read_range(path, start, stop) == "".join(lines[start:stop]), (start, stop)
+    with open(path) as f:
+        text = f.read()
+    assert fo.read_range(path, 3, 12, by="bytes") == text[3:12]
+    assert fo.read_range(path, -4, None, by="bytes") == "tail"
+    assert fo.read_range(str(tmp_path / "missing"), 0, 1) is None
+    assert fo.read_range(str(tmp_path), 0, 1) is None
+    (tmp_path / "empty").write_text("")
+    assert fo.read_range(str(tmp_path / "empty"), -1, None) == ""
+
+
+def test_line_index_for_large_files(tmp_path, monkeypatch):
+    from app import file_operations
+    monkeypatch.setattr(file_operations, "LINE_INDEX_MIN_SIZE", 1)
+    monkeypatch.setattr(file_operations, "LINE_SCAN_LIMIT", 16)
+    monkeypatch.setattr(file_operations, "READ_CHUNK_SIZE", 7)
+    fo = FileOps()
+    path, lines = _lines_file(tmp_path, count=40)
+    # Near the start, a scan within LINE_SCAN_LIMIT answers without building the index
+    assert fo.read_range(path, 0, 1) == lines[0]
+    assert not os.path.isdir(file_operations.line_index_dir())
+    for start, stop in SLICES + [(30, 35), (-1, None)]:
+        assert fo.read_range(path, start, stop) == "".join(lines[start:stop]), (start, stop)
+    assert len(os.listdir(file_operations.line_index_dir())) == 1
+    # A growing log: the index catches up with the appended lines
+    with open(path, "a") as f:
+        f.write(" end\nmore\n")
+    assert fo.read_range(path, -2, None) == "tail end\nmore\n"
+    assert fo.read_range(path, 0, 2) == "".join(lines[:2])
+
+
+def test_iter_lines_and_split_characters(tmp_path):
+    fo = FileOps()
+    path = tmp_path / "utf8.txt"
+    path.write_bytes("café\r\nnaïve\nüber".encode("utf-8"))
+    assert "".join(fo.iter_range(str(path), chunk_size=1)) == "café\r\nnaïve\nüber"
+    assert list(fo.iter_lines(str(path))) == ["café", "naïve", "über"]
+    assert list(fo.iter_lines(str(path), 1, 2)) == ["naïve"]
+    # A byte range that splits a character does not raise
+    assert fo.read_range(str(path), 0, 4, by="bytes") == "caf�"
+
+
+def test_parse_line_range():
+    from app.file_operations import parse_line_range
+    assert parse_line_range("1000:2000") == (999, 2000)
+    assert parse_line_range(":10") == (0, 10)
+    assert parse_line_range("-100:") == (-100, None)
+    assert parse_line_range("-10:-1") == (-10, None)
+    assert parse_line_range("-10:-2") == (-10, -1)
+    for bad in ("0:5", "5", "a:b"):
+        with pytest.raises(ValueError):
+            parse_line_range(bad)
+
+
+def test_cli_file_read_ranges(tmp_path, monkeypatch):
+    from typer.testing import CliRunner
+    from app import file_operations
+    from app.cli_entry import app
+    runner = CliRunner()
+    path, lines = _lines_file(tmp_path)
+    result = runner.invoke(app, ["file", "read", path, "--lines", "2:3"])
+    assert result.exit_code == 0 and result.output == "".join(lines[1:3])
+    result = runner.invoke(app, ["file", "read", path, "--lines", "-1:"])
+    assert result.output == "tail\n"
+    result = runner.invoke(app, ["file", "read", path, "--bytes", "0:4"])
+    assert result.output == "line\n"
+    assert "[ERROR] Invalid range" in runner.invoke(app, ["file", "read", path, "--lines", "0:3"]).output
+    assert "[ERROR]" in runner.invoke(app, ["file", "read", str(tmp_path / "missing"), "--lines", "1:2"]).output
+    # Large files are streamed in chunks instead of read whole
+    monkeypatch.setattr(file_operations, "STREAM_THRESHOLD", 10)
+    monkeypatch.setattr(file_operations, "READ_CHUNK_SIZE", 8)
+    monkeypatch.setattr(file_operations, "read_file", lambda p: pytest.fail("read a large file whole"))
+    result = runner.invoke(app, ["file", "read", path])
+    assert result.output == "".join(lines) + "\n"
+
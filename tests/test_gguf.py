@@ -0,0 +1,150 @@
+import json
+import struct
+import time
+
+import pytest
+from typer.testing import CliRunner
+
+from app import gguf
+from app.cli_entry import app
+from app.gguf import GGUFError, encode_gguf, model_info, read_metadata
+from app.model_catalog import ModelCatalog
+from app.model_management import ModelManager
+
+Q4_K, Q6_K, F32 = 12, 14, 0
+
+
+def _header(blocks=2, vocab=1000, file_type=15):
+    meta = {
+        "general.architecture": "llama",
+        "general.name": "Tiny Llama",
+        "llama.context_length": 4096,
+        "llama.embedding_length": 64,
+        "llama.block_count": blocks,
+        "llama.attention.head_count": 8,
+        "tokenizer.ggml.tokens": [f"tok{i}" for i in range(vocab)],
+        "tokenizer.ggml.scores": [0.5] * vocab,
+        "tokenizer.ggml.eos_token_id": 2,
+    }
+    if file_type is not None:
+        meta["general.file_type"] = file_type
+    tensors = [("token_embd.weight", [64, vocab], Q4_K), ("output.weight", [64, vocab], Q6_K)]
+    for b in range(blocks):
+        tensors += [(f"blk.{b}.attn_q.weight", [64, 64], Q4_K), (f"blk.{b}.attn_norm.weight", [64], F32)]
+    return meta, tensors
+
+
+def _write(path, data, size=None):
+    with open(path, "wb") as f:
+        f.write(data)
+        if size:
+            # Sparse tail standing in for tensor data
+            f.truncate(size)
+    return str(path)
+
+
+def test_model_info_summary(tmp_path):
+    meta, tensors = _header()
+    info = model_info(_write(tmp_path / "tiny.gguf", encode_gguf(meta, tensors)))
+    assert info == {
+        "format": "gguf", "version": 3, "architecture": "llama", "name": "Tiny Llama",
+        "parameter_count": 2 * 64 * 1000 + 2 * (64 * 64 + 64), "quantization": "Q4_K_M",
+        "context_length": 4096, "tensor_count": 6, "embedding_length": 64, "block_count": 2,
+        "head_count": 8, "vocab_size": 1000,
+    }
+
+
+def test_metadata_arrays_are_summarised(tmp_path):
+    meta, tensors = _header(vocab=100)
+    meta["small.list"] = [1, 2, 3]
+    header = read_metadata(_write(tmp_path / "m.gguf", encode_gguf(meta, tensors)))
+    assert header["metadata"]["tokenizer.ggml.tokens"] == {"type": "string", "count": 100}
+    assert header["metadata"]["tokenizer.ggml.scores"] == {"type": "float32", "count": 100}
+    assert header["metadata"]["small.list"] == [1, 2, 3]
+    assert header["metadata"]["tokenizer.ggml.eos_token_id"] == 2
+    assert header["tensors"][0] == {"name": "token_embd.weight", "shape": [64, 100], "type": "Q4_K"}
+
+
+def test_quantization_falls_back_to_tensor_types(tmp_path):
+    meta, tensors = _header(file_type=None)
+    assert model_info(_write(tmp_path / "m.gguf", encode_gguf(meta, tensors)))["quantization"] == "Q4_K"
+
+
+def test_large_sparse_file_reads_only_the_header(tmp_path):
+    meta, tensors = _header(blocks=80, vocab=32000)
+    path = _write(tmp_path / "big.gguf", encode_gguf(meta, tensors), size=40 * 10**9)
+    start = time.perf_counter()
+    info = model_info(path)
+    assert time.perf_counter() - start < 1.0
+    assert info["tensor_count"] == 2 + 2 * 80 and info["vocab_size"] == 32000
+
+
+def test_legacy_ggjt_header(tmp_path):
+    data = struct.pack("<II7i", 0x67676A74, 3, 32000, 4096, 256, 32, 32, 128, 2)
+    info = model_info(_write(tmp_path / "old.bin", data))
+    assert info["format"] == "ggjt" and info["version"] == 3
+    assert info["quantization"] == "Q4_0" and info["block_count"] == 32 and info["vocab_size"] == 32000
+
+
+def test_invalid_files(tmp_path):
+    with pytest.raises(GGUFError):
+        model_info(_write(tmp_path / "empty.gguf", b""))
+    with pytest.raises(GGUFError):
+        model_info(_write(tmp_path / "torch.bin", b"PK\x03\x04" + b"\0" * 100))
+    meta, tensors = _header()
+    with pytest.raises(GGUFError):
+        model_info(_write(tmp_path / "cut.gguf", encode_gguf(meta, tensors)[:200]))
+
+
+@pytest.mark.parametrize("name,data", [("partial.gguf", b"GGUF\x03\x00"), ("partial.bin", b"tjgg\x01"),
+                                       ("short-ggml.bin", b"lmgg\x00\x01")])
+def test_truncated_headers(tmp_path, name, data):
+    # e.g. a download that has only just started
+    with pytest.raises(GGUFError, match="truncated"):
+        model_info(_write(tmp_path / name, data))
+    entries = ModelCatalog(str(tmp_path)).entries()
+    assert [e["info"] for e in entries] == [None]
+
+
+def test_catalog_and_manager_info(tmp_path, monkeypatch):
+    model_dir = tmp_path / "models"
+    model_dir.mkdir()
+    meta, tensors = _header()
+    _write(model_dir / "tiny.gguf", encode_gguf(meta, tensors))
+    _write(model_dir / "weights.bin", b"PK\x03\x04")
+    entries = {e["name"]: e for e in ModelCatalog(str(model_dir)).entries()}
+    assert entries["tiny.gguf"]["info"]["architecture"] == "llama"
+    assert entries["weights.bin"]["info"] is None
+
+    class DummyConf:
+        model_storage_path = str(model_dir)
+    mm = ModelManager(DummyConf())
+    # Served from the catalog without parsing the file again
+    monkeypatch.setattr(gguf, "model_info", lambda p: pytest.fail("re-parsed"))
+    info = mm.model_info("tiny.gguf")
+    assert info["quantization"] == "Q4_K_M" and info["path"] == str(model_dir / "tiny.gguf")
+
+
+def test_ollama_model_info(tmp_path, monkeypatch):
+    monkeypatch.setenv("OLLAMA_MODELS", str(tmp_path / "ollama"))
+    manifest = tmp_path / "ollama" / "manifests" / "registry.ollama.ai" / "library" / "tiny" / "latest"
+    manifest.parent.mkdir(parents=True)
+    manifest.write_text(json.dumps({"layers": [
+        {"mediaType": "application/vnd.ollama.image.license", "digest": "sha256:111"},
+        {"mediaType": "application/vnd.ollama.image.model", "digest": "sha256:abc"},
+    ]}))
+    (tmp_path / "ollama" / "blobs").mkdir()
+    meta, tensors = _header()
+    _write(tmp_path / "ollama" / "blobs" / "sha256-abc", encode_gguf(meta, tensors))
+
+    class DummyConf:
+        model_storage_path = str(tmp_path / "models")
+    monkeypatch.setattr("app.model_management.load_config", lambda: DummyConf())
+    runner = CliRunner()
+    result = runner.invoke(app, ["model", "info", "tiny"])
+    assert result.exit_code == 0
+    info = json.loads(result.output)
+    assert info["architecture"] == "llama" and info["path"].endswith("sha256-abc")
+    result = runner.invoke(app, ["model", "info", "nope"])
+    assert result.exit_code == 1
+    assert "[ERROR] Model 'nope' not found" in result.output
@@ -0,0 +1,96 @@
+import csv
+import gzip
+import json
+import os
+import pytest
+from app import history_export
+from app.session_history import SessionHistory
+
+def _history(tmp_path):
+    class DummyConf:
+        history_path = str(tmp_path / "hist.json")
+    sh = SessionHistory(config=DummyConf())
+    sh.append({"type": "cmd", "cmd": "ls", "output": "a\nb", "ts": 100})
+    sh.append({"type": "chat", "text": "hello", "ts": 200})
+    sh.rotate()
+    sh.append({"type": "cmd", "cmd": "pwd", "ts": 300})
+    return sh
+
+def test_raw_jsonl_export_spans_segments(tmp_path):
+    sh = _history(tmp_path)
+    out = tmp_path / "out.jsonl"
+    assert sh.export(str(out))
+    assert [json.loads(l)["ts"] for l in out.read_text().splitlines()] == [100, 200, 300]
+
+def test_raw_copy_falls_back_when_kernel_copy_fails(tmp_path, monkeypatch):
+    def unsupported(*a, **kw):
+        raise OSError("not supported")
+    monkeypatch.setattr(history_export.os, "copy_file_range", unsupported, raising=False)
+    sh = _history(tmp_path)
+    out = tmp_path / "out.jsonl"
+    assert sh.export(str(out))
+    assert len(out.read_text().splitlines()) == 3
+
+def test_gzip_export_reuses_segments(tmp_path):
+    sh = _history(tmp_path)
+    out = tmp_path / "out.jsonl.gz"
+    assert sh.export(str(out))
+    with gzip.open(out, "rt") as f:
+        assert [json.loads(l)["ts"] for l in f] == [100, 200, 300]
+
+def test_filtered_gzip_export(tmp_path):
+    sh = _history(tmp_path)
+    out = tmp_path / "cmds.gz"
+    assert sh.export(str(out), entry_type="cmd", since=150)
+    with gzip.open(out, "rt") as f:
+        assert [json.loads(l)["cmd"] for l in f] == ["pwd"]
+
+def test_json_array_export(tmp_path):
+    sh = _history(tmp_path)
+    out = tmp_path / "out.json"
+    assert sh.export(str(out), fmt="json")
+    assert [e["ts"] for e in json.loads(out.read_text())] == [100, 200, 300]
+    assert sh.export(str(out), fmt="json", until=50)
+    assert json.loads(out.read_text()) == []
+
+def test_json_file_name_exports_an_array(tmp_path):
+    sh = _history(tmp_path)
+    out = tmp_path / "out.json"
+    assert history_export.export_format_for(str(out)) == "json"
+    assert sh.export(str(out))
+    with open(out) as f:
+        assert [e["ts"] for e in json.load(f)] == [100, 200, 300]
+
+def test_csv_export(tmp_path):
+    sh = _history(tmp_path)
+    out = tmp_path / "out.csv"
+    assert sh.export(str(out), entry_type="cmd")
+    with open(out, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["index", "ts", "type", "entry"]
+    assert [r[0] for r in rows[1:]] == ["0", "2"]
+    assert json.loads(rows[2][3])["cmd"] == "pwd"
+
+def test_markdown_export(tmp_path):
+    sh = _history(tmp_path)
+    out = tmp_path / "out.md"
+    assert sh.export(str(out))
+    text = out.read_text()
+    assert text.startswith("# Coder-X session history")
+    assert "$ ls" in text and "a\nb" in text and '"text": "hello"' in text
+
+def test_unknown_format(tmp_path):
+    sh = _history(tmp_path)
+    assert not sh.export(str(tmp_path / "out.xml"), fmt="xml")
+    with pytest.raises(ValueError):
+        history_export.export_history(sh, str(tmp_path / "out.xml"), fmt="xml")
+
+def test_legacy_file_export(tmp_path):
+    path = tmp_path / "legacy.json"
+    path.write_text(json.dumps([{"cmd": "old"}], indent=2))
+    class DummyConf:
+        history_path = str(path)
+    sh = SessionHistory(config=DummyConf())
+    out = tmp_path / "out.jsonl"
+    assert sh.export(str(out))
+    assert out.read_text() == '{"cmd": "old"}\n'
@@ -0,0 +1,59 @@
+import os
+import pytest
+from app.session_history import SessionHistory
+from app.history_search import HistorySearchIndex, parse_timestamp
+
+def _history(tmp_path):
+    class DummyConf:
+        history_path = str(tmp_path / "hist.json")
+    return SessionHistory(config=DummyConf())
+
+def test_search_ranks_matches(tmp_path):
+    sh = _history(tmp_path)
+    sh.append({"cmd": "git status", "ts": 100})
+    sh.append({"cmd": "pytest tests", "output": "3 passed", "ts": 200})
+    sh.append({"cmd": "git commit -m fix", "ts": 300})
+    hits = sh.search("git")
+    assert sorted(h["index"] for h in hits) == [0, 2]
+    assert all("git" in h["entry"]["cmd"] for h in hits)
+    assert os.path.exists(sh.search_path)
+    assert sh.search("nonexistent") == []
+
+def test_search_field_and_time_filters(tmp_path):
+    sh = _history(tmp_path)
+    sh.append({"cmd": "build", "note": "deploy later", "ts": 100})
+    sh.append({"cmd": "deploy", "ts": "1970-01-01T00:05:00+00:00"})
+    assert [h["index"] for h in sh.search("deploy", field="cmd")] == [1]
+    assert [h["index"] for h in sh.search("deploy", until=200)] == [0]
+    assert [h["index"] for h in sh.search("deploy", since=250)] == [1]
+
+def test_search_index_updates_on_append(tmp_path):
+    sh = _history(tmp_path)
+    sh.append({"cmd": "first"})
+    assert sh.search("first")
+    sh.append({"cmd": "second"})
+    index = HistorySearchIndex(sh.search_path)
+    # The append already brought the on-disk index up to date
+    assert [k for k, _ in index.search("second")] == [1]
+    index.close()
+
+def test_search_index_rebuilt_after_clear(tmp_path):
+    sh = _history(tmp_path)
+    sh.append({"cmd": "old entry"})
+    assert sh.search("old")
+    sh.clear()
+    sh.append({"cmd": "new entry"})
+    assert sh.search("old") == []
+    assert [h["entry"] for h in sh.search("new")] == [{"cmd": "new entry"}]
+
+def test_search_quotes_query_syntax(tmp_path):
+    sh = _history(tmp_path)
+    sh.append("plain string entry")
+    assert [h["index"] for h in sh.search('entry"')] == [0]
+    assert sh.search("   ") == []
+
+@pytest.mark.parametrize("value,expected", [
+    (12, 12.0), ("12.5", 12.5), ("1970-01-01T00:01:00Z", 60.0), ("nope", None), (None, None),
+])
+def test_parse_timestamp(value, expected):
+    assert parse_timestamp(value) == expected
@@ -0,0 +1,118 @@
+import json
+import os
+import pytest
+from app.session_history import SessionHistory
+from app.history_segments import SegmentStore
+
+def _history(tmp_path, **settings):
+    class DummyConf:
+        history_path = str(tmp_path / "hist.json")
+    for key, value in settings.items():
+        setattr(DummyConf, key, value)
+    return SessionHistory(config=DummyConf())
+
+def test_rotates_by_size(tmp_path):
+    sh = _history(tmp_path, history_segment_max_bytes=40)
+    for i in range(10):
+        sh.append({"i": i, "pad": "xxxxxxxxxx"})
+    segs = sh.segments.segments
+    # Each line is 32 bytes, so the hot file crosses 40 bytes every second append
+    assert [s["entries"] for s in segs] == [2] * 5
+    assert all(s["file"].endswith(".jsonl.gz") for s in segs)
+    assert os.path.getsize(sh.history_path) == 0
+    assert [e["i"] for e in sh.iter_entries()] == list(range(10))
+
+def test_reads_span_segments_and_hot_file(tmp_path):
+    sh = _history(tmp_path, history_segment_compression="lzma")
+    for i in range(3):
+        sh.append({"i": i})
+    sh.rotate()
+    for i in range(3, 5):
+        sh.append({"i": i})
+    sh.rotate()
+    for i in range(5, 8):
+        sh.append({"i": i})
+    assert sh.segments.segments[0]["file"].endswith(".jsonl.xz")
+    assert sh.count() == 8
+    assert sh.entry(4) == {"i": 4}
+    assert sh.entry(-1) == {"i": 7}
+    assert [e["i"] for e in sh.entries(2, 6)] == [2, 3, 4, 5]
+    assert [e["i"] for e in sh.tail(6)] == [2, 3, 4, 5, 6, 7]
+    assert [e["i"] for e in sh.load()] == list(range(8))
+    with pytest.raises(IndexError):
+        sh.entry(8)
+
+def test_rotates_by_age(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.session_history.time.time", lambda: now[0])
+    monkeypatch.setattr("app.history_segments.time.time", lambda: now[0])
+    sh = _history(tmp_path, history_segment_max_age=60)
+    sh.append({"i": 0})
+    assert sh.segments.hot_started() == 1000.0
+    now[0] = 1061.0
+    sh.append({"i": 1})
+    assert len(sh.segments.segments) == 1
+    assert sh.segments.segments[0]["entries"] == 2
+    assert sh.segments.hot_started() is None
+
+def test_export_streams_across_segments(tmp_path):
+    sh = _history(tmp_path)
+    sh.append({"i": 0})
+    sh.rotate()
+    sh.append({"i": 1})
+    out = tmp_path / "export.jsonl"
+    assert sh.export(str(out))
+    assert [json.loads(l) for l in out.read_text().splitlines()] == [{"i": 0}, {"i": 1}]
+
+def test_clear_removes_segments(tmp_path):
+    sh = _history(tmp_path)
+    sh.append({"i": 0})
+    seg = sh.rotate()
+    sh.append({"i": 1})
+    sh.clear()
+    assert sh.load() == []
+    assert not os.path.exists(sh.segments.segment_path(seg))
+    assert not os.path.exists(sh.segments.manifest_path)
+
+def test_compact_drops_or_summarizes(tmp_path):
+    sh = _history(tmp_path)
+    for i in range(4):
+        sh.append({"i": i, "ts": 100 + i})
+        sh.rotate()
+    sh.append({"i": 4})
+    assert sh.compact(keep_segments=2) == 2
+    assert [e["i"] for e in sh.load()] == [2, 3, 4]
+    assert sh.compact(keep_segments=0, summarize=True) == 1
+    entries = sh.load()
+    assert entries[0] == {"type": "summary", "summarized_entries": 2, "first_ts": 102, "last_ts": 103}
+    assert entries[1:] == [{"i": 4}]
+
+def test_compact_by_age_and_search_reset(tmp_path):
+    sh = _history(tmp_path)
+    sh.append({"cmd": "ancient", "ts": 1})
+    sh.rotate()
+    sh.append({"cmd": "recent"})
+    assert sh.search("ancient")
+    assert sh.compact(max_age_days=1) == 1
+    assert sh.search("ancient") == []
+    assert [h["entry"]["cmd"] for h in sh.search("recent")] == ["recent"]
+
+def test_retention_applied_on_rotation(tmp_path):
+    sh = _history(tmp_path, history_segment_max_bytes=1, history_retention_days=1)
+    sh.append({"i": 0, "ts": 1})
+    sh.append({"i": 1})
+    assert [e["i"] for e in sh.load()] == [1]
+
+def test_interrupted_rotation_is_recovered(tmp_path):
+    sh = _history(tmp_path)
+    sh.append({"i": 0})
+    # Simulate a crash right after the hot file was moved aside
+    os.replace(sh.history_path, sh.segments.rotating_path)
+    open(sh.history_path, "w").close()
+    sh2 = _history(tmp_path)
+    assert sh2.load() == [{"i": 0}]
+    assert not os.path.exists(sh2.segments.rotating_path)
+
+def test_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        SegmentStore(str(tmp_path / "h.json"), "bz2")
@@ -0,0 +1,120 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+import pytest
+from app.history_writer import BufferedHistoryWriter
+from app.session_history import SessionHistory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _history(tmp_path, **settings):
+    class DummyConf:
+        history_path = str(tmp_path / "hist.json")
+        history_durability = "buffered"
+    for key, value in settings.items():
+        setattr(DummyConf, key, value)
+    return SessionHistory(config=DummyConf())
+
+def _lines_on_disk(sh):
+    with open(sh.history_path) as f:
+        return [json.loads(l) for l in f.read().splitlines()]
+
+def test_batches_by_entry_count(tmp_path):
+    sh = _history(tmp_path, history_flush_entries=3, history_flush_interval_ms=60000)
+    sh.append({"i": 0})
+    sh.append({"i": 1})
+    time.sleep(0.05)
+    assert _lines_on_disk(sh) == []
+    sh.append({"i": 2})
+    deadline = time.time() + 5
+    while not _lines_on_disk(sh) and time.time() < deadline:
+        time.sleep(0.01)
+    assert _lines_on_disk(sh) == [{"i": 0}, {"i": 1}, {"i": 2}]
+    sh.close()
+
+def test_batches_by_interval(tmp_path):
+    sh = _history(tmp_path, history_flush_entries=1000, history_flush_interval_ms=20)
+    sh.append({"i": 0})
+    deadline = time.time() + 5
+    while not _lines_on_disk(sh) and time.time() < deadline:
+        time.sleep(0.01)
+    assert _lines_on_disk(sh) == [{"i": 0}]
+    sh.close()
+
+def test_reads_see_queued_entries(tmp_path):
+    sh = _history(tmp_path, history_flush_entries=1000, history_flush_interval_ms=60000)
+    for i in range(5):
+        sh.append({"i": i})
+    assert [e["i"] for e in sh.load()] == list(range(5))
+    assert sh.tail(1) == [{"i": 4}]
+    sh.close()
+    # Appends after close fall back to synchronous writes
+    sh.append({"i": 5})
+    assert _lines_on_disk(sh)[-1] == {"i": 5}
+
+def test_search_after_buffered_append(tmp_path):
+    sh = _history(tmp_path, history_flush_entries=1, history_flush_interval_ms=0)
+    sh.append({"msg": "hello world"})
+    assert [hit["entry"] for hit in sh.search("hello")] == [{"msg": "hello world"}]
+    # The index now exists, so later batches keep it current without touching SQLite
+    # from the writer thread
+    sh.append({"msg": "hello again"})
+    sh.flush()
+    assert len(sh.search("hello")) == 2
+    sh.close()
+
+def test_background_error_is_raised_on_flush():
+    def boom(lines):
+        raise OSError("disk full")
+    writer = BufferedHistoryWriter(boom, max_entries=1)
+    writer.submit("x\n")
+    with pytest.raises(OSError):
+        writer.flush()
+    writer.close()
+
+def test_fsync_durability(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr("app.session_history.os.fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+    sh = _history(tmp_path, history_durability="fsync")
+    sh.append({"i": 0})
+    assert len(synced) == 1
+    assert _lines_on_disk(sh) == [{"i": 0}]
+
+def _run_child(tmp_path, body):
+    script = textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {ROOT!r})
+        from app.session_history import SessionHistory
+        class Conf:
+            history_path = {str(tmp_path / "hist.json")!r}
+            history_durability = "buffered"
+            history_flush_entries = 1000
+            history_flush_interval_ms = 60000
+        sh = SessionHistory(config=Conf())
+        for i in range(10):
+            sh.append({{"i": i}})
+    """) + textwrap.dedent(body)
+    return subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE)
+
+def test_flushed_at_interpreter_exit(tmp_path):
+    proc = _run_child(tmp_path, "")
+    assert proc.wait(timeout=30) == 0
+    with open(tmp_path / "hist.json") as f:
+        assert len(f.read().splitlines()) == 10
+
+def test_flushed_on_sigterm(tmp_path):
+    proc = _run_child(tmp_path, """
+        import time
+        print("ready", flush=True)
+        time.sleep(60)
+    """)
+    assert proc.stdout.readline().strip() == b"ready"
+    proc.send_signal(signal.SIGTERM)
+    assert proc.wait(timeout=30) == -signal.SIGTERM
+    with open(tmp_path / "hist.json") as f:
+        assert len(f.read().splitlines()) == 10
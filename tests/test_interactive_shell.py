@@ -113,6 +113,14 @@ def test_file_read(monkeypatch):
     output2 = shell.run_once("/file-read /notfound")
     assert "Could not read file" in output2
 
+def test_file_read_line_range(tmp_path):
+    shell = DummyShell()
+    path = tmp_path / "data.log"
+    path.write_text("a\nb\nc\nd")
+    assert shell.run_once(f"/file-read {path} 2:3") == "b\nc\n"
+    assert shell.run_once(f"/file-read {path} -1:") == "d\n"
+    assert "Could not read file" in shell.run_once(f"/file-read {path} x")
+
 def test_file_write(monkeypatch):
     shell = DummyShell()
     called = {}
@@ -0,0 +1,108 @@
+import json
+import random
+from datetime import date, timedelta
+from app import latency_stats, profiling
+from app.latency_stats import Histogram, LatencyRecorder, bucket_bounds, bucket_index, load_days, summarize
+
+def test_buckets_cover_values_with_bounded_error():
+    previous_high = -1
+    for index in range(latency_stats.BUCKET_COUNT):
+        low, high = bucket_bounds(index)
+        assert low == previous_high + 1
+        previous_high = high
+        assert bucket_index(low) == index and bucket_index(high) == index
+        assert (high - low) <= max(1, low / latency_stats.SUB_BUCKETS)
+    assert previous_high == latency_stats.MAX_VALUE_US
+    assert bucket_index(latency_stats.MAX_VALUE_US * 10) == latency_stats.BUCKET_COUNT - 1
+
+def test_percentiles_and_merge():
+    rng = random.Random(1)
+    values = [rng.randint(1, 1_000_000) for _ in range(5000)]
+    a, b, both = Histogram(), Histogram(), Histogram()
+    for i, v in enumerate(values):
+        (a if i % 2 else b).record(v, when=1000.0 + i)
+        both.record(v, when=1000.0 + i)
+    a.merge(b)
+    assert list(a.counts) == list(both.counts)
+    assert (a.count, a.total_us, a.min_us, a.max_us) == (both.count, both.total_us, both.min_us, both.max_us)
+    assert (a.first_ts, a.last_ts) == (1000.0, 1000.0 + 4999)
+    ordered = sorted(values)
+    for p in (50, 90, 99):
+        exact = ordered[int(p / 100 * len(values)) - 1]
+        assert abs(a.percentile(p) - exact) / exact < 0.07
+    assert Histogram().percentile(50) is None
+
+def test_dict_roundtrip_is_sparse():
+    h = Histogram()
+    for v in (5, 500, 50_000):
+        h.record(v)
+    data = json.loads(json.dumps(h.to_dict()))
+    assert len(data["buckets"]) == 3
+    assert list(Histogram.from_dict(data).counts) == list(h.counts)
+
+def test_recorder_merges_into_daily_file_and_prunes(tmp_path):
+    today = date(2026, 3, 10)
+    old = tmp_path / f"latency-{(today - timedelta(days=40)).isoformat()}.json"
+    old.write_text("{}")
+    for _ in range(2):
+        rec = LatencyRecorder(str(tmp_path))
+        rec.record("command.file", 2000)
+        rec.record("shell.run", 40_000)
+        rec.flush(today=today)
+    assert not old.exists()
+    merged = load_days(1, str(tmp_path), today=today)
+    assert merged["command.file"].count == 2 and merged["shell.run"].max_us == 40_000
+    rec = LatencyRecorder(str(tmp_path))
+    rec.record("command.file", 3000)
+    rec.flush(today=today - timedelta(days=1))
+    assert load_days(2, str(tmp_path), today=today)["command.file"].count == 3
+
+def test_summarize_rows():
+    h = Histogram()
+    for v in (1000, 2000, 3000):
+        h.record(v, when=0.0)
+    h.record(4000, when=60.0)
+    (row,) = summarize({"model.list_ollama": h, "other": Histogram()})
+    assert row["op"] == "model.list_ollama" and row["count"] == 4
+    assert row["max_ms"] == 4.0 and row["per_min"] == 4.0
+    assert summarize({"a.x": h}, prefix="b") == []
+
+def test_spans_feed_stats(tmp_path, monkeypatch):
+    monkeypatch.setenv("CODER_X_STATS_DIR", str(tmp_path))
+    monkeypatch.setattr(latency_stats, "_recorder", None)
+    profiling.reset()
+    try:
+        assert latency_stats.start() is not None
+        with profiling.span("mcp.get_context"):
+            pass
+        # Stats alone neither turn profiling on nor keep a span tree
+        assert not profiling.enabled() and profiling.roots() == []
+
+        @profiling.timed("history.load")
+        def load():
+            return 7
+        assert load() == 7
+        latency_stats.flush()
+    finally:
+        profiling.reset()
+        profiling._listeners.clear()
+    merged = load_days(1, str(tmp_path))
+    assert merged["mcp.get_context"].count == 1 and merged["history.load"].count == 1
+
+def test_stats_disabled(monkeypatch):
+    monkeypatch.setenv("CODER_X_STATS", "0")
+    assert latency_stats.start() is None
+
+def test_stats_command(tmp_path, monkeypatch):
+    from typer.testing import CliRunner
+    from app.cli_entry import app
+    monkeypatch.setenv("CODER_X_STATS_DIR", str(tmp_path))
+    rec = LatencyRecorder(str(tmp_path))
+    rec.record("command.history", 12_000)
+    rec.flush()
+    result = CliRunner().invoke(app, ["stats", "--json", "--op", "command."])
+    assert result.exit_code == 0
+    rows = json.loads(result.output)
+    assert [r["op"] for r in rows] == ["command.history"]
+    result = CliRunner().invoke(app, ["stats"])
+    assert "command.history" in result.output and "p99 ms" in result.output
@@ -0,0 +1,141 @@
+import json
+import os
+import time
+
+from app import model_catalog
+from app.model_catalog import CATALOG_NAME, ModelCatalog, sampled_hash
+
+
+def _age(path, seconds=10):
+    """Push path's mtime out of the racy window so the catalog trusts it."""
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def _models(tmp_path):
+    model_dir = tmp_path / "models"
+    model_dir.mkdir()
+    (model_dir / "llama.gguf").write_bytes(b"g" * 1000)
+    (model_dir / "tiny.bin").write_bytes(b"b" * 10)
+    (model_dir / "README.md").write_text("not a model")
+    nested = model_dir / "mistral"
+    nested.mkdir()
+    (nested / "weights.pth").write_bytes(b"w" * 300)
+    return model_dir
+
+
+def test_entries_formats_and_sizes(tmp_path):
+    model_dir = _models(tmp_path)
+    entries = {e["name"]: e for e in ModelCatalog(str(model_dir)).entries()}
+    assert set(entries) == {"llama.gguf", "tiny.bin", "mistral"}
+    assert entries["llama.gguf"]["format"] == "gguf"
+    assert entries["llama.gguf"]["size"] == 1000
+    assert entries["llama.gguf"]["hash"].startswith("sample:")
+    assert entries["mistral"]["format"] == "dir"
+    assert entries["mistral"]["size"] == 300
+    assert entries["mistral"]["hash"] is None
+    # The catalog itself is never listed
+    assert os.path.exists(model_dir / CATALOG_NAME)
+
+
+def test_query_by_format_and_size(tmp_path):
+    catalog = ModelCatalog(str(_models(tmp_path)))
+    assert [e["name"] for e in catalog.query(fmt="gguf")] == ["llama.gguf"]
+    assert [e["name"] for e in catalog.query(min_size=100)] == ["llama.gguf", "mistral"]
+    assert [e["name"] for e in catalog.query(max_size=300)] == ["mistral", "tiny.bin"]
+    assert catalog.query(fmt="ggml") == []
+
+
+def test_unchanged_directory_is_not_rescanned(tmp_path, monkeypatch):
+    model_dir = _models(tmp_path)
+    catalog = ModelCatalog(str(model_dir))
+    catalog.entries()
+    _age(model_dir)
+    assert catalog.refresh()
+    assert not catalog.refresh()
+
+    # A fresh catalog (another process) loads the persisted index without scanning
+    def fail(*a, **kw):
+        raise AssertionError("rescanned")
+    monkeypatch.setattr(model_catalog.os, "scandir", fail)
+    names = [e["name"] for e in ModelCatalog(str(model_dir)).entries()]
+    assert names == ["llama.gguf", "mistral", "tiny.bin"]
+
+
+def test_rescan_is_incremental(tmp_path, monkeypatch):
+    model_dir = _models(tmp_path)
+    catalog = ModelCatalog(str(model_dir))
+    catalog.entries()
+    hashed = []
+    real_hash = model_catalog.sampled_hash
+    monkeypatch.setattr(model_catalog, "sampled_hash", lambda p, s: hashed.append(os.path.basename(p)) or real_hash(p, s))
+    (model_dir / "new.ggml").write_bytes(b"n" * 50)
+    os.remove(model_dir / "tiny.bin")
+    names = [e["name"] for e in catalog.entries()]
+    assert names == ["llama.gguf", "mistral", "new.ggml"]
+    assert hashed == ["new.ggml"]
+
+
+def test_forced_refresh_sees_in_place_rewrites(tmp_path):
+    model_dir = _models(tmp_path)
+    catalog = ModelCatalog(str(model_dir))
+    before = catalog.get("llama.gguf")["hash"]
+    _age(model_dir)
+    catalog.refresh()
+    (model_dir / "llama.gguf").write_bytes(b"x" * 2000)
+    assert catalog.get("llama.gguf")["size"] == 1000
+    catalog.refresh(force=True)
+    assert catalog.get("llama.gguf")["size"] == 2000
+    assert catalog.get("llama.gguf")["hash"] != before
+
+
+def test_sampled_hash_large_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_catalog, "HASH_SAMPLE_SIZE", 4)
+    path = tmp_path / "big.bin"
+    path.write_bytes(b"a" * 100)
+    first = sampled_hash(str(path), 100)
+    # A change outside the sampled blocks is not seen; one inside them is
+    path.write_bytes(b"a" * 20 + b"b" + b"a" * 79)
+    assert sampled_hash(str(path), 100) == first
+    path.write_bytes(b"a" * 50 + b"b" + b"a" * 49)
+    assert sampled_hash(str(path), 100) != first
+
+
+def test_missing_storage_path(tmp_path):
+    catalog = ModelCatalog(str(tmp_path / "missing"))
+    assert catalog.entries() == []
+    assert not os.path.exists(tmp_path / "missing")
+
+
+def test_corrupt_catalog_is_rebuilt(tmp_path):
+    model_dir = _models(tmp_path)
+    (model_dir / CATALOG_NAME).write_text("{not json")
+    assert len(ModelCatalog(str(model_dir)).entries()) == 3
+    with open(model_dir / CATALOG_NAME) as f:
+        assert json.load(f)["version"] == model_catalog.CATALOG_VERSION
+
+
+def test_ollama_models_cached_until_manifests_change(tmp_path):
+    manifests = tmp_path / "manifests" / "registry.ollama.ai" / "library"
+    manifests.mkdir(parents=True)
+    calls = []
+    models = [{"name": "llama2:latest", "size": 3_800_000_000, "digest": "78e26419b446", "modified": "2 days ago"}]
+
+    def list_models():
+        calls.append(1)
+        return [dict(m) for m in models]
+
+    for path in (manifests, manifests.parent, manifests.parent.parent):
+        _age(path)
+    catalog = ModelCatalog(str(_models(tmp_path)))
+    manifests_dir = str(tmp_path / "manifests")
+    assert catalog.ollama_models(list_models, manifests_dir) == models
+    assert catalog.ollama_models(list_models, manifests_dir) == models
+    assert len(calls) == 1
+    (manifests / "mistral").mkdir()
+    catalog.ollama_models(list_models, manifests_dir)
+    assert len(calls) == 2
+    # Without a manifest directory nothing is cached
+    catalog.ollama_models(list_models, str(tmp_path / "nowhere"))
+    catalog.ollama_models(list_models, str(tmp_path / "nowhere"))
+    assert len(calls) == 4
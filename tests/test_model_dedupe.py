@@ -0,0 +1,209 @@
+import json
+import os
+
+import pytest
+from typer.testing import CliRunner
+
+from app import model_catalog, model_dedupe
+from app.cli_entry import app
+from app.model_dedupe import HashCache, dedupe, replace_with_link
+
+
+@pytest.fixture
+def volumes(tmp_path, monkeypatch):
+    # Small samples and segments so a few KB exercise every pass
+    monkeypatch.setattr(model_catalog, "HASH_SAMPLE_SIZE", 16)
+    monkeypatch.setattr(model_dedupe, "HASH_SEGMENT_SIZE", 1000)
+    monkeypatch.setenv("CODER_X_DEDUPE_CACHE", str(tmp_path / "cache.json"))
+    a, b = tmp_path / "vol_a", tmp_path / "vol_b" / "blobs"
+    b.mkdir(parents=True)
+    a.mkdir()
+    weights = os.urandom(5000)
+    (a / "llama.gguf").write_bytes(weights)
+    (b / "sha256-1111").write_bytes(weights)
+    (b / "copy.gguf").write_bytes(weights)
+    # Same size and same sampled blocks, different in between: only the full hash tells
+    (b / "near.gguf").write_bytes(weights[:2000] + bytes(100) + weights[2100:])
+    (b / "other.bin").write_bytes(os.urandom(5000))
+    (b / "small.bin").write_bytes(weights[:10])
+    for path in list(a.iterdir()) + list(b.iterdir()):
+        _age(path)
+    return [str(a), str(tmp_path / "vol_b")]
+
+
+def _age(path, seconds=60):
+    # Older than the racy window, so hashes of the file may be cached
+    t = os.stat(path).st_mtime - seconds
+    os.utime(path, (t, t))
+
+
+def _ino(path):
+    return os.stat(path).st_ino
+
+
+def test_dry_run_reports_without_changes(volumes):
+    report = dedupe(volumes, dry_run=True, min_size=100)
+    assert report["files_scanned"] == 5
+    assert len(report["groups"]) == 1
+    group = report["groups"][0]
+    assert group["keeper"] == os.path.join(os.path.realpath(volumes[0]), "llama.gguf")
+    assert sorted(os.path.basename(d["path"]) for d in group["duplicates"]) == ["copy.gguf", "sha256-1111"]
+    assert {d["action"] for d in group["duplicates"]} == {"would link"}
+    assert report["reclaimable_bytes"] == 10000 and report["reclaimed_bytes"] == 0
+    assert len({_ino(os.path.join(volumes[1], "blobs", n)) for n in ("copy.gguf", "sha256-1111")}) == 2
+
+
+def test_prefilter_skips_full_hash_of_unique_files(volumes, monkeypatch):
+    hashed = []
+    real = model_dedupe.full_hash
+    monkeypatch.setattr(model_dedupe, "full_hash", lambda p, s, pool: hashed.append(p) or real(p, s, pool))
+    dedupe(volumes, min_size=100)
+    # other.bin differs in its sampled blocks; near.gguf needs the full read
+    assert sorted(os.path.basename(p) for p in hashed) == ["copy.gguf", "llama.gguf", "near.gguf", "sha256-1111"]
+
+
+def test_apply_hardlinks_and_is_idempotent(volumes):
+    report = dedupe(volumes, dry_run=False, link="hardlink", min_size=100)
+    assert report["reclaimed_bytes"] == 10000
+    keeper = report["groups"][0]["keeper"]
+    for d in report["groups"][0]["duplicates"]:
+        assert d["action"] == "hardlink"
+        assert _ino(d["path"]) == _ino(keeper)
+    assert not [n for n in os.listdir(os.path.join(volumes[1], "blobs")) if "coder-x-dedupe" in n]
+    # Linked files now count once
+    assert dedupe(volumes, dry_run=False, min_size=100)["groups"] == []
+
+
+def test_hash_cache_persists_between_runs(volumes, monkeypatch, tmp_path):
+    first = dedupe(volumes, min_size=100)
+    assert first["bytes_hashed"] == 20000
+    cached = json.loads((tmp_path / "cache.json").read_text())["files"]
+    assert all(e.get("partial") for e in cached.values())
+    monkeypatch.setattr(model_dedupe, "full_hash", lambda *a: pytest.fail("re-hashed"))
+    monkeypatch.setattr(model_dedupe, "sampled_hash", lambda *a: pytest.fail("re-sampled"))
+    second = dedupe(volumes, min_size=100)
+    assert second["bytes_hashed"] == 0 and second["groups"] == first["groups"]
+
+
+def test_changed_file_is_rehashed(volumes, tmp_path):
+    dedupe(volumes, min_size=100)
+    path = os.path.join(volumes[1], "blobs", "copy.gguf")
+    with open(path, "r+b") as f:
+        f.write(b"X")
+    report = dedupe(volumes, min_size=100, cache=HashCache(str(tmp_path / "cache.json")))
+    # Modified just now: inside the racy window, so the new hashes are not cached
+    entry = json.loads((tmp_path / "cache.json").read_text())["files"][os.path.realpath(path)]
+    assert entry["mtime_ns"] != os.stat(path).st_mtime_ns
+    assert [os.path.basename(d["path"]) for d in report["groups"][0]["duplicates"]] == ["sha256-1111"]
+
+
+def test_other_filesystem_is_only_reported(volumes, monkeypatch):
+    real = model_dedupe._device
+    monkeypatch.setattr(model_dedupe, "_device", lambda p: -1 if "copy" in p else real(p))
+    report = dedupe(volumes, dry_run=False, link="hardlink", min_size=100)
+    actions = {os.path.basename(d["path"]): d for d in report["groups"][0]["duplicates"]}
+    assert actions["copy.gguf"]["action"] == "skip" and actions["copy.gguf"]["reason"] == "different filesystem"
+    assert actions["sha256-1111"]["action"] == "hardlink"
+    assert report["reclaimable_bytes"] == report["reclaimed_bytes"] > 0
+
+
+def test_duplicate_changed_after_hashing_is_not_reclaimable(volumes, monkeypatch):
+    edited = os.path.join(volumes[1], "blobs", "copy.gguf")
+    real = model_dedupe.find_duplicates
+
+    def then_edit(*args, **kwargs):
+        groups = real(*args, **kwargs)
+        with open(edited, "ab") as f:
+            f.write(b"X")
+        return groups
+    monkeypatch.setattr(model_dedupe, "find_duplicates", then_edit)
+    report = dedupe(volumes, dry_run=True, min_size=100)
+    actions = {os.path.basename(d["path"]): d for d in report["groups"][0]["duplicates"]}
+    assert actions["copy.gguf"]["action"] == "skip"
+    assert actions["sha256-1111"]["action"] == "would link"
+    assert report["reclaimable_bytes"] == report["groups"][0]["size"]
+    assert report["reclaimable_bytes"] == 5000
+
+
+def test_only_model_files_are_considered(volumes):
+    data = os.urandom(5000)
+    for root in volumes:
+        with open(os.path.join(root, "backup.iso"), "wb") as f:
+            f.write(data)
+    with open(os.path.join(volumes[0], "sha256-2222"), "wb") as f:
+        f.write(data)
+    report = dedupe(volumes, dry_run=False, link="hardlink", min_size=100)
+    # Neither the disk image nor a sha256- name outside blobs/ is a model
+    assert report["files_scanned"] == 5
+    assert _ino(os.path.join(volumes[0], "backup.iso")) != _ino(os.path.join(volumes[1], "backup.iso"))
+
+
+def test_keeper_changed_after_hashing_is_not_linked(volumes, monkeypatch):
+    keeper = os.path.join(volumes[0], "llama.gguf")
+    real = model_dedupe.find_duplicates
+
+    def then_edit_keeper(*args, **kwargs):
+        groups = real(*args, **kwargs)
+        with open(keeper, "r+b") as f:
+            f.write(b"X")
+        return groups
+    monkeypatch.setattr(model_dedupe, "find_duplicates", then_edit_keeper)
+    report = dedupe(volumes, dry_run=False, link="hardlink", min_size=100)
+    for d in report["groups"][0]["duplicates"]:
+        assert d["action"] == "skip" and d["reason"] == "keeper changed since it was hashed"
+        assert _ino(d["path"]) != _ino(keeper)
+    assert report["reclaimed_bytes"] == 0
+
+
+def test_file_removed_mid_run_is_skipped(volumes, monkeypatch):
+    gone = os.path.join(volumes[1], "blobs", "copy.gguf")
+    real = model_dedupe.find_duplicates
+
+    def then_remove(*args, **kwargs):
+        groups = real(*args, **kwargs)
+        os.remove(gone)
+        return groups
+    monkeypatch.setattr(model_dedupe, "find_duplicates", then_remove)
+    report = dedupe(volumes, dry_run=False, link="hardlink", min_size=100)
+    actions = {os.path.basename(d["path"]): d for d in report["groups"][0]["duplicates"]}
+    assert actions["copy.gguf"]["action"] == "skip" and "No such file" in actions["copy.gguf"]["reason"]
+    assert actions["sha256-1111"]["action"] == "hardlink"
+
+
+def test_file_removed_before_hashing_is_left_out(volumes, monkeypatch):
+    real_sample = model_dedupe.sampled_hash
+
+    def vanishing(path, size):
+        if path.endswith("copy.gguf"):
+            raise FileNotFoundError(path)
+        return real_sample(path, size)
+    monkeypatch.setattr(model_dedupe, "sampled_hash", vanishing)
+    report = dedupe(volumes, min_size=100)
+    assert [os.path.basename(d["path"]) for d in report["groups"][0]["duplicates"]] == ["sha256-1111"]
+
+
+def test_reflink_failure_falls_back_or_errors(tmp_path, monkeypatch):
+    keeper, dup = tmp_path / "a", tmp_path / "b"
+    keeper.write_bytes(b"same")
+    dup.write_bytes(b"same")
+
+    def no_reflink(src, dst):
+        open(dst, "wb").close()
+        raise OSError(95, "Operation not supported")
+    monkeypatch.setattr(model_dedupe, "_reflink", no_reflink)
+    with pytest.raises(OSError, match="reflink"):
+        replace_with_link(str(keeper), str(dup), "reflink")
+    assert dup.read_bytes() == b"same" and sorted(os.listdir(tmp_path)) == ["a", "b"]
+    assert replace_with_link(str(keeper), str(dup), "auto") == "hardlink"
+    assert _ino(dup) == _ino(keeper)
+
+
+def test_cli_dedupe(volumes):
+    runner = CliRunner()
+    result = runner.invoke(app, ["model", "dedupe", *volumes, "--min-size", "100"])
+    assert result.exit_code == 0
+    assert "[INFO] Dry run: would reclaim 0.00 GB from 2 duplicate file(s)." in result.output
+    result = runner.invoke(app, ["model", "dedupe", *volumes, "--min-size", "100", "--apply", "--link", "hardlink"])
+    assert result.exit_code == 0 and "[OK] Reclaimed" in result.output
+    result = runner.invoke(app, ["model", "dedupe", *volumes, "--link", "copy"])
+    assert result.exit_code == 1 and "[ERROR] link must be one of" in result.output
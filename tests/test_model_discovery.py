@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+
+from app import model_discovery
+from app.model_discovery import discover_models, discover_volumes, scan_models
+from app.model_management import ModelManager
+
+
+def _tree(root):
+    (root / "a" / "b" / "c").mkdir(parents=True)
+    (root / "top.gguf").write_bytes(b"x" * 10)
+    (root / "notes.txt").write_text("not a model")
+    (root / "a" / "one.bin").write_bytes(b"x" * 20)
+    (root / "a" / "b" / "two.pth").write_bytes(b"x" * 30)
+    (root / "a" / "b" / "c" / "deep.ggml").write_bytes(b"x" * 40)
+    return root
+
+
+def _names(found):
+    return sorted(m["name"] for m in found)
+
+
+def test_scan_models_depth(tmp_path):
+    root = str(_tree(tmp_path))
+    assert _names(scan_models(root, max_depth=0)) == ["top.gguf"]
+    assert _names(scan_models(root, max_depth=2)) == ["one.bin", "top.gguf", "two.pth"]
+    found = {m["name"]: m for m in scan_models(root, max_depth=5)}
+    assert sorted(found) == ["deep.ggml", "one.bin", "top.gguf", "two.pth"]
+    assert found["deep.ggml"]["size"] == 40
+    assert found["two.pth"]["format"] == "pytorch"
+
+
+def test_discover_models_reports_each_volume(tmp_path):
+    vol1 = _tree(tmp_path / "vol1")
+    vol2 = tmp_path / "vol2"
+    vol2.mkdir()
+    (vol2 / "m.gguf").write_bytes(b"x")
+    scans = discover_models([str(vol1), str(vol2), str(tmp_path / "missing")], max_depth=1)
+    assert list(scans) == [str(vol1), str(vol2), str(tmp_path / "missing")]
+    assert _names(scans[str(vol1)].found) == ["one.bin", "top.gguf"]
+    assert scans[str(vol2)].complete
+    missing = scans[str(tmp_path / "missing")]
+    assert not missing.complete and "No such file" in missing.error
+
+
+def test_hung_volume_does_not_block(tmp_path, monkeypatch):
+    vol = _tree(tmp_path / "vol")
+    release = threading.Event()
+    real_scan = model_discovery.scan_models
+
+    def scan(root, max_depth, found, stop):
+        if root.endswith("hung"):
+            found.append({"name": "partial.gguf"})
+            release.wait(5)
+            return found
+        return real_scan(root, max_depth, found, stop)
+
+    monkeypatch.setattr(model_discovery, "scan_models", scan)
+    start = time.monotonic()
+    try:
+        scans = discover_models([str(vol), str(tmp_path / "hung")], timeout=0.3)
+    finally:
+        release.set()
+    assert time.monotonic() - start < 2
+    assert scans[str(vol)].complete
+    hung = scans[str(tmp_path / "hung")]
+    assert not hung.complete
+    assert "timed out" in hung.error
+    assert hung.to_dict()["found"] == [{"name": "partial.gguf"}]
+
+
+def test_discover_volumes(tmp_path, monkeypatch):
+    mnt = tmp_path / "mnt"
+    (mnt / "disk1").mkdir(parents=True)
+    (mnt / "disk2").mkdir()
+    (mnt / "file.txt").write_text("x")
+    assert discover_volumes([str(mnt), str(tmp_path / "nope")]) == [str(mnt / "disk1"), str(mnt / "disk2")]
+
+    monkeypatch.setattr(model_discovery, "DEFAULT_MOUNT_ROOTS", (str(mnt),))
+    mm = ModelManager()
+    vols = mm.list_ollama_volumes()
+    assert vols[0] == os.path.expanduser("~/.ollama/models")
+    assert vols[-2:] == [str(mnt / "disk1"), str(mnt / "disk2")]
+
+
+def test_manager_discover_models_uses_config(tmp_path, monkeypatch):
+    class DummyConf:
+        model_storage_path = str(_tree(tmp_path / "models"))
+        model_discovery_depth = 1
+        model_discovery_timeout = 5.0
+    monkeypatch.setattr(model_discovery, "DEFAULT_MOUNT_ROOTS", ())
+    mm = ModelManager(DummyConf())
+    scans = {s["root"]: s for s in mm.discover_models()}
+    assert _names(scans[DummyConf.model_storage_path]["found"]) == ["one.bin", "top.gguf"]
+    scans = {s["root"]: s for s in mm.discover_models(max_depth=0)}
+    assert _names(scans[DummyConf.model_storage_path]["found"]) == ["top.gguf"]
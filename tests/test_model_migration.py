@@ -0,0 +1,256 @@
+import errno
+import io
+import os
+
+import pytest
+
+from app import model_migration, model_pull
+from app.model_management import ModelManager
+from app.model_migration import (CHECKPOINT_NAME, MigrationError, ProgressPrinter, _copy_range,
+                                 format_progress, migrate)
+
+
+@pytest.fixture
+def models(tmp_path, monkeypatch):
+    # Small segments and chunks so a few KB span several of each
+    monkeypatch.setattr(model_migration, "COPY_SEGMENT_SIZE", 1000)
+    monkeypatch.setattr(model_migration, "COPY_CHUNK_SIZE", 300)
+    monkeypatch.setattr(model_migration, "_same_filesystem", lambda src, dst: False)
+    monkeypatch.setenv("CODER_X_DEDUPE_CACHE", str(tmp_path / "hash_cache.json"))
+    src = tmp_path / "ollama" / "models"
+    (src / "blobs").mkdir(parents=True)
+    (src / "manifests" / "registry.ollama.ai" / "library" / "llama2").mkdir(parents=True)
+    (src / "blobs" / "sha256-aaaa").write_bytes(os.urandom(4500))
+    (src / "blobs" / "sha256-bbbb").write_bytes(os.urandom(1200))
+    (src / "blobs" / "empty").write_bytes(b"")
+    (src / "manifests" / "registry.ollama.ai" / "library" / "llama2" / "latest").write_text('{"layers": []}')
+    os.symlink("blobs/sha256-aaaa", src / "current")
+    return src, tmp_path / "volume"
+
+
+def _contents(root):
+    out = {}
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(dirpath, name)
+            if not os.path.islink(path):
+                with open(path, "rb") as f:
+                    out[os.path.relpath(path, root)] = f.read()
+    return out
+
+
+def test_copy_across_filesystems_then_swap(models):
+    src, dst = models
+    before = _contents(src)
+    events = []
+    report = migrate(str(src), str(dst), workers=3, on_progress=events.append)
+    assert os.path.islink(src) and os.readlink(src) == str(dst)
+    assert _contents(dst) == before
+    assert os.readlink(dst / "current") == "blobs/sha256-aaaa"
+    assert not os.path.exists(str(src) + ".coder-x-old")
+    assert not (dst / CHECKPOINT_NAME).exists()
+    assert not [n for n in os.listdir(dst / "blobs") if n.endswith(model_migration.PART_SUFFIX)]
+    assert report["files"] == 4 and report["bytes"] == report["copied_bytes"] == 5700 + 14
+    assert report["resumed_bytes"] == 0 and not report["same_filesystem"]
+    assert {e["phase"] for e in events} == {"copy", "verify"}
+    assert events[-1]["percent"] == 100.0
+
+
+def test_interrupted_copy_resumes_from_checkpoint(models, monkeypatch):
+    src, dst = models
+    before = _contents(src)
+    real, calls = model_migration._copy_range, []
+
+    def failing(src_fd, dst_fd, offset, length):
+        calls.append(length)
+        if len(calls) == 4:
+            raise OSError(errno.EIO, "Input/output error")
+        real(src_fd, dst_fd, offset, length)
+    monkeypatch.setattr(model_migration, "_copy_range", failing)
+    with pytest.raises(OSError):
+        migrate(str(src), str(dst), workers=1)
+    # Nothing was swapped: the source is intact and the checkpoint is kept
+    assert not os.path.islink(src) and _contents(src) == before
+    assert (dst / CHECKPOINT_NAME).exists()
+
+    calls.clear()
+    monkeypatch.setattr(model_migration, "_copy_range", lambda *a: calls.append(a[3]) or real(*a))
+    report = migrate(str(src), str(dst), workers=2)
+    # The three segments before the failure (a segment already started may also have finished)
+    assert report["resumed_bytes"] >= 3000
+    assert sum(calls) == report["copied_bytes"] == 5714 - report["resumed_bytes"]
+    assert os.path.islink(src) and _contents(dst) == before
+
+
+def test_checksum_mismatch_is_recopied(models, monkeypatch):
+    src, dst = models
+    real = model_migration._copy_range
+
+    def corrupt(src_fd, dst_fd, offset, length):
+        real(src_fd, dst_fd, offset, length)
+        if length == 200:
+            # The last segment of sha256-bbbb; flip a byte so the copy always differs
+            os.pwrite(dst_fd, bytes([os.pread(src_fd, 1, offset)[0] ^ 0xFF]), offset)
+    monkeypatch.setattr(model_migration, "_copy_range", corrupt)
+    with pytest.raises(MigrationError, match="blobs/sha256-bbbb"):
+        migrate(str(src), str(dst))
+    assert not os.path.islink(src)
+    monkeypatch.setattr(model_migration, "_copy_range", real)
+    report = migrate(str(src), str(dst))
+    assert report["copied_bytes"] == 1200 and report["resumed_bytes"] == 4514
+    assert (dst / "blobs" / "sha256-bbbb").read_bytes() == (src / "blobs" / "sha256-bbbb").read_bytes()
+
+
+def test_same_filesystem_renames(models, monkeypatch):
+    src, dst = models
+    monkeypatch.setattr(model_migration, "_same_filesystem", lambda a, b: True)
+    ino = os.stat(src / "blobs" / "sha256-aaaa").st_ino
+    report = migrate(str(src), str(dst))
+    assert os.stat(dst / "blobs" / "sha256-aaaa").st_ino == ino
+    assert report["same_filesystem"] and report["copied_bytes"] == 0
+    assert os.path.islink(src) and os.readlink(dst / "current") == "blobs/sha256-aaaa"
+
+
+def test_same_filesystem_into_used_directory_copies(models, monkeypatch):
+    src, dst = models
+    monkeypatch.setattr(model_migration, "_same_filesystem", lambda a, b: True)
+    dst.mkdir()
+    (dst / "notes.txt").write_text("keep me")
+    before = _contents(src)
+    report = migrate(str(src), str(dst))
+    assert report["copied_bytes"] == 5714
+    assert _contents(dst) == dict(before, **{"notes.txt": b"keep me"})
+
+
+@pytest.mark.parametrize("target", ["same", "same-via-link", "nested", "parent"])
+def test_overlapping_destination_is_refused(models, target):
+    src, _ = models
+    before = _contents(src)
+    os.symlink(src, src.parent / "link")
+    dst = {"same": src, "same-via-link": src.parent / "link", "nested": src / "nested",
+           "parent": src.parent}[target]
+    with pytest.raises(MigrationError):
+        migrate(str(src), str(dst))
+    assert not os.path.islink(src) and _contents(src) == before
+
+
+def test_swap_keeps_source_unless_destination_holds_copies(models, monkeypatch):
+    src, dst = models
+    # A broken copy step that leaves the destination without the files
+    monkeypatch.setattr(model_migration, "_copy_tree", lambda *args: {"copied": 0, "resumed": 0})
+    before = _contents(src)
+    with pytest.raises(MigrationError):
+        migrate(str(src), str(dst))
+    assert not os.path.islink(src) and _contents(src) == before
+    assert not os.path.exists(str(src) + ".coder-x-old")
+
+
+def test_set_volume_to_current_directory_keeps_models(models, monkeypatch, capsys):
+    src, _ = models
+    monkeypatch.setenv("HOME", str(src.parent.parent))
+    os.rename(src.parent, src.parent.parent / ".ollama")
+    default = src.parent.parent / ".ollama" / "models"
+    before = _contents(default)
+    monkeypatch.setattr(ModelManager, "set_model_storage_path", lambda self, p: None)
+    assert ModelManager().set_ollama_volume(str(default))
+    assert not default.is_symlink() and _contents(default) == before
+    assert "[INFO] Ollama models are already stored in" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("disable", [["copy_file_range"], ["copy_file_range", "sendfile"]])
+def test_copy_range_fallbacks(tmp_path, monkeypatch, disable):
+    def unsupported(*args):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+    for name in disable:
+        monkeypatch.setattr(os, name, unsupported, raising=False)
+    data = os.urandom(5000)
+    (tmp_path / "src").write_bytes(data)
+    (tmp_path / "dst").write_bytes(b"\0" * 5000)
+    src_fd = os.open(tmp_path / "src", os.O_RDONLY)
+    dst_fd = os.open(tmp_path / "dst", os.O_WRONLY)
+    try:
+        _copy_range(src_fd, dst_fd, 1000, 3000)
+    finally:
+        os.close(src_fd)
+        os.close(dst_fd)
+    out = (tmp_path / "dst").read_bytes()
+    assert out[1000:4000] == data[1000:4000] and out[:1000] == b"\0" * 1000
+
+
+def test_migration_and_pull_listeners_are_separate():
+    migrations, pulls = [], []
+    model_migration.add_listener(migrations.append)
+    model_pull.add_listener(pulls.append)
+    try:
+        model_migration.emit({"phase": "copy"})
+    finally:
+        model_migration.remove_listener(migrations.append)
+        model_pull.remove_listener(pulls.append)
+    assert migrations == [{"phase": "copy"}] and pulls == []
+
+
+def test_progress_format():
+    event = {"phase": "copy", "done": 2 * 10**9, "total": 8 * 10**9, "percent": 25.0, "rate": 100 * 10**6, "eta": 60.0}
+    assert format_progress(event) == "copy   2.0 GB/8.0 GB  25.0%  100.0 MB/s  ETA 1:00"
+    out = io.StringIO()
+    ProgressPrinter(out)(event)
+    assert out.getvalue().endswith("ETA 1:00\n")
+
+
+def test_set_ollama_volume_migrates(models, monkeypatch, capsys):
+    src, dst = models
+    monkeypatch.setenv("HOME", str(src.parent.parent))
+    os.rename(src.parent, src.parent.parent / ".ollama")
+    default = src.parent.parent / ".ollama" / "models"
+    monkeypatch.setattr(ModelManager, "set_model_storage_path", lambda self, p: None)
+    assert ModelManager().set_ollama_volume(str(dst))
+    assert os.readlink(default) == str(dst) and (dst / "blobs" / "sha256-aaaa").exists()
+    assert "[OK] Migrated 4 files" in capsys.readouterr().out
+
+
+def test_set_ollama_volume_moves_between_volumes(models, monkeypatch, capsys):
+    src, dst = models
+    monkeypatch.setenv("HOME", str(src.parent.parent))
+    os.rename(src.parent, src.parent.parent / ".ollama")
+    default = src.parent.parent / ".ollama" / "models"
+    before = _contents(default)
+    monkeypatch.setattr(ModelManager, "set_model_storage_path", lambda self, p: None)
+    assert ModelManager().set_ollama_volume(str(dst))
+    other = dst.parent / "volume-b"
+    assert ModelManager().set_ollama_volume(str(other))
+    assert os.readlink(default) == str(other) and _contents(other) == before
+    # No stray link to the new volume is left where the models were
+    assert not os.path.lexists(dst)
+    assert capsys.readouterr().out.count("[OK] Migrated 4 files") == 2
+
+
+@pytest.mark.parametrize("same_filesystem", [False, True])
+def test_set_ollama_volume_when_already_linked(models, monkeypatch, same_filesystem):
+    src, dst = models
+    monkeypatch.setattr(model_migration, "_same_filesystem", lambda a, b: same_filesystem)
+    home = src.parent.parent
+    monkeypatch.setenv("HOME", str(home))
+    (home / ".ollama").mkdir()
+    default = home / ".ollama" / "models"
+    os.symlink(src, default)
+    before = _contents(src)
+    monkeypatch.setattr(ModelManager, "set_model_storage_path", lambda self, p: None)
+    assert ModelManager().set_ollama_volume(str(dst))
+    assert os.readlink(default) == str(dst) and _contents(default) == before
+    assert not os.path.lexists(src)
+    assert os.listdir(home / ".ollama") == ["models"]
+
+
+def test_set_ollama_volume_reports_failed_migration(models, monkeypatch, capsys):
+    src, dst = models
+    monkeypatch.setenv("HOME", str(src.parent.parent))
+    os.rename(src.parent, src.parent.parent / ".ollama")
+
+    def disk_full(*args):
+        raise OSError(errno.ENOSPC, "No space left on device")
+    monkeypatch.setattr(model_migration, "_copy_range", disk_full)
+    monkeypatch.setattr(ModelManager, "set_model_storage_path", lambda self, p: pytest.fail("config changed"))
+    assert not ModelManager().set_ollama_volume(str(dst))
+    assert "[ERROR] Model migration stopped" in capsys.readouterr().out
+    default = src.parent.parent / ".ollama" / "models"
+    assert default.is_dir() and not default.is_symlink()
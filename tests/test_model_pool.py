@@ -0,0 +1,171 @@
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from app.cli_entry import app
+from app.config import save_config
+from app.config_schema import CoderXConfig
+from app.model_management import ModelManager
+from app.model_pool import ModelPool, OllamaRuntime, canonical_name
+from app.ollama_client import OllamaError, OllamaUnavailable
+
+GB = 1024 ** 3
+
+
+class StandInRuntime:
+    """In-memory runtime: resident models and their sizes, with a log of loads and unloads."""
+
+    def __init__(self, sizes, estimates=None, resident=None):
+        self.sizes = sizes
+        self.estimates = estimates or sizes
+        self.resident = dict(resident or {})
+        self.log = []
+
+    def load(self, name):
+        if name not in self.sizes:
+            raise OllamaError(f"model '{name}' not found", 404)
+        self.log.append(("load", name))
+        self.resident[name] = self.sizes[name]
+
+    def unload(self, name):
+        self.log.append(("unload", name))
+        self.resident.pop(name, None)
+
+    def running(self):
+        return dict(self.resident)
+
+    def estimate(self, name):
+        return self.estimates.get(name, 0)
+
+
+@pytest.fixture
+def runtime():
+    return StandInRuntime({"a:latest": 4 * GB, "b:latest": 3 * GB, "c:latest": 2 * GB, "huge:latest": 20 * GB})
+
+
+def _pool(runtime, tmp_path, budget=8 * GB):
+    return ModelPool(runtime, budget, str(tmp_path / "pool.json"))
+
+
+def test_lru_eviction_within_budget(runtime, tmp_path):
+    pool = _pool(runtime, tmp_path)
+    assert pool.acquire("a")["cold"]
+    pool.acquire("b")
+    # Using a again makes b the least recent
+    assert not pool.acquire("a")["cold"]
+    result = pool.acquire("c")
+    assert result["evicted"] == ["b:latest"]
+    assert set(runtime.resident) == {"a:latest", "c:latest"}
+    assert result["used_bytes"] == 6 * GB and result["budget_bytes"] == 8 * GB
+
+
+def test_warm_acquire_refreshes_without_eviction(runtime, tmp_path):
+    pool = _pool(runtime, tmp_path)
+    pool.acquire("a")
+    runtime.log.clear()
+    result = pool.acquire("a:latest")
+    assert not result["cold"] and result["evicted"] == []
+    assert runtime.log == [("load", "a:latest")]
+
+
+def test_recency_persists_across_pools(runtime, tmp_path):
+    _pool(runtime, tmp_path).acquire("b")
+    _pool(runtime, tmp_path).acquire("a")
+    # A fresh pool (another CLI run) still knows b is older than a
+    assert _pool(runtime, tmp_path).acquire("c")["evicted"] == ["b:latest"]
+    status = _pool(runtime, tmp_path).status()
+    assert [m["model"] for m in status["models"]] == ["c:latest", "a:latest"]
+
+
+def test_unmanaged_models_are_evicted_first(tmp_path):
+    runtime = StandInRuntime({"a:latest": 4 * GB, "other:latest": 3 * GB, "c:latest": 2 * GB},
+                             resident={"other:latest": 3 * GB})
+    pool = _pool(runtime, tmp_path)
+    pool.acquire("a")
+    assert pool.acquire("c")["evicted"] == ["other:latest"]
+
+
+def test_underestimated_model_settles_after_load(tmp_path):
+    runtime = StandInRuntime({"a:latest": 4 * GB, "b:latest": 6 * GB}, estimates={"b:latest": 1 * GB})
+    pool = _pool(runtime, tmp_path)
+    pool.acquire("a")
+    result = pool.acquire("b")
+    assert runtime.log == [("load", "a:latest"), ("load", "b:latest"), ("unload", "a:latest")]
+    assert result["evicted"] == ["a:latest"] and result["resident_bytes"] == 6 * GB
+
+
+def test_model_larger_than_budget_loads_alone(runtime, tmp_path):
+    pool = _pool(runtime, tmp_path)
+    pool.preload(["a", "b"])
+    result = pool.acquire("huge")
+    assert sorted(result["evicted"]) == ["a:latest", "b:latest"]
+    assert list(runtime.resident) == ["huge:latest"]
+
+
+def test_evict_and_failed_load(runtime, tmp_path):
+    pool = _pool(runtime, tmp_path)
+    pool.acquire("a")
+    assert pool.evict("a") and not pool.evict("a")
+    with pytest.raises(OllamaError):
+        pool.acquire("missing")
+    assert json.loads((tmp_path / "pool.json").read_text())["last_used"] == {}
+
+
+def test_canonical_name():
+    assert canonical_name("llama3") == "llama3:latest"
+    assert canonical_name("user/model:q4") == "user/model:q4"
+    assert canonical_name("registry.local:5000/ns/model") == "registry.local:5000/ns/model:latest"
+
+
+def test_set_active_model_warms_only_when_asked(runtime, tmp_path, monkeypatch):
+    config_path = tmp_path / "coderx_config.json"
+    monkeypatch.setenv("CODER_X_CONFIG", str(config_path))
+    config = CoderXConfig(model_pool_preload=["b", "nope"])
+    save_config(config, str(config_path))
+    mm = ModelManager(config)
+    mm._pool = _pool(runtime, tmp_path)
+    # Switching is a config update: nothing is loaded or evicted
+    assert mm.set_active_model("c") is None
+    assert mm.get_active_model() == "c" and runtime.log == []
+    result = mm.set_active_model("a", warm=True)
+    assert mm.get_active_model() == "a" and result["cold"] and "a:latest" in runtime.resident
+    results = mm.preload_models()
+    assert results[0]["model"] == "b:latest" and results[1] == {"model": "nope", "error": "could not be loaded"}
+
+
+def test_unreachable_runtime_does_not_block_switching(tmp_path, monkeypatch):
+    config_path = tmp_path / "coderx_config.json"
+    monkeypatch.setenv("CODER_X_CONFIG", str(config_path))
+    mm = ModelManager(CoderXConfig())
+    assert isinstance(mm.pool.runtime, OllamaRuntime)
+    with pytest.raises(OllamaUnavailable):
+        mm.pool.acquire("a")
+    mm.set_active_model("a")
+    assert mm.get_active_model() == "a"
+
+
+def test_cli_preload_and_pool(runtime, tmp_path, monkeypatch):
+    pool = _pool(runtime, tmp_path)
+    monkeypatch.setattr(ModelManager, "pool", property(lambda self: pool))
+    runner = CliRunner()
+    result = runner.invoke(app, ["model", "preload", "a", "b", "c"])
+    assert result.exit_code == 0
+    assert "[OK] a:latest loaded in" in result.output
+    assert "[OK] c:latest loaded in" in result.output and "evicted a:latest" in result.output
+    status = json.loads(runner.invoke(app, ["model", "pool"]).output)
+    assert [m["model"] for m in status["models"]] == ["c:latest", "b:latest"]
+    assert "[OK] Evicted b." in runner.invoke(app, ["model", "pool", "b"]).output
+
+
+def test_cli_set_warms_with_flag(runtime, tmp_path, monkeypatch):
+    monkeypatch.setenv("CODER_X_CONFIG", str(tmp_path / "coderx_config.json"))
+    pool = _pool(runtime, tmp_path)
+    monkeypatch.setattr(ModelManager, "pool", property(lambda self: pool))
+    runner = CliRunner()
+    result = runner.invoke(app, ["model", "set", "b"])
+    assert result.exit_code == 0 and runtime.log == []
+    result = runner.invoke(app, ["model", "set", "a", "--warm"])
+    assert result.exit_code == 0 and "[OK] a:latest loaded in" in result.output
+    result = runner.invoke(app, ["model", "set", "nope", "--warm"])
+    assert result.exit_code == 0 and "[WARN] Model 'nope' could not be loaded" in result.output
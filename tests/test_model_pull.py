@@ -0,0 +1,180 @@
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from typer.testing import CliRunner
+
+from app import model_pull
+from app.cli_entry import app
+from app.model_management import ModelManager
+from app.model_pull import ProgressRenderer, PullQueue, format_event, pull_model
+from app.ollama_client import OllamaClient, OllamaUnavailable
+
+LAYER_A = "sha256:aaaa"
+LAYER_B = "sha256:bbbb"
+
+
+class StreamingOllama(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _stream(self, events, drop=False):
+        # Chunked like the real server: one chunk per event, so each reaches the client at once
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for event in events:
+            data = json.dumps(event).encode() + b"\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+        if drop:
+            # Hang up without the final chunk: the client sees the connection lost mid-download
+            self.close_connection = True
+        else:
+            self.wfile.write(b"0\r\n\r\n")
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        model = body["model"]
+        self.server.pulls.append(model)
+        attempt = self.server.pulls.count(model)
+        manifest = {"status": "pulling manifest"}
+        if model == "missing":
+            self._stream([manifest, {"error": "pull model manifest: file does not exist"}])
+        elif model == "flaky" and attempt == 1:
+            self._stream([manifest,
+                          {"status": "pulling aaaa", "digest": LAYER_A, "total": 100, "completed": 0},
+                          {"status": "pulling aaaa", "digest": LAYER_A, "total": 100, "completed": 40}], drop=True)
+        else:
+            start = 40 if model == "flaky" else 0
+            self._stream([manifest,
+                          {"status": "pulling aaaa", "digest": LAYER_A, "total": 100, "completed": start},
+                          {"status": "pulling aaaa", "digest": LAYER_A, "total": 100, "completed": 100},
+                          {"status": "pulling bbbb", "digest": LAYER_B, "total": 50, "completed": 50},
+                          {"status": "verifying sha256 digest"},
+                          {"status": "success"}])
+
+
+@pytest.fixture
+def server(monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StreamingOllama)
+    httpd.pulls = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("OLLAMA_HOST", f"127.0.0.1:{httpd.server_address[1]}")
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_pull_reports_whole_model_progress(server):
+    events = []
+    assert pull_model("llama2", events.append, client=OllamaClient())
+    layered = [e for e in events if e["total"]]
+    assert [e["percent"] for e in layered] == [0.0, 100.0, 100.0, 100.0, 100.0]
+    assert layered[-1]["completed"] == layered[-1]["total"] == 150
+    assert events[-1]["status"] == "success" and events[-1]["done"]
+    assert not any(e["resumed"] for e in events)
+
+
+def test_interrupted_pull_is_retried_and_resumes(server):
+    events = []
+    assert pull_model("flaky", events.append, client=OllamaClient(), backoff=0)
+    assert server.pulls == ["flaky", "flaky"]
+    statuses = [e["status"] for e in events]
+    assert "retrying (1/3)" in statuses
+    assert events[-1]["done"] and events[-1]["resumed"]
+    # Progress never moves backwards across the retry
+    completed = [e["completed"] for e in events]
+    assert completed == sorted(completed)
+
+
+def test_permanent_error_is_not_retried(server):
+    events = []
+    assert not pull_model("missing", events.append, client=OllamaClient(), backoff=0)
+    assert server.pulls == ["missing"]
+    assert events[-1]["status"] == "failed"
+    assert "file does not exist" in events[-1]["error"]
+
+
+def test_unreachable_server_raises_for_cli_fallback():
+    with pytest.raises(OllamaUnavailable):
+        pull_model("llama2", client=OllamaClient("127.0.0.1:9"))
+
+
+def test_listeners_receive_manager_pull_events(server):
+    events = []
+    model_pull.add_listener(events.append)
+    try:
+        assert ModelManager().load_model_ollama("llama2")
+    finally:
+        model_pull.remove_listener(events.append)
+    assert events[-1]["model"] == "llama2" and events[-1]["done"]
+
+
+def test_pull_queue_is_bounded_and_dedupes():
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def pull(name):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return name != "bad"
+
+    with PullQueue(pull, max_concurrent=2) as queue:
+        first = queue.submit("a")
+        assert queue.submit("a") is first
+        for name in ("b", "c", "bad", "d"):
+            queue.submit(name)
+        results = queue.wait()
+    assert results == {"a": True, "b": True, "c": True, "bad": False, "d": True}
+    assert peak[0] == 2
+
+
+def test_renderer_plain_stream_writes_milestones():
+    out = io.StringIO()
+    render = ProgressRenderer(out)
+    base = {"model": "m", "status": "pulling aaaa", "total": 100, "rate": 0.0, "resumed": False,
+            "done": False, "error": None}
+    for completed in (0, 1, 2, 55, 100):
+        render(dict(base, completed=completed, percent=float(completed)))
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 3
+    assert "55.0%" in lines[1] and "100.0%" in lines[2]
+
+
+def test_renderer_tty_redraws_in_place():
+    class Tty(io.StringIO):
+        def isatty(self):
+            return True
+    out = Tty()
+    render = ProgressRenderer(out, interval=0)
+    event = {"model": "m", "status": "pulling", "total": 10, "completed": 5, "percent": 50.0,
+             "rate": 1000.0, "resumed": True, "done": False, "error": None}
+    render(event)
+    render(dict(event, model="n"))
+    render.finish()
+    assert "\x1b[1F" in out.getvalue() and "\x1b[2F" in out.getvalue()
+    assert "(resumed)" in format_event(event) and "1.0 KB/s" in format_event(event)
+
+
+def test_cli_load_pulls_models_in_parallel(monkeypatch):
+    def fake_load(self, name):
+        model_pull.emit({"model": name, "status": "success", "total": 10, "completed": 10, "percent": 100.0,
+                         "rate": 0.0, "resumed": False, "done": True, "error": None})
+        return name != "bad"
+    monkeypatch.setattr(ModelManager, "load_model_ollama", fake_load)
+    result = CliRunner().invoke(app, ["model", "load", "llama2", "bad", "--parallel", "2"])
+    assert result.exit_code == 0
+    assert "Model 'llama2' loaded successfully." in result.output
+    assert "[ERROR] Failed to load model 'bad'." in result.output
+    assert "llama2" in result.output and "100.0%" in result.output
@@ -0,0 +1,78 @@
+import os
+from app import offset_index
+from app.offset_index import OffsetIndex
+
+def _write(path, lines):
+    with open(path, "wb") as f:
+        for line in lines:
+            f.write(line + b"\n")
+
+def test_build_and_read(tmp_path):
+    data = tmp_path / "data.jsonl"
+    _write(data, [b"zero", b"one", b"two", b"three"])
+    idx = OffsetIndex(str(data))
+    assert idx.refresh() == 4
+    assert os.path.exists(str(data) + ".idx")
+    assert idx.read(0) == b"zero"
+    assert idx.read(-1) == b"three"
+    assert idx.read_range(1, 3) == [b"one", b"two"]
+    assert idx.read_range(2) == [b"two", b"three"]
+    assert idx.read_range(3, 1) == []
+
+def test_read_out_of_range(tmp_path):
+    data = tmp_path / "data.jsonl"
+    _write(data, [b"only"])
+    idx = OffsetIndex(str(data))
+    idx.refresh()
+    try:
+        idx.read(1)
+        assert False, "Should raise IndexError"
+    except IndexError:
+        pass
+
+def test_incremental_refresh(tmp_path, monkeypatch):
+    monkeypatch.setattr(offset_index, "SCAN_CHUNK_SIZE", 3)
+    data = tmp_path / "data.jsonl"
+    _write(data, [b"a", b"bb"])
+    idx = OffsetIndex(str(data))
+    assert idx.refresh() == 2
+    with open(data, "ab") as f:
+        f.write(b"ccc\ndddd\npartial")
+    # The unterminated line is not indexed until its newline is written
+    assert idx.refresh() == 4
+    assert idx.read_range(0) == [b"a", b"bb", b"ccc", b"dddd"]
+    with open(data, "ab") as f:
+        f.write(b"\n")
+    assert idx.refresh() == 5
+    assert idx.read(4) == b"partial"
+
+def test_rebuild_when_stale(tmp_path):
+    data = tmp_path / "data.jsonl"
+    _write(data, [b"first", b"second", b"third"])
+    idx = OffsetIndex(str(data))
+    idx.refresh()
+    # Rewritten in place with a longer file: the fingerprint no longer matches
+    _write(data, [b"x", b"yy", b"zzz", b"wwww", b"vvvvv", b"uuuuuu"])
+    assert idx.refresh() == 6
+    assert idx.read(2) == b"zzz"
+    # Truncated: covered offset is past the end
+    _write(data, [b"q"])
+    assert idx.refresh() == 1
+    assert idx.read(0) == b"q"
+
+def test_corrupt_index_is_rebuilt(tmp_path):
+    data = tmp_path / "data.jsonl"
+    _write(data, [b"a", b"b"])
+    with open(str(data) + ".idx", "wb") as f:
+        f.write(b"garbage")
+    idx = OffsetIndex(str(data))
+    assert idx.refresh() == 2
+    assert idx.read(1) == b"b"
+
+def test_skip_blank(tmp_path):
+    data = tmp_path / "data.jsonl"
+    _write(data, [b"a", b"", b"b", b"  "])
+    assert OffsetIndex(str(data)).refresh() == 4
+    idx = OffsetIndex(str(data), str(tmp_path / "other.idx"), skip_blank=True)
+    assert idx.refresh() == 2
+    assert idx.read_range(0) == [b"a", b"b"]
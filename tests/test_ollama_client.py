@@ -0,0 +1,167 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app import ollama_client
+from app.model_management import ModelManager, parse_ollama_list_line
+from app.ollama_client import OllamaClient, OllamaError, OllamaUnavailable, ollama_host
+
+TAGS = {"models": [{
+    "name": "llama2:latest",
+    "model": "llama2:latest",
+    "modified_at": "2024-05-01T10:00:00Z",
+    "size": 3825819519,
+    "digest": "78e26419b446",
+    "details": {"format": "gguf", "family": "llama", "parameter_size": "7B", "quantization_level": "Q4_0"},
+}]}
+
+
+class StandInOllama(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _record(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        self.server.calls.append((self.command, self.path, body))
+        self.server.peers.add(self.client_address)
+        return body
+
+    def do_GET(self):
+        self._record()
+        if self.path == "/api/tags":
+            self._reply(200, TAGS)
+        elif self.path == "/api/version":
+            self._reply(200, {"version": "0.1.0"})
+        elif self.path == "/api/ps":
+            self._reply(200, {"models": [{"name": "llama2:latest", "model": "llama2:latest", "size": 5137025024,
+                                          "size_vram": 0, "expires_at": "2024-05-01T10:30:00Z"}]})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        body = self._record()
+        if body["model"] == "missing":
+            self._reply(500, {"error": "pull model manifest: file does not exist"})
+        else:
+            self._reply(200, {"status": "success"})
+
+    def do_DELETE(self):
+        body = self._record()
+        if body["model"] == "missing":
+            self._reply(404, {"error": "model 'missing' not found"})
+        else:
+            self._reply(200, {})
+
+
+@pytest.fixture
+def server(monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandInOllama)
+    httpd.calls, httpd.peers = [], set()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    host = f"127.0.0.1:{httpd.server_address[1]}"
+    monkeypatch.setenv("OLLAMA_HOST", host)
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_ollama_host_normalization():
+    assert ollama_host("") == "http://127.0.0.1:11434"
+    assert ollama_host("0.0.0.0") == "http://127.0.0.1:11434"
+    assert ollama_host("example.com:8080") == "http://example.com:8080"
+    assert ollama_host("https://example.com/") == "https://example.com:443"
+    assert ollama_host("http://[::1]") == "http://[::1]:11434"
+
+
+def test_list_models_structured_and_cached(server):
+    client = OllamaClient()
+    models = client.list_models()
+    assert models == [{
+        "name": "llama2:latest", "size": 3825819519, "digest": "78e26419b446",
+        "modified": "2024-05-01T10:00:00Z", "format": "gguf", "family": "llama",
+        "parameter_size": "7B", "quantization": "Q4_0",
+    }]
+    client.list_models()
+    assert len(server.calls) == 1
+    client.list_models(refresh=True)
+    assert len(server.calls) == 2
+    # Both requests went over one kept-alive connection
+    assert len(server.peers) == 1
+
+
+def test_pull_and_delete_invalidate_cache(server):
+    client = OllamaClient()
+    client.list_models()
+    assert client.pull("mistral")
+    assert server.calls[-1] == ("POST", "/api/pull", {"model": "mistral", "name": "mistral", "stream": False})
+    client.list_models()
+    assert [c[1] for c in server.calls] == ["/api/tags", "/api/pull", "/api/tags"]
+    assert client.delete("mistral")
+    assert server.calls[-1][:2] == ("DELETE", "/api/delete")
+    with pytest.raises(OllamaError) as e:
+        client.delete("missing")
+    assert e.value.status == 404
+    assert "not found" in str(e.value)
+
+
+def test_load_unload_and_running(server):
+    client = OllamaClient()
+    client.load("llama2", keep_alive="10m")
+    assert server.calls[-1] == ("POST", "/api/generate", {"model": "llama2", "keep_alive": "10m", "stream": False})
+    client.unload("llama2")
+    assert server.calls[-1][2]["keep_alive"] == 0
+    assert client.running() == [{"name": "llama2:latest", "size": 5137025024, "size_vram": 0,
+                                 "expires_at": "2024-05-01T10:30:00Z"}]
+
+
+def test_unreachable_server_is_remembered(monkeypatch):
+    client = OllamaClient("127.0.0.1:9")
+    with pytest.raises(OllamaUnavailable):
+        client.list_models()
+    monkeypatch.setattr(client, "_session", None)
+    monkeypatch.setattr(OllamaClient, "session", property(lambda self: pytest.fail("retried too soon")))
+    with pytest.raises(OllamaUnavailable):
+        client.version()
+
+
+def test_manager_uses_api(server, monkeypatch):
+    monkeypatch.setattr("subprocess.run", lambda *a, **kw: pytest.fail("spawned the ollama CLI"))
+    mm = ModelManager()
+    assert mm.list_ollama_models() == ["llama2:latest"]
+    assert mm.list_ollama_model_details()[0]["digest"] == "78e26419b446"
+    assert mm.load_model_ollama("mistral")
+    assert not mm.load_model_ollama("missing")
+    assert mm.unload_model_ollama("mistral")
+    assert not mm.unload_model_ollama("missing")
+    # One shared client: its pool and cache survive across managers
+    assert ollama_client.get_client() is ollama_client.get_client()
+
+
+def test_manager_falls_back_to_cli(monkeypatch):
+    class DummyResult:
+        returncode = 0
+        stdout = "NAME            ID              SIZE      MODIFIED\nllama2:latest   78e26419b446    3.8 GB    2 weeks ago\n"
+    monkeypatch.setattr("subprocess.run", lambda *a, **kw: DummyResult())
+    mm = ModelManager()
+    assert mm.list_ollama_model_details() == [
+        {"name": "llama2:latest", "size": 3_800_000_000, "digest": "78e26419b446", "modified": "2 weeks ago"}]
+    assert mm.load_model_ollama("llama2")
+
+
+def test_parse_ollama_list_line():
+    assert parse_ollama_list_line("output") == {"name": "output", "size": None, "digest": None, "modified": None}
+    assert parse_ollama_list_line("a:b\tid1\t512 MB\tnow")["size"] == 512_000_000
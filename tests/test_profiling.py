@@ -0,0 +1,73 @@
+import io
+import json
+import pytest
+from app import profiling
+from app.profiling import span, timed
+
+@pytest.fixture(autouse=True)
+def clean_profiler():
+    profiling.reset()
+    yield
+    profiling.reset()
+
+def test_disabled_spans_are_shared_noops():
+    assert span("a") is span("b")
+    with span("a"):
+        pass
+    assert profiling.roots() == []
+
+def test_nested_spans_and_decorator():
+    @timed("inner")
+    def inner():
+        return 42
+    profiling.enable()
+    with span("outer", path="/x"):
+        assert inner() == 42
+        with pytest.raises(KeyError):
+            with span("failing"):
+                raise KeyError("k")
+    profiling.disable()
+    (outer,) = profiling.roots()
+    assert outer.attrs == {"path": "/x"}
+    assert [c.name for c in outer.children] == ["inner", "failing"]
+    assert outer.children[1].attrs["error"] == "KeyError"
+    assert outer.duration_ms >= outer.children[0].duration_ms
+    tree = profiling.format_tree()
+    assert "outer  path=/x" in tree and "    inner" not in tree.splitlines()[0]
+
+def test_chrome_trace_and_report(tmp_path):
+    profiling.enable()
+    with span("outer"):
+        with span("inner", n=1):
+            pass
+    out = tmp_path / "trace.json"
+    stream = io.StringIO()
+    profiling.write_report(str(out), stream=stream)
+    events = json.loads(out.read_text())["traceEvents"]
+    assert [e["name"] for e in events] == ["outer", "inner"]
+    assert all(e["ph"] == "X" for e in events) and events[1]["args"] == {"n": "1"}
+    assert "[PROFILE] span tree" in stream.getvalue()
+
+def test_cprofile_stats(tmp_path, monkeypatch):
+    import pstats
+    monkeypatch.setenv("CODER_X_PROFILE", str(tmp_path / "out.prof"))
+    output = profiling.start_from_env()
+    assert output.endswith("out.prof")
+    sum(range(1000))
+    profiling.write_report(output, stream=io.StringIO())
+    assert pstats.Stats(output).total_calls > 0
+
+def test_start_from_env(monkeypatch):
+    monkeypatch.delenv("CODER_X_PROFILE", raising=False)
+    assert profiling.start_from_env() is None and not profiling.enabled()
+    monkeypatch.setenv("CODER_X_PROFILE", "1")
+    assert profiling.start_from_env() == "" and profiling.enabled()
+
+def test_cli_profile_flag(tmp_path):
+    from typer.testing import CliRunner
+    from app.cli_entry import app
+    sample = tmp_path / "s.txt"
+    sample.write_text("x")
+    result = CliRunner().invoke(app, ["--profile", "file", "read", str(sample)])
+    assert result.exit_code == 0
+    assert "command.file" in result.output and "file.read" in result.output
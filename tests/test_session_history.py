@@ -60,24 +60,41 @@ def test_load_empty_file():
     finally:
         os.remove(path)
 
-def test_load_missing_file():
-    path = "_not_a_real_file.json"
-    try:
-        class DummyConf:
-            history_path = path
-        sh = SessionHistory(config=DummyConf())
-        # Should create file and return []
-        result = sh.load()
-        assert isinstance(result, list)
-        sh.clear()
-        assert sh.load() == []
-    finally:
-        if os.path.exists(path):
-            os.remove(path)
+def test_load_missing_file(tmp_path):
+    path = str(tmp_path / "_not_a_real_file.json")
+    class DummyConf:
+        history_path = path
+    sh = SessionHistory(config=DummyConf())
+    # Should create file and return []
+    result = sh.load()
+    assert isinstance(result, list)
+    sh.clear()
+    assert sh.load() == []
+    assert not os.path.exists(path + ".lock")
 
 import pytest
 import json
 
+
+def test_lock_waiters_follow_a_removed_sidecar(tmp_path):
+    import threading
+    import time
+    from app.file_lock import file_lock, remove_lock
+    lock = str(tmp_path / "hist.json.lock")
+    held = {}
+
+    def waiter():
+        with file_lock(lock):
+            # Locked the sidecar now at lock_path, not the removed one
+            held["exists"] = os.path.exists(lock)
+    with file_lock(lock):
+        t = threading.Thread(target=waiter)
+        t.start()
+        time.sleep(0.1)
+        remove_lock(lock)
+    t.join(timeout=5)
+    assert held == {"exists": True}
+
 def test_load_malformed_file(tmp_path):
     import json
     path = tmp_path / "malformed.json"
@@ -173,3 +190,127 @@ def test_append_non_dict(tmp_path):
     sh.append("notadict")
     hist = sh.load()
     assert "notadict" in hist or any(isinstance(x, str) for x in hist)
+
+def test_append_writes_jsonl(tmp_path):
+    path = str(tmp_path / "hist.json")
+    class DummyConf:
+        history_path = path
+    sh = SessionHistory(config=DummyConf())
+    sh.append({"cmd": "foo"})
+    sh.append({"cmd": "bar"})
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert [json.loads(l) for l in lines] == [{"cmd": "foo"}, {"cmd": "bar"}]
+
+def test_legacy_json_array_is_migrated(tmp_path):
+    path = tmp_path / "legacy.json"
+    with open(path, "w") as f:
+        json.dump([{"cmd": "old1"}, {"cmd": "old2"}], f, indent=2)
+    class DummyConf:
+        history_path = str(path)
+    sh = SessionHistory(config=DummyConf())
+    assert sh.load() == [{"cmd": "old1"}, {"cmd": "old2"}]
+    sh.append({"cmd": "new"})
+    assert sh.load() == [{"cmd": "old1"}, {"cmd": "old2"}, {"cmd": "new"}]
+    with open(path) as f:
+        assert len(f.read().splitlines()) == 3
+
+def test_legacy_compact_array_is_migrated(tmp_path):
+    path = tmp_path / "legacy_compact.json"
+    path.write_text('[["a", "b"]]')
+    class DummyConf:
+        history_path = str(path)
+    sh = SessionHistory(config=DummyConf())
+    sh.append(["c"])
+    assert sh.load() == [["a", "b"], ["c"]]
+
+def _filled_history(tmp_path, n):
+    path = str(tmp_path / "hist.json")
+    class DummyConf:
+        history_path = path
+    sh = SessionHistory(config=DummyConf())
+    for i in range(n):
+        sh.append({"i": i})
+    return sh
+
+def test_iter_entries_streams_in_order(tmp_path):
+    sh = _filled_history(tmp_path, 5)
+    assert [e["i"] for e in sh.iter_entries()] == [0, 1, 2, 3, 4]
+
+def test_tail_reads_from_end(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.session_history.TAIL_BLOCK_SIZE", 16)
+    sh = _filled_history(tmp_path, 50)
+    assert [e["i"] for e in sh.tail(3)] == [47, 48, 49]
+    assert [e["i"] for e in sh.tail(100)] == list(range(50))
+    assert sh.tail(0) == []
+
+def test_tail_legacy_file(tmp_path):
+    path = tmp_path / "legacy.json"
+    path.write_text(json.dumps([{"i": 0}, {"i": 1}], indent=2))
+    class DummyConf:
+        history_path = str(path)
+    sh = SessionHistory(config=DummyConf())
+    assert sh.tail(1) == [{"i": 1}]
+
+def test_page(tmp_path):
+    sh = _filled_history(tmp_path, 10)
+    assert [e["i"] for e in sh.page(3, 4)] == [3, 4, 5, 6]
+    assert [e["i"] for e in sh.page(8)] == [8, 9]
+    assert sh.page(20, 5) == []
+    assert [e["i"] for e in sh.get_history(tail=2)] == [8, 9]
+
+def test_entry_random_access(tmp_path):
+    sh = _filled_history(tmp_path, 20)
+    assert sh.count() == 20
+    assert sh.entry(7) == {"i": 7}
+    assert sh.entry(-1) == {"i": 19}
+    assert [e["i"] for e in sh.entries(5, 8)] == [5, 6, 7]
+    assert os.path.exists(sh.index_path)
+
+def test_index_tracks_append_and_clear(tmp_path):
+    sh = _filled_history(tmp_path, 3)
+    assert sh.entry(2) == {"i": 2}
+    sh.append({"i": 3})
+    assert len(sh.index) == 4
+    assert sh.entry(3) == {"i": 3}
+    sh.clear()
+    sh.append({"cmd": "fresh"})
+    assert sh.count() == 1
+    assert sh.entry(0) == {"cmd": "fresh"}
+
+def test_entry_legacy_file(tmp_path):
+    path = tmp_path / "legacy.json"
+    path.write_text(json.dumps([{"i": 0}, {"i": 1}], indent=2))
+    class DummyConf:
+        history_path = str(path)
+    sh = SessionHistory(config=DummyConf())
+    assert sh.entry(1) == {"i": 1}
+    assert sh.count() == 2
+
+class _SharedConf:
+    def __init__(self, path, segment_bytes=0):
+        self.history_path = path
+        self.history_segment_max_bytes = segment_bytes
+
+def _concurrent_writer(conf, writer_id, n):
+    sh = SessionHistory(config=conf)
+    for i in range(n):
+        sh.append({"w": writer_id, "i": i})
+
+@pytest.mark.parametrize("segment_bytes", [0, 2000])
+def test_concurrent_appends_lose_nothing(tmp_path, segment_bytes):
+    import multiprocessing
+    conf = _SharedConf(str(tmp_path / "shared.json"), segment_bytes)
+    SessionHistory(config=conf)
+    procs = [multiprocessing.Process(target=_concurrent_writer, args=(conf, w, 200)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=60)
+        assert p.exitcode == 0
+    seen = [(e["w"], e["i"]) for e in SessionHistory(config=conf).iter_entries()]
+    assert len(seen) == 800
+    assert set(seen) == {(w, i) for w in range(4) for i in range(200)}
+    # Each writer's own entries stay in order
+    for w in range(4):
+        assert [i for ww, i in seen if ww == w] == list(range(200))
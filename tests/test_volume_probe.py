@@ -0,0 +1,137 @@
+import errno
+import json
+import os
+import time
+
+from typer.testing import CliRunner
+
+from app import volume_probe
+from app.batch import is_read_only
+from app.cli_entry import app
+from app.model_management import ModelManager
+from app.volume_probe import (format_volume, measure_throughput, mount_for, parse_mounts, probe_volumes,
+                              rank_volumes)
+
+MOUNTS = """\
+/dev/nvme0n1p2 / ext4 rw,relatime 0 0
+proc /proc proc rw,nosuid 0 0
+/dev/sda1 /mnt/models xfs rw,noatime 0 0
+/dev/sdb1 /mnt/models/archive btrfs ro,relatime 0 0
+//nas/share /mnt/My\\040Drive cifs rw,vers=3.0 0 0
+"""
+
+
+def test_parse_mounts_and_match(tmp_path):
+    path = tmp_path / "mounts"
+    path.write_text(MOUNTS)
+    mounts = parse_mounts(str(path))
+    assert len(mounts) == 5
+    assert mounts[4]["mount_point"] == "/mnt/My Drive" and mounts[4]["fstype"] == "cifs"
+    assert mounts[3]["options"] == ["ro", "relatime"]
+    assert mount_for("/mnt/models/blobs", mounts)["fstype"] == "xfs"
+    assert mount_for("/mnt/models/archive/old", mounts)["fstype"] == "btrfs"
+    assert mount_for("/mnt/modelsX", mounts)["fstype"] == "ext4"
+    assert mount_for("/mnt/My Drive/llama", mounts)["device"] == "//nas/share"
+    assert parse_mounts(str(tmp_path / "missing")) == []
+
+
+def test_measure_throughput_cleans_up(tmp_path):
+    result = measure_throughput(str(tmp_path), size=3 * 1024 * 1024 + 5, block=1024 * 1024)
+    assert result["probe_bytes"] == 3 * 1024 * 1024
+    assert result["read_mb_s"] > 0 and result["write_mb_s"] > 0
+    assert os.listdir(tmp_path) == []
+
+
+def test_direct_io_fallback_closes_fds_and_is_reported(tmp_path, monkeypatch):
+    real_open = os.open
+    opened, closed = [], []
+
+    def no_direct(path, flags, mode=0o777):
+        if flags & getattr(os, "O_DIRECT", 0):
+            raise OSError(errno.EINVAL, "Invalid argument")
+        fd = real_open(path, flags, mode)
+        opened.append(fd)
+        return fd
+    real_close = os.close
+    monkeypatch.setattr(volume_probe.os, "open", no_direct)
+    monkeypatch.setattr(volume_probe.os, "close", lambda fd: (closed.append(fd), real_close(fd)))
+    for _ in range(3):
+        assert measure_throughput(str(tmp_path), size=1024 * 1024, block=1024 * 1024)["direct_io"] is False
+    assert sorted(opened) == sorted(closed)
+
+
+def test_stale_probe_files_of_live_processes_are_kept(tmp_path):
+    live = tmp_path / f"{volume_probe.PROBE_PREFIX}{os.getpid()}"
+    old = tmp_path / f"{volume_probe.PROBE_PREFIX}{os.getppid()}"
+    dead = tmp_path / f"{volume_probe.PROBE_PREFIX}999999999"
+    for path in (live, old, dead):
+        path.write_bytes(b"x")
+    os.utime(old, (time.time() - 3600, time.time() - 3600))
+    volume_probe._clean_stale_probes(str(tmp_path))
+    assert os.listdir(tmp_path) == [live.name]
+
+
+def test_probe_volumes_ranks_and_shares_filesystems(tmp_path, monkeypatch):
+    a, b = tmp_path / "a", tmp_path / "b"
+    a.mkdir()
+    b.mkdir()
+    speeds = {str(a): (100.0, 50.0), str(b): (900.0, 10.0)}
+    probed = []
+
+    def fake_probe(path, size, mounts):
+        probed.append(path)
+        read, write = speeds[path]
+        return {"path": path, "fstype": "ext4", "free_bytes": 10**9, "read_mb_s": read, "write_mb_s": write,
+                "error": None}
+    monkeypatch.setattr(volume_probe, "probe_directory", fake_probe)
+    devices = {str(a): 1, str(b): 2, str(tmp_path / "a_again"): 1}
+    monkeypatch.setattr(volume_probe.os, "stat", lambda p: type("St", (), {"st_dev": devices.get(str(p), 1)}))
+    monkeypatch.setattr(volume_probe, "existing_ancestor", lambda p: p)
+    results = probe_volumes([str(a), str(b), str(tmp_path / "a_again")], mounts=[])
+    assert [r["path"] for r in results] == [str(b), str(a), str(tmp_path / "a_again")]
+    assert [r["rank"] for r in results] == [1, 2, 3]
+    assert results[2]["shared_with"] == str(a)
+    assert probed == [str(a), str(b)]
+
+
+def test_hung_volume_times_out_and_ranks_last(tmp_path, monkeypatch):
+    def slow_probe(path, size, mounts):
+        if path.endswith("hung"):
+            time.sleep(5)
+        return {"path": path, "free_bytes": 1, "read_mb_s": 1.0, "write_mb_s": 1.0, "error": None}
+    monkeypatch.setattr(volume_probe, "probe_directory", slow_probe)
+    monkeypatch.setattr(volume_probe.os, "stat", lambda p: type("St", (), {"st_dev": str(p)}))
+    start = time.monotonic()
+    results = probe_volumes(["/x/hung", "/x/ok"], timeout=0.2, mounts=[])
+    assert time.monotonic() - start < 2
+    assert results[0]["path"] == "/x/ok"
+    assert results[1]["error"] == "timed out after 0.2s" and results[1]["rank"] == 2
+
+
+def test_read_only_mount_is_not_written(tmp_path, monkeypatch):
+    def no_writes(*args):
+        raise AssertionError("probed a read-only mount")
+    monkeypatch.setattr(volume_probe, "measure_throughput", no_writes)
+    mounts = [{"device": "/dev/sdb1", "mount_point": str(tmp_path), "fstype": "btrfs", "options": ["ro"]}]
+    result = volume_probe.probe_directory(str(tmp_path / "not-yet-created"), mounts=mounts)
+    assert result["error"] == "read-only filesystem" and result["fstype"] == "btrfs"
+    assert result["free_bytes"] > 0
+    assert "[read-only filesystem]" in format_volume(rank_volumes([result])[0])
+
+
+def test_cli_volumes_probe(tmp_path, monkeypatch):
+    class DummyConf:
+        model_storage_path = str(tmp_path / "models")
+        model_discovery_timeout = 1.0
+    monkeypatch.setattr("app.model_management.load_config", lambda: DummyConf())
+    monkeypatch.setattr(ModelManager, "list_ollama_volumes", lambda self: [str(tmp_path)])
+    runner = CliRunner()
+    result = runner.invoke(app, ["model", "volumes", "--probe", "--probe-size", "2"])
+    assert result.exit_code == 0
+    assert " 1. " + str(tmp_path) in result.output and "MB/s" in result.output
+    assert f"[INFO] Recommended volume: {tmp_path}" in result.output
+    result = runner.invoke(app, ["model", "volumes", "--probe", "--probe-size", "1", "--details"])
+    data = json.loads(result.output[:result.output.index("[INFO]")])
+    assert data[0]["probe_bytes"] == 1024 * 1024 and data[0]["rank"] == 1
+    assert not is_read_only({"argv": ["model", "volumes", "--probe"]})
+    assert is_read_only({"argv": ["model", "volumes"]})